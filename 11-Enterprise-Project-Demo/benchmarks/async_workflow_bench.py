@@ -0,0 +1,134 @@
+"""Benchmark: sync `run` vs async `arun` of DeliveryCommandCenterGraph.
+
+Every LLM and JIRA call is replaced by a stub that sleeps for a fixed latency,
+so the wall-clock numbers only reflect how the workflow schedules its calls.
+
+Run from the project root:
+    python -m benchmarks.async_workflow_bench --llm-latency 0.5 --jira-latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import time
+from unittest import mock
+
+# Settings requires these; the stubs below never use them.
+for _name in ("OPENAI_API_KEY", "JIRA_SERVER", "JIRA_EMAIL", "JIRA_API_TOKEN", "JWT_SECRET_KEY"):
+    os.environ.setdefault(_name, "benchmark")
+
+from langchain_core.messages import AIMessage
+
+
+class StubChatModel:
+    """Chat model stand-in with injected latency."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def invoke(self, messages, *args, **kwargs) -> AIMessage:
+        self.calls += 1
+        time.sleep(self.latency)
+        return AIMessage(content='{"risk_score": 42, "proposed_actions": []}')
+
+    async def ainvoke(self, messages, *args, **kwargs) -> AIMessage:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return AIMessage(content='{"risk_score": 42, "proposed_actions": []}')
+
+
+class StubJiraClient:
+    """JIRA client stand-in with injected latency."""
+
+    def __init__(self, latency: float, stories: int = 10):
+        self.latency = latency
+        self.stories = [
+            {
+                "key": f"JIRA-{i}",
+                "summary": f"Story {i}",
+                "status": "In Progress",
+                "assignee": None,
+                "due_date": None,
+                "blockers": [],
+            }
+            for i in range(stories)
+        ]
+
+    def get_stories(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return list(self.stories)
+
+    def get_bugs(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return []
+
+    def get_sprint_health(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return {}
+
+    def get_dependencies(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return []
+
+
+def build_workflow(llm_latency: float, jira_latency: float):
+    """Build the workflow with stubbed LLM and JIRA clients."""
+    with mock.patch("src.integrations.jira_client.JIRA"):
+        from src.agents.graph import DeliveryCommandCenterGraph
+        workflow = DeliveryCommandCenterGraph()
+
+    llm = StubChatModel(llm_latency)
+    for agent in (
+        workflow.planner,
+        workflow.jira_analyst,
+        workflow.risk_agent,
+        workflow.dependency_agent,
+        workflow.comms_agent,
+        workflow.action_agent,
+        workflow.governance_agent,
+    ):
+        agent.llm = llm
+    # ainvoke takes the per-event-loop client from the registry rather than agent.llm
+    from src.agents.llm_pool import llm_registry
+    llm_registry.get_async = lambda *args, **kwargs: llm
+    jira = StubJiraClient(jira_latency)
+    workflow.jira_analyst.jira_client = jira
+    workflow.dependency_agent.jira_client = jira
+    return workflow, llm
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async workflow benchmark")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per stubbed LLM call")
+    parser.add_argument("--jira-latency", type=float, default=0.2, help="Seconds per stubbed JIRA call")
+    parser.add_argument("--runs", type=int, default=3, help="Workflow runs per mode")
+    args = parser.parse_args()
+
+    workflow, llm = build_workflow(args.llm_latency, args.jira_latency)
+    run_args = ("Delivery risk report for next 14 days", "bench_user", "PM", "bench")
+
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        workflow.run(*run_args)
+    sync_seconds = (time.perf_counter() - start) / args.runs
+    sync_calls = llm.calls // args.runs
+
+    llm.calls = 0
+
+    async def run_async():
+        for _ in range(args.runs):
+            await workflow.arun(*run_args)
+
+    start = time.perf_counter()
+    asyncio.run(run_async())
+    async_seconds = (time.perf_counter() - start) / args.runs
+    async_calls = llm.calls // args.runs
+
+    print(f"LLM latency: {args.llm_latency:.3f}s | JIRA latency: {args.jira_latency:.3f}s | runs: {args.runs}")
+    print(f"run  (sync):  {sync_seconds:.3f}s per workflow ({sync_calls} LLM calls)")
+    print(f"arun (async): {async_seconds:.3f}s per workflow ({async_calls} LLM calls)")
+    print(f"speedup:      {sync_seconds / async_seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
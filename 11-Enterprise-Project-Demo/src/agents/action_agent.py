@@ -42,7 +42,25 @@ class ActionAgent(BaseAgent):
         comms_output: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Prepare JIRA actions."""
-        input_data = {
+        return self.invoke(self._actions_input(risk_report, dependency_analysis, comms_output))
+    
+    async def aprepare_actions(
+        self,
+        risk_report: Dict[str, Any],
+        dependency_analysis: Dict[str, Any],
+        comms_output: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prepare JIRA actions (async)."""
+        return await self.ainvoke(self._actions_input(risk_report, dependency_analysis, comms_output))
+    
+    def _actions_input(
+        self,
+        risk_report: Dict[str, Any],
+        dependency_analysis: Dict[str, Any],
+        comms_output: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build action preparation input."""
+        return {
             "input": f"""
             Based on the analysis, prepare JIRA actions:
             
@@ -64,5 +82,4 @@ class ActionAgent(BaseAgent):
             Output as JSON with proposed_actions array.
             """
         }
-        return self.invoke(input_data)
 
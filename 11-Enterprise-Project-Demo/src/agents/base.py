@@ -1,10 +1,13 @@
 """Base agent class."""
-from typing import Dict, Any, List
-from langchain_openai import ChatOpenAI
+from typing import Dict, Any, List, Optional
+import asyncio
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import SystemMessage
 import structlog
 
 from src.config import settings
+from .llm_pool import llm_registry
+from .llm_cache import get_response_cache
 
 logger = structlog.get_logger()
 
@@ -15,27 +18,69 @@ class BaseAgent:
     def __init__(self, name: str, system_prompt: str):
         self.name = name
         self.system_prompt = system_prompt
-        self.llm = ChatOpenAI(
-            model=settings.default_model,
-            temperature=settings.temperature,
+        self.model = settings.default_model
+        self.temperature = settings.temperature
+        self.llm = llm_registry.get(
+            model=self.model,
+            temperature=self.temperature,
             max_tokens=settings.max_tokens,
-            openai_api_key=settings.openai_api_key,
         )
+        # System prompts embed JSON output schemas, so keep them literal (not templated)
         self.prompt_template = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
+            SystemMessage(content=system_prompt),
             ("human", "{input}"),
         ])
+        # Opt-in response cache (LLM_CACHE_ENABLED); None when disabled
+        self.cache = get_response_cache()
     
     def invoke(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Invoke agent with input."""
         try:
             messages = self.prompt_template.format_messages(**input_data)
-            response = self.llm.invoke(messages)
+            cache_key = self._cache_key(messages)
+            if cache_key is not None:
+                cached = self.cache.lookup(self.name, cache_key)
+                if cached is not None:
+                    return self._result(cached, cached=True)
+            with llm_registry.limit(self.model):
+                response = self.llm.invoke(messages)
+            if cache_key is not None:
+                self.cache.store(self.name, cache_key, response.content)
+            return self._result(response.content)
+        except Exception as e:
+            logger.error(f"Agent {self.name} failed", error=str(e))
             return {
                 "agent": self.name,
-                "output": response.content,
-                "success": True,
+                "output": f"Error: {str(e)}",
+                "success": False,
             }
+    
+    async def ainvoke(self, input_data: Dict[str, Any], stream_label: Optional[str] = None) -> Dict[str, Any]:
+        """Invoke agent with input without blocking the event loop.
+        
+        ``stream_label`` tags token chunks when the workflow is streamed, so
+        concurrent drafts from one agent can be told apart (defaults to the agent name).
+        """
+        try:
+            messages = self.prompt_template.format_messages(**input_data)
+            cache_key = self._cache_key(messages)
+            if cache_key is not None:
+                cached = await self._run_cache_op(self.cache.lookup, self.name, cache_key)
+                if cached is not None:
+                    return self._result(cached, cached=True)
+            llm = llm_registry.get_async(
+                model=self.model,
+                temperature=self.temperature,
+                max_tokens=settings.max_tokens,
+            )
+            async with llm_registry.alimit(self.model):
+                response = await llm.ainvoke(
+                    messages,
+                    config={"metadata": {"agent": self.name, "stream_label": stream_label or self.name}},
+                )
+            if cache_key is not None:
+                await self._run_cache_op(self.cache.store, self.name, cache_key, response.content)
+            return self._result(response.content)
         except Exception as e:
             logger.error(f"Agent {self.name} failed", error=str(e))
             return {
@@ -43,4 +88,26 @@ class BaseAgent:
                 "output": f"Error: {str(e)}",
                 "success": False,
             }
-
+    
+    def _result(self, output: str, cached: bool = False) -> Dict[str, Any]:
+        """Build a successful agent result."""
+        result = {
+            "agent": self.name,
+            "output": output,
+            "success": True,
+        }
+        if cached:
+            result["cached"] = True
+        return result
+    
+    def _cache_key(self, messages: List[Any]) -> Optional[str]:
+        """Cache key for the rendered request, or None when caching is off."""
+        if self.cache is None:
+            return None
+        return self.cache.make_key(self.model, self.temperature, self.system_prompt, messages)
+    
+    async def _run_cache_op(self, op, *args):
+        """Run a cache operation, off the event loop for I/O-bound backends."""
+        if self.cache.backend.blocking:
+            return await asyncio.to_thread(op, *args)
+        return op(*args)
@@ -27,7 +27,28 @@ class CommsAgent(BaseAgent):
         days_ahead: int = 14
     ) -> Dict[str, Any]:
         """Draft stakeholder email."""
-        input_data = {
+        return self.invoke(self._email_input(risk_report, jira_analysis, days_ahead))
+    
+    async def adraft_stakeholder_email(
+        self,
+        risk_report: Dict[str, Any],
+        jira_analysis: Dict[str, Any],
+        days_ahead: int = 14
+    ) -> Dict[str, Any]:
+        """Draft stakeholder email (async)."""
+        return await self.ainvoke(
+            self._email_input(risk_report, jira_analysis, days_ahead),
+            stream_label="stakeholder_email",
+        )
+    
+    def _email_input(
+        self,
+        risk_report: Dict[str, Any],
+        jira_analysis: Dict[str, Any],
+        days_ahead: int = 14
+    ) -> Dict[str, Any]:
+        """Build stakeholder email input."""
+        return {
             "input": f"""
             Draft an executive-ready stakeholder email for delivery risk report (next {days_ahead} days).
             
@@ -46,7 +67,6 @@ class CommsAgent(BaseAgent):
             - Keep under 300 words
             """
         }
-        return self.invoke(input_data)
     
     def draft_jira_comments(
         self,
@@ -74,7 +94,26 @@ class CommsAgent(BaseAgent):
         risk_report: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Draft status report."""
-        input_data = {
+        return self.invoke(self._status_report_input(jira_analysis, risk_report))
+    
+    async def adraft_status_report(
+        self,
+        jira_analysis: Dict[str, Any],
+        risk_report: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Draft status report (async)."""
+        return await self.ainvoke(
+            self._status_report_input(jira_analysis, risk_report),
+            stream_label="status_report",
+        )
+    
+    def _status_report_input(
+        self,
+        jira_analysis: Dict[str, Any],
+        risk_report: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build status report input."""
+        return {
             "input": f"""
             Draft a status report combining:
             
@@ -87,5 +126,4 @@ class CommsAgent(BaseAgent):
             Include: Summary, Metrics, Risks, Next Steps
             """
         }
-        return self.invoke(input_data)
 
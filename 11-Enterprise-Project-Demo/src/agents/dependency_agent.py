@@ -1,13 +1,21 @@
 """Dependency Agent."""
 from typing import Dict, Any, List
+import asyncio
+import json
+
 from .base import BaseAgent
+from .dependency_graph import DependencyGraph, get_dependency_graph
+from src.config import settings
 from src.integrations import JiraClient
 
 DEPENDENCY_AGENT_SYSTEM_PROMPT = """You are a Dependency Agent. Your role is to:
 1. Find cross-team dependencies
 2. Identify missing owners
 3. Detect stalled handoffs
-4. Map dependency chains
+4. Explain dependency chains
+
+Blocked items, cycles, missing owners and the critical path are computed
+from the dependency graph and given to you - explain them, do not recompute them.
 
 Output format:
 {
@@ -22,7 +30,8 @@ Output format:
         }
     ],
     "missing_owners": ["JIRA-789"],
-    "critical_path": ["JIRA-123", "JIRA-456", "JIRA-789"]
+    "critical_path": ["JIRA-123", "JIRA-456", "JIRA-789"],
+    "summary": "narrative of cycles, blocked items and the critical path"
 }
 """
 
@@ -40,32 +49,83 @@ class DependencyAgent(BaseAgent):
         jira_analysis: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Analyze dependencies."""
-        # Get dependencies for each story
-        all_dependencies = []
-        for story in stories[:50]:  # Limit for performance
-            deps = self.jira_client.get_dependencies(story['key'])
-            all_dependencies.extend(deps)
+        # Links arrive with the bulk story search; only fall back to
+        # per-issue lookups for stories fetched without them
+        extra_links = []
+        for story in [s for s in stories if "links" not in s][:50]:  # Limit for performance
+            extra_links.extend(self.jira_client.get_dependencies(story['key']))
+        
+        graph = self.build_graph(stories, extra_links)
+        result = self.invoke(self._dependencies_input(stories, graph, jira_analysis))
+        return self._attach_graph(result, graph)
+    
+    async def aanalyze_dependencies(
+        self,
+        stories: List[Dict[str, Any]],
+        jira_analysis: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Analyze dependencies (async)."""
+        # Remaining per-story lookups are independent, so issue them concurrently
+        results = await asyncio.gather(*[
+            asyncio.to_thread(self.jira_client.get_dependencies, story['key'])
+            for story in [s for s in stories if "links" not in s][:50]  # Limit for performance
+        ])
+        extra_links = [dep for deps in results for dep in deps]
         
-        input_data = {
+        graph = self.build_graph(stories, extra_links)
+        result = await self.ainvoke(self._dependencies_input(stories, graph, jira_analysis))
+        return self._attach_graph(result, graph)
+    
+    def build_graph(
+        self,
+        stories: List[Dict[str, Any]],
+        extra_links: List[Dict[str, Any]]
+    ) -> DependencyGraph:
+        """Get the dependency graph for this snapshot of stories and links."""
+        return get_dependency_graph(
+            stories,
+            extra_links,
+            default_estimate_hours=settings.dependency_default_estimate_hours,
+        )
+    
+    def _attach_graph(self, result: Dict[str, Any], graph: DependencyGraph) -> Dict[str, Any]:
+        """Replace model-produced graph facts with the computed ones."""
+        summary = graph.summary(top_n=settings.dependency_top_items)
+        result["dependency_graph"] = summary
+        result["critical_path"] = summary["critical_path"]["path"]
+        result["missing_owners"] = summary["missing_owners"]
+        return result
+    
+    def _dependencies_input(
+        self,
+        stories: List[Dict[str, Any]],
+        graph: DependencyGraph,
+        jira_analysis: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build dependency analysis input."""
+        summary = graph.summary(top_n=settings.dependency_top_items)
+        return {
             "input": f"""
             Analyze dependencies:
             
             Stories: {len(stories)}
-            Dependencies found: {len(all_dependencies)}
+            Issues in dependency graph: {summary['issues']}
+            Blocking links: {summary['blocking_links']}
             
             JIRA Analysis:
             {jira_analysis.get('output', '')}
             
-            Dependency data:
-            {all_dependencies[:20]}
+            Computed dependency graph results (use as-is, do not recompute):
+            - Cycles: {json.dumps(summary['cycles'])}
+            - Blocked items (open transitive blockers): {json.dumps(summary['blocked_items'])}
+            - Missing owners: {json.dumps(summary['missing_owners'])}
+            - Critical path by remaining estimate (hours): {json.dumps(summary['critical_path'])}
+            - Stalest chain (days without update): {json.dumps(summary['stalest_chain'])}
             
-            Identify:
+            Explain:
             1. Blocked items
             2. Missing owners
             3. Stalled handoffs
             4. Critical path
             """
         }
-        
-        return self.invoke(input_data)
-
@@ -0,0 +1,311 @@
+"""In-memory dependency graph over JIRA issue links."""
+from typing import Dict, Any, List, Optional, Iterable
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import cached_property
+import hashlib
+import sys
+import threading
+import numpy as np
+
+from .risk_scoring import _epoch_seconds, SECONDS_PER_DAY
+
+# Link names (as seen from the linking issue) that mean "from blocks key" / "key blocks from"
+BLOCKS_LINKS = {"blocks", "is a prerequisite of"}
+BLOCKED_BY_LINKS = {"is blocked by", "depends on", "has prerequisite"}
+DONE_STATUSES = {"done", "closed", "resolved", "cancelled"}
+
+
+class DependencyGraph:
+    """Blocker graph with interned issue keys and adjacency lists.
+
+    An edge ``u -> v`` means ``u`` blocks ``v``. Issues that are only known
+    through a link (e.g. another team's project) are nodes too.
+    """
+
+    def __init__(
+        self,
+        issues: List[Dict[str, Any]],
+        links: Iterable[Dict[str, Any]] = (),
+        default_estimate_hours: float = 8.0,
+        as_of: Optional[datetime] = None,
+    ):
+        self.keys: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.successors: List[List[int]] = []
+        self.predecessors: List[List[int]] = []
+        self.status: List[Optional[str]] = []
+        self.assignee: List[Optional[str]] = []
+        self.known: List[bool] = []
+
+        for issue in issues:
+            node = self._intern(issue["key"])
+            self.status[node] = issue.get("status")
+            self.assignee[node] = issue.get("assignee")
+            self.known[node] = True
+
+        edges = set()
+        for link in [l for issue in issues for l in issue.get("links", [])] + list(links):
+            link_type = (link.get("type") or "").lower()
+            if link_type in BLOCKS_LINKS:
+                blocker, blocked = link["from"], link["key"]
+            elif link_type in BLOCKED_BY_LINKS:
+                blocker, blocked = link["key"], link["from"]
+            else:
+                continue
+            u, v = self._intern(blocker), self._intern(blocked)
+            if self.status[u] is None and link["key"] == blocker:
+                self.status[u] = link.get("status")
+            if self.status[v] is None and link["key"] == blocked:
+                self.status[v] = link.get("status")
+            edges.add((u, v))
+        for u, v in sorted(edges):
+            self.successors[u].append(v)
+            self.predecessors[v].append(u)
+
+        # Node weights for critical path: remaining hours, or days without an update
+        n = len(self.keys)
+        by_key = {issue["key"]: issue for issue in issues}
+        done = np.array([self.is_done(i) for i in range(n)], dtype=bool)
+        raw_estimates = [by_key.get(key, {}).get("remaining_estimate") for key in self.keys]
+        # 0 is a real estimate (nothing left); only a missing one gets the default
+        estimates = np.array([
+            np.nan if estimate is None else estimate for estimate in raw_estimates
+        ], dtype=np.float64) / 3600.0
+        remaining = np.where(np.isnan(estimates), default_estimate_hours, estimates)
+        now = (as_of or datetime.now(timezone.utc)).timestamp()
+        updated = _epoch_seconds([by_key.get(key, {}).get("updated") for key in self.keys])
+        staleness = np.nan_to_num(np.maximum((now - updated) / SECONDS_PER_DAY, 0.0), nan=0.0)
+        self.weights = {
+            "remaining": np.where(done, 0.0, remaining),
+            "staleness": np.where(done, 0.0, staleness),
+        }
+
+    def _intern(self, key: str) -> int:
+        node = self._index.get(key)
+        if node is None:
+            node = len(self.keys)
+            self._index[sys.intern(key)] = node
+            self.keys.append(key)
+            self.successors.append([])
+            self.predecessors.append([])
+            self.status.append(None)
+            self.assignee.append(None)
+            self.known.append(False)
+        return node
+
+    def is_done(self, node: int) -> bool:
+        return (self.status[node] or "").lower() in DONE_STATUSES
+
+    @cached_property
+    def _components(self) -> List[List[int]]:
+        """Strongly connected components via iterative Tarjan.
+
+        Components come out sinks first, i.e. in reverse topological order of
+        the condensed (acyclic) graph.
+        """
+        n = len(self.keys)
+        index = [-1] * n
+        lowlink = [0] * n
+        on_stack = [False] * n
+        stack: List[int] = []
+        counter = 0
+        components = []
+
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child = work.pop()
+                if child == 0:
+                    index[node] = lowlink[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                successors = self.successors[node]
+                if child < len(successors):
+                    work.append((node, child + 1))
+                    nxt = successors[child]
+                    if index[nxt] == -1:
+                        work.append((nxt, 0))
+                    elif on_stack[nxt]:
+                        lowlink[node] = min(lowlink[node], index[nxt])
+                    continue
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+        return components
+
+    def _is_cyclic(self, component: List[int]) -> bool:
+        return len(component) > 1 or component[0] in self.successors[component[0]]
+
+    @cached_property
+    def cycles(self) -> List[List[str]]:
+        """Blocking cycles, as sorted issue keys per cycle."""
+        return sorted(
+            sorted(self.keys[node] for node in component)
+            for component in self._components if self._is_cyclic(component)
+        )
+
+    @cached_property
+    def _blocker_masks(self) -> List[int]:
+        """Open transitive blockers per node, as bitsets (bit i = node i).
+
+        Computed once over the condensed graph in topological order, so the
+        whole closure costs one pass over the edges. Finished issues neither
+        count as blockers nor pass blocking through; members of a cycle all
+        block each other.
+        """
+        n = len(self.keys)
+        component_of = [0] * n
+        for c, component in enumerate(self._components):
+            for node in component:
+                component_of[node] = c
+        # Bitset of open members + their blockers, per component
+        reach = [0] * len(self._components)
+        masks = [0] * n
+        for c in reversed(range(len(self._components))):
+            component = self._components[c]
+            open_members = [node for node in component if not self.is_done(node)]
+            incoming = 0
+            for node in open_members:
+                for pred in self.predecessors[node]:
+                    if component_of[pred] != c and not self.is_done(pred):
+                        incoming |= reach[component_of[pred]] | (1 << pred)
+            members = 0
+            if self._is_cyclic(component):
+                for node in open_members:
+                    members |= 1 << node
+            reach[c] = incoming | members
+            for node in open_members:
+                masks[node] = (incoming | members) & ~(1 << node)
+        return masks
+
+    def _decode(self, mask: int) -> List[str]:
+        bits = bin(mask)[:1:-1]  # least significant bit first
+        return sorted(self.keys[node] for node, bit in enumerate(bits) if bit == "1")
+
+    def blockers_of(self, key: str) -> List[str]:
+        """All open issues transitively blocking ``key``."""
+        node = self._index.get(key)
+        if node is None:
+            return []
+        return self._decode(self._blocker_masks[node])
+
+    @cached_property
+    def blocker_counts(self) -> Dict[str, int]:
+        """Number of open transitive blockers for every open issue that has any."""
+        return {
+            self.keys[node]: bin(mask).count("1")
+            for node, mask in enumerate(self._blocker_masks) if mask
+        }
+
+    def critical_path(self, weight: str = "remaining") -> Dict[str, Any]:
+        """Longest weighted blocker chain through the acyclic part of the graph."""
+        return self._critical_paths[weight]
+
+    @cached_property
+    def _critical_paths(self) -> Dict[str, Dict[str, Any]]:
+        n = len(self.keys)
+        in_cycle = {node for component in self._components if self._is_cyclic(component) for node in component}
+        # Singleton components in reverse Tarjan order are topologically sorted
+        order = [
+            component[0] for component in reversed(self._components)
+            if not self._is_cyclic(component)
+        ]
+
+        paths = {}
+        for name, weight_array in self.weights.items():
+            weights = weight_array.tolist()
+            dist = [float("-inf")] * n
+            parent = [-1] * n
+            for u in order:
+                if dist[u] == float("-inf"):
+                    dist[u] = weights[u]
+                for v in self.successors[u]:
+                    if v in in_cycle:
+                        continue
+                    candidate = dist[u] + weights[v]
+                    if candidate > dist[v]:
+                        dist[v] = candidate
+                        parent[v] = u
+            if not order:
+                paths[name] = {"path": [], "length": 0.0}
+                continue
+            end = max(order, key=lambda u: (dist[u], -u))
+            path = []
+            node = end
+            while node != -1:
+                path.append(self.keys[node])
+                node = parent[node]
+            paths[name] = {"path": path[::-1], "length": round(float(dist[end]), 2)}
+        return paths
+
+    def summary(self, top_n: int = 20) -> Dict[str, Any]:
+        """Computed results for the agent to narrate."""
+        blocked = sorted(self.blocker_counts.items(), key=lambda item: (-item[1], item[0]))
+        missing_owners = sorted(
+            self.keys[node] for node in range(len(self.keys))
+            if self.known[node] and not self.assignee[node] and not self.is_done(node)
+            and (self.successors[node] or self.predecessors[node])
+        )
+        return {
+            "issues": len(self.keys),
+            "blocking_links": sum(len(s) for s in self.successors),
+            "cycles": self.cycles,
+            "blocked_items": [
+                {"issue_key": key, "open_blockers": count, "blockers": self.blockers_of(key)[:top_n]}
+                for key, count in blocked[:top_n]
+            ],
+            "missing_owners": missing_owners[:top_n],
+            "critical_path": self.critical_path("remaining"),
+            "stalest_chain": self.critical_path("staleness"),
+        }
+
+
+def snapshot_version(issues: List[Dict[str, Any]], links: Iterable[Dict[str, Any]] = ()) -> str:
+    """Fingerprint of the issue/link snapshot a graph is built from."""
+    digest = hashlib.sha1()
+    for issue in sorted(issues, key=lambda i: i["key"]):
+        digest.update(f"{issue['key']}|{issue.get('updated')}|{issue.get('status')}|{issue.get('remaining_estimate')}\n".encode())
+        for link in issue.get("links", []):
+            digest.update(f"{link.get('type')}>{link.get('key')}:{link.get('status')}\n".encode())
+    for link in links:
+        digest.update(f"{link.get('from')}|{link.get('type')}>{link.get('key')}:{link.get('status')}\n".encode())
+    return digest.hexdigest()
+
+
+_graph_cache: "OrderedDict[str, DependencyGraph]" = OrderedDict()
+_graph_cache_lock = threading.Lock()
+_GRAPH_CACHE_SIZE = 8
+
+
+def get_dependency_graph(
+    issues: List[Dict[str, Any]],
+    links: Iterable[Dict[str, Any]] = (),
+    default_estimate_hours: float = 8.0,
+) -> DependencyGraph:
+    """Build the graph once per snapshot version; computed results are memoized on it."""
+    links = list(links)
+    version = snapshot_version(issues, links)
+    with _graph_cache_lock:
+        graph = _graph_cache.get(version)
+        if graph is not None:
+            _graph_cache.move_to_end(version)
+            return graph
+    graph = DependencyGraph(issues, links, default_estimate_hours=default_estimate_hours)
+    with _graph_cache_lock:
+        _graph_cache[version] = graph
+        while len(_graph_cache) > _GRAPH_CACHE_SIZE:
+            _graph_cache.popitem(last=False)
+    return graph
@@ -43,7 +43,23 @@ class GovernanceAgent(BaseAgent):
         policies: Dict[str, Any] = None
     ) -> Dict[str, Any]:
         """Validate actions against policies."""
-        input_data = {
+        return self.invoke(self._validation_input(proposed_actions, policies))
+    
+    async def avalidate_actions(
+        self,
+        proposed_actions: Dict[str, Any],
+        policies: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Validate actions against policies (async)."""
+        return await self.ainvoke(self._validation_input(proposed_actions, policies))
+    
+    def _validation_input(
+        self,
+        proposed_actions: Dict[str, Any],
+        policies: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Build governance validation input."""
+        return {
             "input": f"""
             Validate proposed actions for compliance:
             
@@ -62,5 +78,4 @@ class GovernanceAgent(BaseAgent):
             Output validation results.
             """
         }
-        return self.invoke(input_data)
 
@@ -1,7 +1,9 @@
 """LangGraph workflow orchestrator."""
-from typing import Dict, Any, Annotated
+from typing import Dict, Any, AsyncIterator, Optional
+from functools import lru_cache
 from langgraph.graph import StateGraph, END
 import structlog
+import asyncio
 import json
 
 from .types import WorkflowState
@@ -31,19 +33,33 @@ class DeliveryCommandCenterGraph:
         self.evaluator = Evaluator()
         
         self.graph = self._build_graph()
+        self.async_graph = self._build_graph(async_nodes=True)
     
-    def _build_graph(self) -> StateGraph:
-        """Build LangGraph workflow."""
+    def _build_graph(self, async_nodes: bool = False) -> StateGraph:
+        """Build LangGraph workflow.
+        
+        With ``async_nodes`` the agent nodes await their LLM/JIRA calls, so
+        ``ainvoke`` runs independent branches concurrently on one event loop.
+        """
         workflow = StateGraph(WorkflowState)
         
         # Add nodes
-        workflow.add_node("planner", self._planner_node)
-        workflow.add_node("jira_analyst", self._jira_analyst_node)
-        workflow.add_node("risk_agent", self._risk_agent_node)
-        workflow.add_node("dependency_agent", self._dependency_agent_node)
-        workflow.add_node("comms_agent", self._comms_agent_node)
-        workflow.add_node("action_agent", self._action_agent_node)
-        workflow.add_node("governance_agent", self._governance_agent_node)
+        if async_nodes:
+            workflow.add_node("planner", self._aplanner_node)
+            workflow.add_node("jira_analyst", self._ajira_analyst_node)
+            workflow.add_node("risk_agent", self._arisk_agent_node)
+            workflow.add_node("dependency_agent", self._adependency_agent_node)
+            workflow.add_node("comms_agent", self._acomms_agent_node)
+            workflow.add_node("action_agent", self._aaction_agent_node)
+            workflow.add_node("governance_agent", self._agovernance_agent_node)
+        else:
+            workflow.add_node("planner", self._planner_node)
+            workflow.add_node("jira_analyst", self._jira_analyst_node)
+            workflow.add_node("risk_agent", self._risk_agent_node)
+            workflow.add_node("dependency_agent", self._dependency_agent_node)
+            workflow.add_node("comms_agent", self._comms_agent_node)
+            workflow.add_node("action_agent", self._action_agent_node)
+            workflow.add_node("governance_agent", self._governance_agent_node)
         workflow.add_node("evaluator", self._evaluator_node)
         workflow.add_node("finalize", self._finalize_node)
         
@@ -72,31 +88,30 @@ class DeliveryCommandCenterGraph:
             return {"plan": plan}
         except Exception as e:
             logger.error("Planner failed", error=str(e))
-            return {"errors": state.get("errors", []) + [f"Planner error: {str(e)}"]}
+            return {"errors": [f"Planner error: {str(e)}"]}
     
     def _jira_analyst_node(self, state: WorkflowState) -> Dict[str, Any]:
         """JIRA analyst node."""
         try:
-            # Extract project/sprint from request or use defaults
-            analysis = self.jira_analyst.analyze_sprint_health(days_ahead=14)
+            analysis = self.jira_analyst.analyze_sprint_health(**self._scope(state))
             logger.info("JIRA analysis completed", conversation_id=state.get("conversation_id"))
             return {"jira_analysis": analysis}
         except Exception as e:
             logger.error("JIRA analysis failed", error=str(e))
-            return {"errors": state.get("errors", []) + [f"JIRA analysis error: {str(e)}"]}
+            return {"errors": [f"JIRA analysis error: {str(e)}"]}
     
     def _risk_agent_node(self, state: WorkflowState) -> Dict[str, Any]:
         """Risk agent node."""
         try:
             risk_report = self.risk_agent.compute_risk(
                 state.get("jira_analysis", {}),
-                days_ahead=14
+                days_ahead=state.get("days_ahead", 14)
             )
             logger.info("Risk analysis completed", conversation_id=state.get("conversation_id"))
             return {"risk_report": risk_report}
         except Exception as e:
             logger.error("Risk analysis failed", error=str(e))
-            return {"errors": state.get("errors", []) + [f"Risk analysis error: {str(e)}"]}
+            return {"errors": [f"Risk analysis error: {str(e)}"]}
     
     def _dependency_agent_node(self, state: WorkflowState) -> Dict[str, Any]:
         """Dependency agent node."""
@@ -110,7 +125,7 @@ class DeliveryCommandCenterGraph:
             return {"dependency_analysis": dep_analysis}
         except Exception as e:
             logger.error("Dependency analysis failed", error=str(e))
-            return {"errors": state.get("errors", []) + [f"Dependency analysis error: {str(e)}"]}
+            return {"errors": [f"Dependency analysis error: {str(e)}"]}
     
     def _comms_agent_node(self, state: WorkflowState) -> Dict[str, Any]:
         """Comms agent node."""
@@ -119,7 +134,7 @@ class DeliveryCommandCenterGraph:
             email = self.comms_agent.draft_stakeholder_email(
                 state.get("risk_report", {}),
                 state.get("jira_analysis", {}),
-                days_ahead=14
+                days_ahead=state.get("days_ahead", 14)
             )
             
             # Draft status report
@@ -137,7 +152,7 @@ class DeliveryCommandCenterGraph:
             }
         except Exception as e:
             logger.error("Comms generation failed", error=str(e))
-            return {"errors": state.get("errors", []) + [f"Comms error: {str(e)}"]}
+            return {"errors": [f"Comms error: {str(e)}"]}
     
     def _action_agent_node(self, state: WorkflowState) -> Dict[str, Any]:
         """Action agent node."""
@@ -151,7 +166,7 @@ class DeliveryCommandCenterGraph:
             return {"proposed_actions": actions}
         except Exception as e:
             logger.error("Action preparation failed", error=str(e))
-            return {"errors": state.get("errors", []) + [f"Action error: {str(e)}"]}
+            return {"errors": [f"Action error: {str(e)}"]}
     
     def _governance_agent_node(self, state: WorkflowState) -> Dict[str, Any]:
         """Governance agent node."""
@@ -163,7 +178,106 @@ class DeliveryCommandCenterGraph:
             return {"governance_check": validation}
         except Exception as e:
             logger.error("Governance check failed", error=str(e))
-            return {"errors": state.get("errors", []) + [f"Governance error: {str(e)}"]}
+            return {"errors": [f"Governance error: {str(e)}"]}
+    
+    async def _aplanner_node(self, state: WorkflowState) -> Dict[str, Any]:
+        """Planner node (async)."""
+        try:
+            plan = await self.planner.acreate_plan(state["user_request"])
+            logger.info("Planner completed", conversation_id=state.get("conversation_id"))
+            return {"plan": plan}
+        except Exception as e:
+            logger.error("Planner failed", error=str(e))
+            return {"errors": [f"Planner error: {str(e)}"]}
+    
+    async def _ajira_analyst_node(self, state: WorkflowState) -> Dict[str, Any]:
+        """JIRA analyst node (async)."""
+        try:
+            analysis = await self.jira_analyst.aanalyze_sprint_health(**self._scope(state))
+            logger.info("JIRA analysis completed", conversation_id=state.get("conversation_id"))
+            return {"jira_analysis": analysis}
+        except Exception as e:
+            logger.error("JIRA analysis failed", error=str(e))
+            return {"errors": [f"JIRA analysis error: {str(e)}"]}
+    
+    async def _arisk_agent_node(self, state: WorkflowState) -> Dict[str, Any]:
+        """Risk agent node (async)."""
+        try:
+            risk_report = await self.risk_agent.acompute_risk(
+                state.get("jira_analysis", {}),
+                days_ahead=state.get("days_ahead", 14)
+            )
+            logger.info("Risk analysis completed", conversation_id=state.get("conversation_id"))
+            return {"risk_report": risk_report}
+        except Exception as e:
+            logger.error("Risk analysis failed", error=str(e))
+            return {"errors": [f"Risk analysis error: {str(e)}"]}
+    
+    async def _adependency_agent_node(self, state: WorkflowState) -> Dict[str, Any]:
+        """Dependency agent node (async)."""
+        try:
+            stories = state.get("jira_analysis", {}).get("data", {}).get("stories", [])
+            dep_analysis = await self.dependency_agent.aanalyze_dependencies(
+                stories,
+                state.get("jira_analysis", {})
+            )
+            logger.info("Dependency analysis completed", conversation_id=state.get("conversation_id"))
+            return {"dependency_analysis": dep_analysis}
+        except Exception as e:
+            logger.error("Dependency analysis failed", error=str(e))
+            return {"errors": [f"Dependency analysis error: {str(e)}"]}
+    
+    async def _acomms_agent_node(self, state: WorkflowState) -> Dict[str, Any]:
+        """Comms agent node (async) - email and status report are drafted concurrently."""
+        try:
+            email, status_report = await asyncio.gather(
+                self.comms_agent.adraft_stakeholder_email(
+                    state.get("risk_report", {}),
+                    state.get("jira_analysis", {}),
+                    days_ahead=state.get("days_ahead", 14)
+                ),
+                self.comms_agent.adraft_status_report(
+                    state.get("jira_analysis", {}),
+                    state.get("risk_report", {})
+                ),
+            )
+            
+            logger.info("Comms generation completed", conversation_id=state.get("conversation_id"))
+            return {
+                "comms_output": {
+                    "email": email,
+                    "status_report": status_report,
+                }
+            }
+        except Exception as e:
+            logger.error("Comms generation failed", error=str(e))
+            return {"errors": [f"Comms error: {str(e)}"]}
+    
+    async def _aaction_agent_node(self, state: WorkflowState) -> Dict[str, Any]:
+        """Action agent node (async)."""
+        try:
+            actions = await self.action_agent.aprepare_actions(
+                state.get("risk_report", {}),
+                state.get("dependency_analysis", {}),
+                state.get("comms_output", {})
+            )
+            logger.info("Actions prepared", conversation_id=state.get("conversation_id"))
+            return {"proposed_actions": actions}
+        except Exception as e:
+            logger.error("Action preparation failed", error=str(e))
+            return {"errors": [f"Action error: {str(e)}"]}
+    
+    async def _agovernance_agent_node(self, state: WorkflowState) -> Dict[str, Any]:
+        """Governance agent node (async)."""
+        try:
+            validation = await self.governance_agent.avalidate_actions(
+                state.get("proposed_actions", {})
+            )
+            logger.info("Governance check completed", conversation_id=state.get("conversation_id"))
+            return {"governance_check": validation}
+        except Exception as e:
+            logger.error("Governance check failed", error=str(e))
+            return {"errors": [f"Governance error: {str(e)}"]}
     
     def _evaluator_node(self, state: WorkflowState) -> Dict[str, Any]:
         """Evaluator node."""
@@ -173,7 +287,7 @@ class DeliveryCommandCenterGraph:
             return {"evaluation_results": eval_results}
         except Exception as e:
             logger.error("Evaluation failed", error=str(e))
-            return {"errors": state.get("errors", []) + [f"Evaluation error: {str(e)}"]}
+            return {"errors": [f"Evaluation error: {str(e)}"]}
     
     def _finalize_node(self, state: WorkflowState) -> Dict[str, Any]:
         """Finalize output."""
@@ -182,6 +296,7 @@ class DeliveryCommandCenterGraph:
             return {
                 "final_output": {
                     "risk_report": self._format_risk_report(state.get("risk_report", {})),
+                    "dependency_graph": state.get("dependency_analysis", {}).get("dependency_graph", {}),
                     "stakeholder_email": state.get("comms_output", {}).get("email", {}).get("output", ""),
                     "status_report": state.get("comms_output", {}).get("status_report", {}).get("output", ""),
                     "proposed_actions": self._extract_actions(state.get("proposed_actions", {})),
@@ -192,7 +307,15 @@ class DeliveryCommandCenterGraph:
             }
         except Exception as e:
             logger.error("Finalization failed", error=str(e))
-            return {"errors": state.get("errors", []) + [f"Finalization error: {str(e)}"]}
+            return {"errors": [f"Finalization error: {str(e)}"]}
+    
+    def _scope(self, state: WorkflowState) -> Dict[str, Any]:
+        """JIRA analysis scope from the workflow state."""
+        return {
+            "project_key": state.get("project_key"),
+            "sprint_id": state.get("sprint_id"),
+            "days_ahead": state.get("days_ahead", 14),
+        }
     
     def _extract_actions(self, actions_output: Dict[str, Any]) -> list:
         """Extract actions from agent output."""
@@ -281,13 +404,128 @@ class DeliveryCommandCenterGraph:
             logger.error("Error formatting risk report", error=str(e))
             return f"Error displaying risk report: {str(e)}"
     
-    def run(self, user_request: str, user_id: str, user_role: str, conversation_id: str) -> Dict[str, Any]:
-        """Run workflow."""
-        initial_state: WorkflowState = {
+    def run(
+        self,
+        user_request: str,
+        user_id: str,
+        user_role: str,
+        conversation_id: str,
+        **scope: Any
+    ) -> Dict[str, Any]:
+        """Run workflow.
+        
+        ``scope`` takes ``project_key``, ``sprint_id`` and ``days_ahead`` for
+        the JIRA, risk and comms agents.
+        """
+        initial_state = self._initial_state(user_request, user_id, user_role, conversation_id, **scope)
+        result = self.graph.invoke(initial_state)
+        return result.get("final_output", {})
+    
+    async def arun(
+        self,
+        user_request: str,
+        user_id: str,
+        user_role: str,
+        conversation_id: str,
+        **scope: Any
+    ) -> Dict[str, Any]:
+        """Run workflow asynchronously, executing independent branches concurrently."""
+        initial_state = self._initial_state(user_request, user_id, user_role, conversation_id, **scope)
+        result = await self.async_graph.ainvoke(initial_state)
+        return result.get("final_output", {})
+    
+    async def astream_run(
+        self,
+        user_request: str,
+        user_id: str,
+        user_role: str,
+        conversation_id: str,
+        **scope: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run workflow asynchronously, yielding progress events as they happen.
+        
+        Events are ``token`` (LLM output delta, tagged with node and stream label),
+        ``node_completed`` (display-ready partial result of a node) and finally
+        ``final`` (same payload ``arun`` returns).
+        """
+        initial_state = self._initial_state(user_request, user_id, user_role, conversation_id, **scope)
+        final_output = {}
+        async for mode, chunk in self.async_graph.astream(initial_state, stream_mode=["updates", "messages"]):
+            if mode == "messages":
+                message, metadata = chunk
+                if isinstance(message.content, str) and message.content:
+                    yield {
+                        "event": "token",
+                        "node": metadata.get("langgraph_node"),
+                        "stream": metadata.get("stream_label"),
+                        "delta": message.content,
+                    }
+                continue
+            for node, update in chunk.items():
+                update = update or {}
+                if node == "finalize":
+                    final_output = update.get("final_output", final_output)
+                    continue
+                yield {
+                    "event": "node_completed",
+                    "node": node,
+                    "result": self._node_result(node, update),
+                    "errors": update.get("errors", []),
+                }
+        yield {"event": "final", "result": final_output}
+    
+    def _node_result(self, node: str, update: Dict[str, Any]) -> Dict[str, Any]:
+        """Partial result of a node, keyed like ``final_output`` where possible."""
+        if node == "planner":
+            return {"plan": update.get("plan", {}).get("output", "")}
+        if node == "jira_analyst":
+            analysis = update.get("jira_analysis", {})
+            return {
+                "jira_summary": analysis.get("output", ""),
+                "stories_count": analysis.get("data", {}).get("stories_count", 0),
+                "bugs_count": analysis.get("data", {}).get("bugs_count", 0),
+            }
+        if node == "risk_agent":
+            risk_report = update.get("risk_report", {})
+            return {
+                "risk_report": self._format_risk_report(risk_report),
+                "high_risk_items": risk_report.get("high_risk_items", []),
+            }
+        if node == "dependency_agent":
+            return {"dependency_graph": update.get("dependency_analysis", {}).get("dependency_graph", {})}
+        if node == "comms_agent":
+            comms_output = update.get("comms_output", {})
+            return {
+                "stakeholder_email": comms_output.get("email", {}).get("output", ""),
+                "status_report": comms_output.get("status_report", {}).get("output", ""),
+            }
+        if node == "action_agent":
+            return {"proposed_actions": self._extract_actions(update.get("proposed_actions", {}))}
+        if node == "governance_agent":
+            return {"governance_status": update.get("governance_check", {}).get("output", "")}
+        if node == "evaluator":
+            return {"evaluation_scores": update.get("evaluation_results", {})}
+        return {}
+    
+    def _initial_state(
+        self,
+        user_request: str,
+        user_id: str,
+        user_role: str,
+        conversation_id: str,
+        project_key: Optional[str] = None,
+        sprint_id: Optional[str] = None,
+        days_ahead: int = 14
+    ) -> WorkflowState:
+        """Build initial workflow state."""
+        return {
             "user_request": user_request,
             "user_id": user_id,
             "user_role": user_role,
             "conversation_id": conversation_id,
+            "project_key": project_key,
+            "sprint_id": sprint_id,
+            "days_ahead": days_ahead,
             "plan": {},
             "jira_analysis": {},
             "risk_report": {},
@@ -299,7 +537,13 @@ class DeliveryCommandCenterGraph:
             "final_output": {},
             "errors": [],
         }
-        
-        result = self.graph.invoke(initial_state)
-        return result.get("final_output", {})
 
+
+@lru_cache(maxsize=1)
+def get_workflow() -> DeliveryCommandCenterGraph:
+    """Get the process-wide workflow instance.
+    
+    Agents and compiled graphs hold no per-run state, so one instance serves
+    all requests instead of rebuilding agents and LLM clients each time.
+    """
+    return DeliveryCommandCenterGraph()
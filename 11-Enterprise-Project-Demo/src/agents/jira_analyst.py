@@ -1,6 +1,9 @@
 """JIRA Analyst Agent."""
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import asyncio
+
 from .base import BaseAgent
+from src.config import settings
 from src.integrations import JiraClient
 
 JIRA_ANALYST_SYSTEM_PROMPT = """You are a JIRA Analyst Agent. Your role is to:
@@ -20,6 +23,9 @@ class JiraAnalystAgent(BaseAgent):
     def __init__(self):
         super().__init__("jira_analyst", JIRA_ANALYST_SYSTEM_PROMPT)
         self.jira_client = JiraClient()
+        if settings.jira_snapshot_enabled:
+            # Keep the local snapshot fresh so reads don't wait on JIRA
+            self.jira_client.start_snapshot_sync()
     
     def analyze_sprint_health(
         self,
@@ -34,7 +40,43 @@ class JiraAnalystAgent(BaseAgent):
         sprint_health = self.jira_client.get_sprint_health(sprint_id) if sprint_id else None
         
         # Analyze
-        input_data = {
+        analysis = self.invoke(self._analysis_input(stories, bugs, sprint_health))
+        analysis["data"] = self._analysis_data(stories, bugs, sprint_health)
+        return analysis
+    
+    async def aanalyze_sprint_health(
+        self,
+        project_key: str = None,
+        sprint_id: str = None,
+        days_ahead: int = 14
+    ) -> Dict[str, Any]:
+        """Analyze sprint health (async).
+        
+        The JIRA client is blocking, so the independent fetches run
+        concurrently in worker threads.
+        """
+        fetches = [
+            asyncio.to_thread(self.jira_client.get_stories, project_key=project_key, sprint=sprint_id, days_ahead=days_ahead),
+            asyncio.to_thread(self.jira_client.get_bugs, project_key=project_key, days_ahead=days_ahead),
+        ]
+        if sprint_id:
+            fetches.append(asyncio.to_thread(self.jira_client.get_sprint_health, sprint_id))
+        results = await asyncio.gather(*fetches)
+        stories, bugs = results[0], results[1]
+        sprint_health = results[2] if sprint_id else None
+        
+        analysis = await self.ainvoke(self._analysis_input(stories, bugs, sprint_health))
+        analysis["data"] = self._analysis_data(stories, bugs, sprint_health)
+        return analysis
+    
+    def _analysis_input(
+        self,
+        stories: List[Dict[str, Any]],
+        bugs: List[Dict[str, Any]],
+        sprint_health: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Build sprint health analysis input."""
+        return {
             "input": f"""
             Analyze the following JIRA data:
             
@@ -55,14 +97,22 @@ class JiraAnalystAgent(BaseAgent):
             5. Key insights
             """
         }
-        
-        analysis = self.invoke(input_data)
-        analysis["data"] = {
+    
+    def _analysis_data(
+        self,
+        stories: List[Dict[str, Any]],
+        bugs: List[Dict[str, Any]],
+        sprint_health: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Build data summary attached to the analysis."""
+        return {
             "stories_count": len(stories),
             "bugs_count": len(bugs),
             "sprint_health": sprint_health,
+            # Downstream agents (dependency, risk) work from the fetched issues
+            "stories": stories,
+            "bugs": bugs,
         }
-        return analysis
     
     def _format_stories(self, stories: List[Dict[str, Any]]) -> str:
         """Format stories for analysis."""
@@ -0,0 +1,270 @@
+"""Content-addressed LLM response cache."""
+from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+import structlog
+
+from src.config import settings
+
+logger = structlog.get_logger()
+
+
+class CacheBackend(ABC):
+    """Key/value store for cached responses."""
+
+    # Whether calls do I/O and should be kept off the event loop
+    blocking = True
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        """Store a value, expiring after ``ttl`` seconds when given."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every cached value."""
+
+
+class LRUCacheBackend(CacheBackend):
+    """In-process LRU cache with per-entry expiry."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[float], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """SQLite file cache; evicts least recently used rows beyond ``max_entries``."""
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed ON llm_cache (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl if ttl else None, now),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis cache; a sorted set of access times bounds the number of entries.
+
+    A second sorted set holds expiry times, so index entries of keys Redis
+    has already expired are pruned on write instead of counting towards the bound.
+    """
+
+    def __init__(self, url: str, max_entries: int = 10000, prefix: str = "llm:cache:"):
+        import redis  # optional dependency, only needed for this backend
+
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.index_key = f"{prefix}index"
+        self.expiry_key = f"{prefix}expiry"
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[str]:
+        pipe = self._client.pipeline()
+        pipe.get(self.prefix + key)
+        pipe.zadd(self.index_key, {key: time.time()}, xx=True)
+        value, _ = pipe.execute()
+        return value.decode() if value is not None else None
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        now = time.time()
+        pipe = self._client.pipeline()
+        pipe.set(self.prefix + key, value, ex=ttl or None)
+        pipe.zadd(self.index_key, {key: now})
+        if ttl:
+            pipe.zadd(self.expiry_key, {key: now + ttl})
+        else:
+            pipe.zrem(self.expiry_key, key)
+        pipe.zrangebyscore(self.expiry_key, "-inf", now)
+        pipe.zremrangebyscore(self.expiry_key, "-inf", now)
+        pipe.zcard(self.index_key)
+        *_, expired, _, size = pipe.execute()
+        if expired:
+            self._client.zrem(self.index_key, *expired)
+            size -= len(expired)
+        overflow = size - self.max_entries
+        if overflow > 0:
+            evicted = [k.decode() for k, _ in self._client.zpopmin(self.index_key, overflow)]
+            if evicted:
+                pipe = self._client.pipeline()
+                pipe.delete(*[self.prefix + k for k in evicted])
+                pipe.zrem(self.expiry_key, *evicted)
+                pipe.execute()
+
+    def clear(self) -> None:
+        keys = [k.decode() for k in self._client.zrange(self.index_key, 0, -1)]
+        if keys:
+            self._client.delete(*[self.prefix + k for k in keys])
+        self._client.delete(self.index_key, self.expiry_key)
+
+
+class LLMResponseCache:
+    """Response cache keyed by a hash of the full model request."""
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        default_ttl: Optional[int] = None,
+        agent_ttls: Optional[Dict[str, int]] = None,
+    ):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.agent_ttls = agent_ttls or {}
+        self._hits: Dict[str, int] = defaultdict(int)
+        self._misses: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, temperature: float, system_prompt: str, messages: List[Any]) -> str:
+        """Hash (model, temperature, system prompt, rendered messages)."""
+        payload = json.dumps(
+            {
+                "model": model,
+                "temperature": temperature,
+                "system": system_prompt,
+                "messages": [[m.type, m.content] for m in messages],
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, agent: str) -> Optional[int]:
+        """TTL for an agent's entries (per-agent override, else default)."""
+        return self.agent_ttls.get(agent, self.default_ttl)
+
+    def lookup(self, agent: str, key: str) -> Optional[str]:
+        """Get a cached response, counting the hit or miss."""
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning("LLM cache lookup failed", agent=agent, error=str(e))
+            value = None
+        with self._lock:
+            if value is None:
+                self._misses[agent] += 1
+            else:
+                self._hits[agent] += 1
+        return value
+
+    def store(self, agent: str, key: str, value: str) -> None:
+        """Cache a response."""
+        try:
+            self.backend.set(key, value, ttl=self.ttl_for(agent))
+        except Exception as e:
+            logger.warning("LLM cache store failed", agent=agent, error=str(e))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters per agent."""
+        with self._lock:
+            agents = set(self._hits) | set(self._misses)
+            return {
+                agent: {"hits": self._hits[agent], "misses": self._misses[agent]}
+                for agent in sorted(agents)
+            }
+
+
+def create_backend(name: str) -> CacheBackend:
+    """Create a cache backend by name (memory, sqlite, redis)."""
+    if name == "memory":
+        return LRUCacheBackend(max_entries=settings.llm_cache_max_entries)
+    if name == "sqlite":
+        return SQLiteCacheBackend(settings.llm_cache_sqlite_path, max_entries=settings.llm_cache_max_entries)
+    if name == "redis":
+        return RedisCacheBackend(settings.redis_url, max_entries=settings.llm_cache_max_entries)
+    raise ValueError(f"Unknown LLM cache backend: {name}")
+
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """Get the shared response cache, or None when caching is disabled."""
+    if not settings.llm_cache_enabled:
+        return None
+    try:
+        backend = create_backend(settings.llm_cache_backend)
+    except Exception as e:
+        logger.warning("LLM cache unavailable - continuing without cache", error=str(e))
+        return None
+    logger.info("LLM response cache enabled", backend=settings.llm_cache_backend)
+    return LLMResponseCache(
+        backend,
+        default_ttl=settings.llm_cache_ttl_seconds,
+        agent_ttls=settings.llm_cache_agent_ttls,
+    )
@@ -0,0 +1,156 @@
+"""Process-wide shared LLM client registry."""
+from typing import Dict, Tuple, Optional
+from contextlib import contextmanager, asynccontextmanager
+import asyncio
+import threading
+import weakref
+import httpx
+from langchain_openai import ChatOpenAI
+import structlog
+
+from src.config import settings
+
+logger = structlog.get_logger()
+
+ClientKey = Tuple[str, float, int]
+
+
+class LLMClientRegistry:
+    """Shares ChatOpenAI clients keyed by (model, temperature, max_tokens).
+
+    All clients go through one bounded, keep-alive HTTP connection pool, and
+    calls are throttled by a per-model concurrency semaphore. Async connections
+    belong to the event loop that opened them, so async callers get clients
+    from ``get_async``, which keeps one ``httpx.AsyncClient`` per loop.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        max_concurrency_per_model: int = 16,
+        request_timeout: float = 60.0,
+    ):
+        self.max_concurrency_per_model = max_concurrency_per_model
+        self.request_timeout = request_timeout
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http_client: Optional[httpx.Client] = None
+        self._clients: Dict[ClientKey, ChatOpenAI] = {}
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        # asyncio primitives and async connections belong to one event loop, so keep a set per loop
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, Dict[ClientKey, ChatOpenAI]]]" = weakref.WeakKeyDictionary()
+        self._async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        model: str = None,
+        temperature: float = None,
+        max_tokens: int = None,
+    ) -> ChatOpenAI:
+        """Get (or create) the shared client for blocking calls."""
+        key = self._key(model, temperature, max_tokens)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            if key not in self._clients:
+                if self._http_client is None:
+                    self._http_client = httpx.Client(limits=self._limits, timeout=self.request_timeout)
+                self._clients[key] = self._build(key, http_client=self._http_client)
+                logger.info("Created shared LLM client", model=key[0], temperature=key[1], max_tokens=key[2])
+            return self._clients[key]
+
+    def get_async(
+        self,
+        model: str = None,
+        temperature: float = None,
+        max_tokens: int = None,
+    ) -> ChatOpenAI:
+        """Get (or create) the shared client for async calls on the running event loop."""
+        key = self._key(model, temperature, max_tokens)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._async_clients.get(loop)
+            if entry is None:
+                entry = (httpx.AsyncClient(limits=self._limits, timeout=self.request_timeout), {})
+                self._async_clients[loop] = entry
+            http_async_client, clients = entry
+            if key not in clients:
+                clients[key] = self._build(key, http_async_client=http_async_client)
+                logger.info("Created shared async LLM client", model=key[0], temperature=key[1], max_tokens=key[2])
+            return clients[key]
+
+    def _key(self, model: str, temperature: float, max_tokens: int) -> ClientKey:
+        return (
+            model or settings.default_model,
+            settings.temperature if temperature is None else temperature,
+            max_tokens or settings.max_tokens,
+        )
+
+    def _build(self, key: ClientKey, **http_clients) -> ChatOpenAI:
+        return ChatOpenAI(
+            model=key[0],
+            temperature=key[1],
+            max_tokens=key[2],
+            openai_api_key=settings.openai_api_key,
+            request_timeout=self.request_timeout,
+            **http_clients,
+        )
+
+    @contextmanager
+    def limit(self, model: str):
+        """Hold a concurrency slot for a blocking call to ``model``."""
+        semaphore = self._semaphores.get(model)
+        if semaphore is None:
+            with self._lock:
+                semaphore = self._semaphores.setdefault(
+                    model, threading.BoundedSemaphore(self.max_concurrency_per_model)
+                )
+        with semaphore:
+            yield
+
+    @asynccontextmanager
+    async def alimit(self, model: str):
+        """Hold a concurrency slot for an async call to ``model``."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._async_semaphores.setdefault(loop, {})
+            semaphore = semaphores.setdefault(model, asyncio.Semaphore(self.max_concurrency_per_model))
+        async with semaphore:
+            yield
+
+    def close(self):
+        """Close the pooled blocking HTTP connections.
+
+        Async connections must be closed on their own loop with ``aclose``.
+        """
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._http_client = None
+            self._clients.clear()
+
+    async def aclose(self):
+        """Close the running event loop's pooled async HTTP connections."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._async_clients.pop(loop, None)
+            self._async_semaphores.pop(loop, None)
+        if entry is not None:
+            await entry[0].aclose()
+
+
+llm_registry = LLMClientRegistry(
+    max_connections=settings.llm_max_connections,
+    max_keepalive_connections=settings.llm_max_keepalive_connections,
+    keepalive_expiry=settings.llm_keepalive_expiry_seconds,
+    max_concurrency_per_model=settings.llm_max_concurrency_per_model,
+    request_timeout=settings.llm_request_timeout_seconds,
+)
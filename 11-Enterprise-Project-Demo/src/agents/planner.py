@@ -40,8 +40,15 @@ class PlannerAgent(BaseAgent):
     
     def create_plan(self, user_request: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Create execution plan."""
-        input_data = {
+        return self.invoke(self._plan_input(user_request, context))
+    
+    async def acreate_plan(self, user_request: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Create execution plan (async)."""
+        return await self.ainvoke(self._plan_input(user_request, context))
+    
+    def _plan_input(self, user_request: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Build planner input."""
+        return {
             "input": f"User request: {user_request}\n\nContext: {context or {}}\n\nCreate a detailed execution plan."
         }
-        return self.invoke(input_data)
 
@@ -1,7 +1,9 @@
 """Delivery Risk Agent."""
 from typing import Dict, Any, List
-from datetime import datetime, timedelta
+import json
 from .base import BaseAgent
+from .risk_scoring import score_issues
+from src.config import settings
 
 RISK_AGENT_SYSTEM_PROMPT = """You are a Delivery Risk Agent. Your role is to:
 1. Compute risk scores (0-100) for delivery items
@@ -48,7 +50,40 @@ class DeliveryRiskAgent(BaseAgent):
         days_ahead: int = 14
     ) -> Dict[str, Any]:
         """Compute delivery risk."""
-        input_data = {
+        risk_table = self.score_items(jira_data)
+        risk_report = self.invoke(self._risk_input(jira_data, days_ahead, risk_table))
+        risk_report["high_risk_items"] = risk_table
+        return risk_report
+    
+    async def acompute_risk(
+        self,
+        jira_data: Dict[str, Any],
+        days_ahead: int = 14
+    ) -> Dict[str, Any]:
+        """Compute delivery risk (async)."""
+        risk_table = self.score_items(jira_data)
+        risk_report = await self.ainvoke(self._risk_input(jira_data, days_ahead, risk_table))
+        risk_report["high_risk_items"] = risk_table
+        return risk_report
+    
+    def score_items(self, jira_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Deterministically score all fetched stories and bugs; top items only."""
+        data = jira_data.get('data', {})
+        issues = data.get('stories', []) + data.get('bugs', [])
+        return score_issues(issues, limit=settings.risk_top_items)
+    
+    def _risk_input(
+        self,
+        jira_data: Dict[str, Any],
+        days_ahead: int,
+        risk_table: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Build risk analysis input."""
+        high_risk_items = [
+            {"issue_key": item["issue_key"], "risk_score": item["risk_score"], "reason": item["reason"]}
+            for item in risk_table
+        ]
+        return {
             "input": f"""
             Analyze delivery risk for the next {days_ahead} days based on:
             
@@ -60,37 +95,13 @@ class DeliveryRiskAgent(BaseAgent):
             - Bugs: {jira_data.get('data', {}).get('bugs_count', 0)}
             - Sprint Health: {jira_data.get('data', {}).get('sprint_health', {})}
             
+            Precomputed high-risk items (deterministic scores - use these as high_risk_items, do not rescore):
+            {json.dumps(high_risk_items)}
+            
             Compute comprehensive risk assessment.
             """
         }
-        
-        return self.invoke(input_data)
     
     def calculate_risk_score(self, item: Dict[str, Any]) -> float:
         """Calculate risk score for a single item."""
-        score = 0.0
-        
-        # Overdue items
-        if item.get('due_date'):
-            due_date = datetime.fromisoformat(item['due_date'].replace('Z', '+00:00'))
-            if due_date < datetime.now(due_date.tzinfo):
-                days_overdue = (datetime.now(due_date.tzinfo) - due_date).days
-                score += min(days_overdue * 10, 40)
-        
-        # Blockers
-        if item.get('blockers'):
-            score += len(item['blockers']) * 15
-        
-        # Missing assignee
-        if not item.get('assignee'):
-            score += 20
-        
-        # Status stagnation (in same status > 7 days)
-        if item.get('updated'):
-            updated = datetime.fromisoformat(item['updated'].replace('Z', '+00:00'))
-            days_stale = (datetime.now(updated.tzinfo) - updated).days
-            if days_stale > 7:
-                score += min((days_stale - 7) * 2, 25)
-        
-        return min(score, 100.0)
-
+        return score_issues([item])[0]["risk_score"]
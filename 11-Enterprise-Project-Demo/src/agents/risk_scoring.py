@@ -0,0 +1,108 @@
+"""Deterministic batch risk scoring for JIRA issues."""
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timezone
+from functools import lru_cache
+import numpy as np
+
+SECONDS_PER_DAY = 86400.0
+
+# Component weights/caps (same rules the risk agent has always used)
+OVERDUE_POINTS_PER_DAY = 10.0
+OVERDUE_CAP = 40.0
+BLOCKER_POINTS = 15.0
+UNASSIGNED_POINTS = 20.0
+STALE_GRACE_DAYS = 7
+STALE_POINTS_PER_DAY = 2.0
+STALE_CAP = 25.0
+
+
+@lru_cache(maxsize=64)
+def _offset_seconds(suffix: str) -> float:
+    """UTC offset in seconds from the tail of an ISO timestamp (after HH:MM:SS)."""
+    for sign in ("+", "-"):
+        if sign in suffix:
+            offset = suffix[suffix.index(sign) + 1:].replace(":", "")
+            seconds = int(offset[:2]) * 3600 + int(offset[2:4] or 0) * 60
+            return seconds if sign == "+" else -seconds
+    return 0.0  # "Z", fractional seconds only, or naive
+
+
+def _epoch_seconds(values: List[Optional[str]]) -> np.ndarray:
+    """Parse ISO dates/datetimes to epoch seconds (UTC when naive); NaN if missing.
+    
+    The date/time part is parsed as one datetime64 column; only the distinct
+    UTC offsets (e.g. JIRA's ``+0000``) go through Python.
+    """
+    local = np.array([v[:19] if v else "NaT" for v in values], dtype="datetime64[s]")
+    offsets = np.array([_offset_seconds(v[19:]) if v else 0.0 for v in values], dtype=np.float64)
+    seconds = local.astype(np.int64).astype(np.float64) - offsets
+    seconds[np.isnat(local)] = np.nan
+    return seconds
+
+
+def score_issues(
+    issues: List[Dict[str, Any]],
+    as_of: Optional[datetime] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Score issues in one vectorized pass and rank them (highest risk first).
+
+    Dates are parsed once into columns; all components are computed on
+    arrays against a single ``as_of`` instant, so scores are reproducible.
+    ``limit`` keeps only the top rows.
+    """
+    if not issues:
+        return []
+    as_of = as_of or datetime.now(timezone.utc)
+    if as_of.tzinfo is None:
+        as_of = as_of.replace(tzinfo=timezone.utc)
+    now = as_of.timestamp()
+
+    keys = np.array([issue.get("key") or "" for issue in issues], dtype=str)
+    due = _epoch_seconds([issue.get("due_date") for issue in issues])
+    updated = _epoch_seconds([issue.get("updated") for issue in issues])
+    blockers = np.array([len(issue.get("blockers") or []) for issue in issues], dtype=np.float64)
+    unassigned = np.array([not issue.get("assignee") for issue in issues], dtype=bool)
+
+    with np.errstate(invalid="ignore"):
+        overdue_days = np.where(due < now, np.floor((now - due) / SECONDS_PER_DAY), 0.0)
+        stale_days = np.floor((now - updated) / SECONDS_PER_DAY)
+    overdue_days = np.nan_to_num(overdue_days, nan=0.0)
+    stale_days = np.nan_to_num(stale_days, nan=0.0)
+
+    overdue = np.minimum(overdue_days * OVERDUE_POINTS_PER_DAY, OVERDUE_CAP)
+    blocked = blockers * BLOCKER_POINTS
+    owner = np.where(unassigned, UNASSIGNED_POINTS, 0.0)
+    stale = np.where(
+        stale_days > STALE_GRACE_DAYS,
+        np.minimum((stale_days - STALE_GRACE_DAYS) * STALE_POINTS_PER_DAY, STALE_CAP),
+        0.0,
+    )
+    scores = np.minimum(overdue + blocked + owner + stale, 100.0)
+
+    # Highest score first; issue key breaks ties so the ranking is stable
+    order = np.lexsort((keys, -scores))[:limit]
+
+    ranked = []
+    for i in order:
+        reasons = []
+        if overdue[i]:
+            reasons.append(f"Overdue by {int(overdue_days[i])} days")
+        if blockers[i]:
+            reasons.append(f"{int(blockers[i])} blocker(s)")
+        if unassigned[i]:
+            reasons.append("No assignee")
+        if stale[i]:
+            reasons.append(f"No update for {int(stale_days[i])} days")
+        ranked.append({
+            "issue_key": str(keys[i]),
+            "risk_score": round(float(scores[i]), 1),
+            "reason": "; ".join(reasons) or "No risk factors",
+            "components": {
+                "overdue": float(overdue[i]),
+                "blockers": float(blocked[i]),
+                "unassigned": float(owner[i]),
+                "staleness": float(stale[i]),
+            },
+        })
+    return ranked
@@ -1,5 +1,6 @@
 """Type definitions for workflow state."""
-from typing import Dict, Any, TypedDict
+from typing import Dict, Any, Optional, TypedDict, Annotated
+import operator
 
 
 class WorkflowState(TypedDict):
@@ -8,6 +9,10 @@ class WorkflowState(TypedDict):
     user_id: str
     user_role: str
     conversation_id: str
+    # Analysis scope from the request form
+    project_key: Optional[str]
+    sprint_id: Optional[str]
+    days_ahead: int
     plan: Dict[str, Any]
     jira_analysis: Dict[str, Any]
     risk_report: Dict[str, Any]
@@ -17,5 +22,6 @@ class WorkflowState(TypedDict):
     governance_check: Dict[str, Any]
     evaluation_results: Dict[str, Any]
     final_output: Dict[str, Any]
-    errors: list
+    # Reducer lets parallel branches (risk_agent / dependency_agent) report errors in the same step
+    errors: Annotated[list, operator.add]
 
@@ -0,0 +1,6 @@
+"""HTTP API."""
+from .workflow import router as workflow_router
+
+__all__ = [
+    "workflow_router",
+]
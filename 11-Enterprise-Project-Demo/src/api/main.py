@@ -0,0 +1,40 @@
+"""FastAPI application."""
+from contextlib import asynccontextmanager
+import asyncio
+from fastapi import FastAPI
+import structlog
+import uvicorn
+
+from src.config import settings
+from .workflow import router as workflow_router
+
+logger = structlog.get_logger()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm shared resources before serving traffic."""
+    if settings.vector_warm_up_on_startup:
+        try:
+            from src.db.vector_store import get_vector_store
+            await asyncio.to_thread(get_vector_store().warm_up)
+        except Exception as e:
+            logger.warning("Vector store warm-up failed - continuing without it", error=str(e))
+    yield
+    from src.agents.llm_pool import llm_registry
+    await llm_registry.aclose()
+    llm_registry.close()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
+app.include_router(workflow_router, prefix="/api/v1")
+
+
+@app.get("/health")
+def health():
+    """Health check."""
+    return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,89 @@
+"""Workflow endpoints."""
+from typing import Dict, Any, Optional, AsyncIterator
+import asyncio
+import json
+import uuid
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+import structlog
+
+from src.agents.graph import get_workflow
+
+logger = structlog.get_logger()
+
+router = APIRouter(prefix="/workflow", tags=["workflow"])
+
+# Demo API: requests run as the demo user until auth is wired in
+DEMO_USER_ID = "demo_user"
+DEMO_USER_ROLE = "PM"
+
+
+class WorkflowRunRequest(BaseModel):
+    """Workflow run request."""
+    
+    user_request: str
+    project_key: Optional[str] = None
+    sprint_id: Optional[str] = None
+    days_ahead: int = Field(default=14, ge=1, le=90)
+
+
+def _scope(request: WorkflowRunRequest) -> Dict[str, Any]:
+    """Analysis scope passed to the workflow state."""
+    return {
+        "project_key": request.project_key,
+        "sprint_id": request.sprint_id,
+        "days_ahead": request.days_ahead,
+    }
+
+
+def _request_text(request: WorkflowRunRequest) -> str:
+    """User request with the form's scope appended for the planner."""
+    scope = [f"Horizon: next {request.days_ahead} days"]
+    if request.project_key:
+        scope.append(f"Project: {request.project_key}")
+    if request.sprint_id:
+        scope.append(f"Sprint: {request.sprint_id}")
+    return f"{request.user_request}\n\n" + "\n".join(scope)
+
+
+@router.post("/run")
+async def run_workflow(request: WorkflowRunRequest) -> Dict[str, Any]:
+    """Run the full workflow and return the final output."""
+    conversation_id = str(uuid.uuid4())
+    workflow = await asyncio.to_thread(get_workflow)
+    result = await workflow.arun(
+        _request_text(request), DEMO_USER_ID, DEMO_USER_ROLE, conversation_id, **_scope(request)
+    )
+    return {"conversation_id": conversation_id, "result": result}
+
+
+@router.post("/stream")
+async def stream_workflow(request: WorkflowRunRequest) -> StreamingResponse:
+    """Run the workflow, streaming progress as JSON lines.
+    
+    One event per line: ``start``, then ``token`` / ``node_completed`` as
+    agents work, then ``final`` (or ``error``).
+    """
+    conversation_id = str(uuid.uuid4())
+    
+    async def events() -> AsyncIterator[str]:
+        yield json.dumps({"event": "start", "conversation_id": conversation_id}) + "\n"
+        try:
+            workflow = await asyncio.to_thread(get_workflow)
+            async for event in workflow.astream_run(
+                _request_text(request), DEMO_USER_ID, DEMO_USER_ROLE, conversation_id, **_scope(request)
+            ):
+                if event["event"] == "final":
+                    event["conversation_id"] = conversation_id
+                yield json.dumps(event, default=str) + "\n"
+        except Exception as e:
+            logger.error("Workflow stream failed", conversation_id=conversation_id, error=str(e))
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        # Keep reverse proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,6 +1,6 @@
 """Application configuration."""
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -35,7 +35,19 @@ class Settings(BaseSettings):
     jira_server: str
     jira_email: str
     jira_api_token: str
-        
+    jira_page_size: int = 100  # JIRA caps maxResults per search page
+    jira_max_workers: int = 4  # concurrent page fetches
+    jira_max_results: int = 5000
+    jira_sync_overlap_minutes: int = 2
+    jira_sprint_field: str = "customfield_10020"
+    
+    # JIRA Snapshot (local read path + background delta sync)
+    jira_snapshot_enabled: bool = False
+    jira_snapshot_backend: str = "sqlite"  # sqlite, postgres (chat_store schema)
+    jira_snapshot_path: str = ".cache/jira_snapshot.sqlite3"
+    jira_snapshot_sync_interval_seconds: int = 300
+    jira_snapshot_reconcile_interval_seconds: int = 3600  # drop deleted/moved issues
+    
     # Security
     jwt_secret_key: str
     jwt_algorithm: str = "HS256"
@@ -51,6 +63,42 @@ class Settings(BaseSettings):
     max_tokens: int = 4000
     temperature: float = 0.3
     
+    # Vector Ingestion
+    embedding_batch_size: int = 128  # texts per embed_documents call
+    embedding_concurrency: int = 4  # concurrent embedding requests
+    embedding_chunk_size: int = 4000  # characters per embedded chunk
+    embedding_chunk_overlap: int = 200
+    vector_ingest_batch_size: int = 500  # documents per multi-row insert
+    
+    # Vector Store
+    vector_pool_size: int = 10
+    vector_max_overflow: int = 20
+    vector_pool_recycle_seconds: int = 1800
+    vector_ivfflat_probes: int = 10  # ivfflat lists scanned per query (recall vs latency)
+    vector_warm_up_on_startup: bool = True
+    
+    # LLM Client Pool (shared across agents)
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry_seconds: float = 30.0
+    llm_max_concurrency_per_model: int = 16
+    llm_request_timeout_seconds: float = 60.0
+    
+    # LLM Response Cache (opt-in)
+    llm_cache_enabled: bool = False
+    llm_cache_backend: str = "memory"  # memory, sqlite, redis
+    llm_cache_max_entries: int = 1024
+    llm_cache_ttl_seconds: int = 3600
+    llm_cache_sqlite_path: str = ".cache/llm_cache.sqlite3"
+    llm_cache_agent_ttls: Dict[str, int] = {}  # e.g. {"planner": 86400}
+    
+    # Risk Scoring
+    risk_top_items: int = 10  # precomputed high-risk items passed to the risk agent
+    
+    # Dependency Graph
+    dependency_default_estimate_hours: float = 8.0  # weight for open issues without a remaining estimate
+    dependency_top_items: int = 20  # blocked items / missing owners passed to the dependency agent
+    
     # Evaluation Thresholds
     eval_groundedness_threshold: float = 0.8
     eval_completeness_threshold: float = 0.85
@@ -1,5 +1,6 @@
 """Database session management."""
 from sqlalchemy import create_engine, event, text
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import NullPool
 from contextlib import contextmanager
@@ -22,14 +23,25 @@ engine = create_engine(
     echo=settings.environment == "development",
 )
 
-# Vector DB (same Postgres, different schema)
+# Vector DB (same Postgres, different schema) - used by VectorStore
 vector_engine = create_engine(
     settings.postgres_url,
     pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
+    pool_size=settings.vector_pool_size,
+    max_overflow=settings.vector_max_overflow,
+    pool_recycle=settings.vector_pool_recycle_seconds,
 )
 
+
+@event.listens_for(vector_engine, "connect")
+def _set_ivfflat_probes(dbapi_connection, connection_record):
+    """Session default for ivfflat probes, so searches need no extra SET round trip."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"SET ivfflat.probes = {int(settings.vector_ivfflat_probes)}")
+    cursor.close()
+    # SET is transactional; commit so the pool's reset-on-return keeps it
+    dbapi_connection.commit()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 VectorSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=vector_engine)
 
@@ -50,6 +62,7 @@ def init_db():
         # Create tables
         Base.metadata.create_all(bind=engine)
         Base.metadata.create_all(bind=vector_engine)
+        _migrate()
         
         logger.info("Database initialized")
     except Exception as e:
@@ -57,6 +70,21 @@ def init_db():
         # Continue without database for demo purposes
 
 
+def _migrate():
+    """Add columns introduced after the tables were first created.
+    
+    ``create_all`` skips tables that already exist, so new columns (and their
+    indexes) are added here; every statement is idempotent.
+    """
+    embeddings = Embedding.__table__
+    with vector_engine.begin() as conn:
+        # Rows ingested before the embedding cache have no hash and are never reused
+        conn.execute(text(f"ALTER TABLE {embeddings.fullname} ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"))
+        for index in embeddings.indexes:
+            if "content_hash" in index.columns:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
 @contextmanager
 def get_db() -> Generator[Session, None, None]:
     """Get database session."""
@@ -1,27 +1,21 @@
 """Vector store operations."""
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import hashlib
+import re
+import uuid
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import select, text
 import structlog
 from langchain_openai import OpenAIEmbeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 logger = structlog.get_logger()
 
-# Try different import paths for PGVector (version compatibility)
-# Make vector store optional for demo - API can work without it
-PGVector = None
+# Try different import paths for Document (version compatibility)
 LangchainDocument = None
 
-try:
-    from langchain_community.vectorstores.pgvector import PGVector
-    logger.info("Using langchain_community.vectorstores.pgvector")
-except ImportError:
-    try:
-        from langchain.vectorstores.pgvector import PGVector
-        logger.info("Using langchain.vectorstores.pgvector")
-    except ImportError:
-        logger.warning("PGVector not available - vector search will be disabled")
-
 try:
     from langchain_core.documents import Document as LangchainDocument
 except ImportError:
@@ -45,76 +39,144 @@ class VectorStore:
             model=settings.embedding_model,
             openai_api_key=settings.openai_api_key,
         )
-        self.connection_string = settings.postgres_url
-        self.collection_name = "delivery_documents"
-    
-    def get_langchain_store(self):
-        """Get LangChain PGVector store."""
-        if PGVector is None:
-            logger.warning("PGVector not available - vector store disabled")
-            return None
-        return PGVector(
-            connection_string=self.connection_string,
-            embedding_function=self.embeddings,
-            collection_name=self.collection_name,
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=settings.embedding_chunk_size,
+            chunk_overlap=settings.embedding_chunk_overlap,
         )
+        self._embed_executor = ThreadPoolExecutor(
+            max_workers=settings.embedding_concurrency,
+            thread_name_prefix="embed",
+        )
+    
+    def warm_up(self):
+        """Open the pool's connections ahead of traffic."""
+        from src.db.session import vector_engine
+        connections = []
+        try:
+            for _ in range(settings.vector_pool_size):
+                connections.append(vector_engine.connect())
+            connections[0].execute(text("SELECT 1"))
+        finally:
+            for conn in connections:
+                conn.close()
+        logger.info("Vector store warmed up", connections=len(connections))
     
     def add_documents(
         self,
         documents: List[Dict[str, Any]],
         session: Optional[Session] = None
     ) -> List[str]:
-        """Add documents to vector store."""
+        """Add documents to vector store in bulk.
+        
+        Each batch of ``vector_ingest_batch_size`` documents costs one multi-row
+        insert for metadata, batched embedding calls for chunks not embedded
+        before and one multi-row insert for embedding rows.
+        """
         doc_ids = []
+        batch_size = settings.vector_ingest_batch_size
         
-        for doc_data in documents:
-            # Store metadata in Postgres
-            doc = Document(
-                title=doc_data.get("title", ""),
-                content=doc_data.get("content", ""),
-                doc_type=doc_data.get("doc_type", "unknown"),
-                source=doc_data.get("source"),
-                source_id=doc_data.get("source_id"),
-                meta_data=doc_data.get("metadata", {}),
-                created_by=doc_data.get("created_by"),
-                tags=doc_data.get("tags", []),
-            )
-            
+        for start in range(0, len(documents), batch_size):
+            batch = documents[start:start + batch_size]
             if session:
-                session.add(doc)
+                doc_ids.extend(self._add_batch(batch, session))
                 session.flush()
-                doc_id = doc.id
             else:
                 from src.db.session import get_vector_db
                 with get_vector_db() as db:
-                    db.add(doc)
-                    db.commit()
-                    doc_id = doc.id
-            
-            # Create embeddings and store in PGVector
-            if LangchainDocument is not None and PGVector is not None:
-                langchain_docs = [
-                    LangchainDocument(
-                        page_content=doc_data["content"],
-                        metadata={
-                            "doc_id": doc_id,
-                            "title": doc_data.get("title", ""),
-                            "doc_type": doc_data.get("doc_type", ""),
-                            "source": doc_data.get("source", ""),
-                            "source_id": doc_data.get("source_id", ""),
-                        }
-                    )
-                ]
-                
-                store = self.get_langchain_store()
-                if store is not None:
-                    store.add_documents(langchain_docs)
-            
-            doc_ids.append(doc_id)
+                    doc_ids.extend(self._add_batch(batch, db))
+            logger.info("Ingested document batch", done=len(doc_ids), total=len(documents))
         
         logger.info("Added documents to vector store", count=len(doc_ids))
         return doc_ids
     
+    def _add_batch(self, documents: List[Dict[str, Any]], db: Session) -> List[str]:
+        """Insert one batch of documents with their chunk embeddings.
+        
+        Vectors live only in ``vector_store.embeddings``, which is both the
+        content-hash cache and the ivfflat-indexed table every search reads.
+        """
+        # Client-side ids, so rows go out in one statement without a flush per row
+        doc_rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "title": doc_data.get("title", ""),
+                "content": doc_data.get("content", ""),
+                "doc_type": doc_data.get("doc_type", "unknown"),
+                "source": doc_data.get("source"),
+                "source_id": doc_data.get("source_id"),
+                "meta_data": doc_data.get("metadata", {}),
+                "created_by": doc_data.get("created_by"),
+                "tags": doc_data.get("tags", []),
+            }
+            for doc_data in documents
+        ]
+        db.execute(Document.__table__.insert(), doc_rows)
+        
+        chunks = []
+        for row in doc_rows:
+            for index, chunk in enumerate(self.splitter.split_text(row["content"])):
+                chunks.append({
+                    "id": str(uuid.uuid4()),
+                    "document_id": row["id"],
+                    "chunk_text": chunk,
+                    "chunk_index": str(index),
+                    "content_hash": self.content_hash(chunk),
+                    "meta_data": {
+                        "doc_id": row["id"],
+                        "title": row["title"],
+                        "doc_type": row["doc_type"],
+                        "source": row["source"] or "",
+                        "source_id": row["source_id"] or "",
+                        "chunk_index": index,
+                    },
+                })
+        if not chunks:
+            return [row["id"] for row in doc_rows]
+        
+        vectors = self._embed_chunks(chunks, db)
+        db.execute(Embedding.__table__.insert(), [
+            {**chunk, "embedding": vector} for chunk, vector in zip(chunks, vectors)
+        ])
+        return [row["id"] for row in doc_rows]
+    
+    def content_hash(self, chunk_text: str) -> str:
+        """Cache key for a chunk's embedding (model + text)."""
+        return hashlib.sha256(f"{settings.embedding_model}\0{chunk_text}".encode("utf-8")).hexdigest()
+    
+    def _embed_chunks(self, chunks: List[Dict[str, Any]], db: Session) -> List[List[float]]:
+        """Embeddings for chunks, reusing stored vectors with the same content hash."""
+        vectors = self._stored_embeddings({chunk["content_hash"] for chunk in chunks}, db)
+        missing: Dict[str, str] = {}
+        for chunk in chunks:
+            if chunk["content_hash"] not in vectors:
+                missing.setdefault(chunk["content_hash"], chunk["chunk_text"])
+        if missing:
+            vectors.update(zip(missing.keys(), self.embed_texts(list(missing.values()))))
+        logger.info("Embedded chunks", chunks=len(chunks), embedded=len(missing), reused=len(chunks) - len(missing))
+        return [vectors[chunk["content_hash"]] for chunk in chunks]
+    
+    def _stored_embeddings(self, hashes: Iterable[str], db: Session) -> Dict[str, List[float]]:
+        """Existing vectors by content hash (the embedding cache)."""
+        vectors = {}
+        hashes = list(hashes)
+        for i in range(0, len(hashes), 1000):
+            rows = db.execute(
+                select(Embedding.content_hash, Embedding.embedding)
+                .where(Embedding.content_hash.in_(hashes[i:i + 1000]))
+                .distinct(Embedding.content_hash)
+            )
+            for content_hash, embedding in rows:
+                vectors[content_hash] = [float(x) for x in embedding]
+        return vectors
+    
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in ``embedding_batch_size`` batches, ``embedding_concurrency`` requests at a time."""
+        size = settings.embedding_batch_size
+        batches = [texts[i:i + size] for i in range(0, len(texts), size)]
+        if len(batches) == 1:
+            return self.embeddings.embed_documents(batches[0])
+        return [vector for batch in self._embed_executor.map(self.embeddings.embed_documents, batches) for vector in batch]
+    
     def search(
         self,
         query: str,
@@ -122,14 +184,7 @@ class VectorStore:
         filter: Optional[Dict[str, Any]] = None
     ) -> List:
         """Search for similar documents."""
-        store = self.get_langchain_store()
-        if store is None:
-            logger.warning("Vector store not available - returning empty results")
-            return []
-        results = store.similarity_search_with_score(query, k=k, filter=filter)
-        
-        # Return just the documents (without scores for now)
-        return [doc for doc, score in results]
+        return [doc for doc, distance in self.search_sql(query, k=k, filter=filter)]
     
     def search_with_scores(
         self,
@@ -137,10 +192,61 @@ class VectorStore:
         k: int = 5,
         filter: Optional[Dict[str, Any]] = None
     ) -> List[tuple]:
-        """Search with similarity scores."""
-        store = self.get_langchain_store()
-        if store is None:
-            logger.warning("Vector store not available - returning empty results")
-            return []
-        return store.similarity_search_with_score(query, k=k, filter=filter)
+        """Search with scores (L2 distance, lower is closer)."""
+        return self.search_sql(query, k=k, filter=filter)
+    
+    def search_sql(
+        self,
+        query: str,
+        k: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+        probes: Optional[int] = None
+    ) -> List[tuple]:
+        """Search ``vector_store.embeddings`` directly through its ivfflat index.
+        
+        One statement per query (plus ``SET LOCAL`` when ``probes`` overrides
+        the pool default). ``filter`` matches metadata keys by equality.
+        Returns (document, L2 distance) pairs.
+        """
+        from src.db.session import vector_engine
+        # The index uses the default vector_l2_ops, so order by <-> for it to apply
+        # (OpenAI embeddings are unit length: L2 and cosine rank the same)
+        conditions = []
+        vector = "[" + ",".join(map(str, self.embeddings.embed_query(query))) + "]"
+        params = {"query": vector, "k": k}
+        for i, (key, value) in enumerate((filter or {}).items()):
+            if not re.fullmatch(r"\w+", key):
+                raise ValueError(f"Invalid metadata filter key: {key}")
+            conditions.append(f"meta_data->>'{key}' = :filter_{i}")
+            params[f"filter_{i}"] = str(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        statement = text(f"""
+            SELECT document_id, chunk_text, chunk_index, meta_data,
+                   embedding <-> CAST(:query AS vector) AS distance
+            FROM {Embedding.__table__.fullname}
+            {where}
+            ORDER BY embedding <-> CAST(:query AS vector)
+            LIMIT :k
+        """)
+        
+        with vector_engine.begin() as conn:
+            if probes is not None:
+                conn.execute(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+            rows = conn.execute(statement, params).all()
+        
+        return [
+            (
+                LangchainDocument(
+                    page_content=row.chunk_text,
+                    metadata={**(row.meta_data or {}), "doc_id": row.document_id, "chunk_index": row.chunk_index},
+                ),
+                float(row.distance),
+            )
+            for row in rows
+        ]
+
 
+@lru_cache(maxsize=1)
+def get_vector_store() -> VectorStore:
+    """Get the process-wide VectorStore (one embeddings client and pool per process)."""
+    return VectorStore()
@@ -85,6 +85,69 @@ def make_api_request(endpoint: str, method: str = "GET", data: Dict = None, head
         return None
 
 
+def stream_api_request(endpoint: str, data: Dict):
+    """POST to a streaming endpoint and yield its JSON-lines events."""
+    url = f"{API_BASE_URL}{endpoint}"
+    headers = {"Content-Type": "application/json"}
+    if st.session_state.get("auth_token"):
+        headers["Authorization"] = f"Bearer {st.session_state.auth_token}"
+    
+    with requests.post(url, json=data, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                yield json.loads(line)
+
+
+NODE_LABELS = {
+    "planner": "Plan created",
+    "jira_analyst": "JIRA analysis",
+    "risk_agent": "Risk report",
+    "dependency_agent": "Dependency analysis",
+    "comms_agent": "Stakeholder comms",
+    "action_agent": "Proposed actions",
+    "governance_agent": "Governance check",
+    "evaluator": "Quality evaluation",
+}
+
+
+def run_workflow_streaming(data: Dict) -> Dict:
+    """Run the workflow via the streaming endpoint, rendering partial results as they arrive."""
+    status = st.status("Running workflow...", expanded=True)
+    live_output = st.empty()
+    partial_results = st.empty()
+    partial = {}
+    drafts: Dict[str, str] = {}
+    
+    try:
+        for event in stream_api_request("/workflow/stream", data):
+            kind = event.get("event")
+            if kind == "token":
+                label = event.get("stream") or event.get("node") or "agent"
+                drafts[label] = drafts.get(label, "") + event.get("delta", "")
+                live_output.markdown(f"**✍️ {label}**\n\n{drafts[label][-3000:]}")
+            elif kind == "node_completed":
+                node = event.get("node")
+                status.write(f"✓ {NODE_LABELS.get(node, node)}")
+                for error in event.get("errors", []):
+                    status.write(f"⚠ {error}")
+                partial.update(event.get("result", {}))
+                live_output.empty()
+                with partial_results.container():
+                    render_results(partial, interactive=False)
+            elif kind == "final":
+                status.update(label="Workflow completed!", state="complete", expanded=False)
+                return event
+            elif kind == "error":
+                status.update(label="Workflow failed", state="error")
+                st.error(f"Workflow error: {event.get('detail')}")
+                return None
+    except requests.exceptions.RequestException as e:
+        status.update(label="Workflow failed", state="error")
+        st.error(f"API Error: {str(e)}")
+    return None
+
+
 def main():
     """Main application."""
     if not authenticate():
@@ -136,89 +199,106 @@ def show_copilot_page():
         sprint_id = st.text_input("Sprint ID (optional)", placeholder="123")
     
     days_ahead = st.slider("Days Ahead", 7, 30, 14)
+    stream_progress = st.checkbox("Show progress as agents finish", value=True)
     
     if st.button("Run Workflow", type="primary"):
-        with st.spinner("Running workflow... This may take a minute."):
-            result = make_api_request(
-                "/workflow/run",
-                method="POST",
-                data={
-                    "user_request": user_request,
-                    "project_key": project_key if project_key else None,
-                    "sprint_id": sprint_id if sprint_id else None,
-                    "days_ahead": days_ahead,
-                },
-            )
-            
-            if result:
-                st.session_state.conversation_id = result.get("conversation_id")
-                st.session_state.workflow_result = result.get("result", {})
-                st.success("Workflow completed!")
-                st.rerun()
+        data = {
+            "user_request": user_request,
+            "project_key": project_key if project_key else None,
+            "sprint_id": sprint_id if sprint_id else None,
+            "days_ahead": days_ahead,
+        }
+        if stream_progress:
+            result = run_workflow_streaming(data)
+        else:
+            with st.spinner("Running workflow... This may take a minute."):
+                result = make_api_request("/workflow/run", method="POST", data=data)
+        
+        if result:
+            st.session_state.conversation_id = result.get("conversation_id")
+            st.session_state.workflow_result = result.get("result", {})
+            st.success("Workflow completed!")
+            st.rerun()
     
     # Display results
     if st.session_state.workflow_result:
         st.divider()
         st.header("Results")
+        render_results(st.session_state.workflow_result)
+
+
+def render_results(result: Dict[str, Any], interactive: bool = True):
+    """Render workflow results (partial while streaming, without buttons)."""
+    # Dependency analysis
+    if result.get("dependency_graph"):
+        with st.expander("🔗 Dependencies"):
+            dependency_graph = result["dependency_graph"]
+            critical_path = dependency_graph.get("critical_path", {})
+            if critical_path.get("path"):
+                st.markdown(f"**Critical path:** {' → '.join(critical_path['path'])} ({critical_path.get('length', 0)}h remaining)")
+            if dependency_graph.get("cycles"):
+                st.warning(f"Blocking cycles: {dependency_graph['cycles']}")
+            if dependency_graph.get("blocked_items"):
+                st.dataframe(pd.DataFrame(dependency_graph["blocked_items"]), use_container_width=True)
+    
+    # Risk Report
+    if result.get("risk_report"):
+        with st.expander("📊 Risk Report", expanded=True):
+            try:
+                # Try to display as markdown
+                st.markdown(result["risk_report"])
+            except Exception as e:
+                # If markdown fails, display as code
+                st.error(f"Error displaying risk report: {str(e)}")
+                st.code(result["risk_report"], language="text")
+    
+    # Stakeholder Email
+    if result.get("stakeholder_email"):
+        with st.expander("📧 Stakeholder Email", expanded=True):
+            st.markdown(result["stakeholder_email"])
+            if interactive and st.button("Copy Email"):
+                st.code(result["stakeholder_email"], language=None)
+    
+    # Status Report
+    if result.get("status_report"):
+        with st.expander("📋 Status Report"):
+            st.markdown(result["status_report"])
+    
+    # Proposed Actions
+    if result.get("proposed_actions"):
+        st.divider()
+        st.header("⚠️ Proposed Actions (Require Approval)")
+        actions = result["proposed_actions"]
         
-        result = st.session_state.workflow_result
-        
-        # Risk Report
-        if result.get("risk_report"):
-            with st.expander("📊 Risk Report", expanded=True):
-                try:
-                    # Try to display as markdown
-                    st.markdown(result["risk_report"])
-                except Exception as e:
-                    # If markdown fails, display as code
-                    st.error(f"Error displaying risk report: {str(e)}")
-                    st.code(result["risk_report"], language="text")
-        
-        # Stakeholder Email
-        if result.get("stakeholder_email"):
-            with st.expander("📧 Stakeholder Email", expanded=True):
-                st.markdown(result["stakeholder_email"])
-                if st.button("Copy Email"):
-                    st.code(result["stakeholder_email"], language=None)
-        
-        # Status Report
-        if result.get("status_report"):
-            with st.expander("📋 Status Report"):
-                st.markdown(result["status_report"])
-        
-        # Proposed Actions
-        if result.get("proposed_actions"):
-            st.divider()
-            st.header("⚠️ Proposed Actions (Require Approval)")
-            actions = result["proposed_actions"]
-            
-            for i, action in enumerate(actions):
-                with st.container():
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.markdown(f"**{action.get('type', 'unknown').upper()}** on {action.get('issue_key', 'N/A')}")
-                        st.markdown(f"**Reason:** {action.get('reason', 'N/A')}")
-                        st.json(action.get('payload', {}))
-                    with col2:
-                        st.button("Approve", key=f"approve_{i}", type="primary")
-                        st.button("Reject", key=f"reject_{i}")
-                        st.button("Edit", key=f"edit_{i}")
-        
-        # Evaluation Scores
-        if result.get("evaluation_scores"):
-            with st.expander("✅ Quality Evaluation"):
-                eval_scores = result["evaluation_scores"]
-                for metric, data in eval_scores.items():
-                    if isinstance(data, dict) and "score" in data:
-                        score = data["score"]
-                        threshold = data.get("threshold", 0.8)
-                        passed = data.get("passed", False)
-                        
-                        st.progress(score, text=f"{metric}: {score:.2%} (Threshold: {threshold:.2%})")
-                        if passed:
-                            st.success(f"✓ {metric} passed")
-                        else:
-                            st.warning(f"⚠ {metric} below threshold")
+        for i, action in enumerate(actions):
+            with st.container():
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.markdown(f"**{action.get('type', 'unknown').upper()}** on {action.get('issue_key', 'N/A')}")
+                    st.markdown(f"**Reason:** {action.get('reason', 'N/A')}")
+                    st.json(action.get('payload', {}))
+                if not interactive:
+                    continue
+                with col2:
+                    st.button("Approve", key=f"approve_{i}", type="primary")
+                    st.button("Reject", key=f"reject_{i}")
+                    st.button("Edit", key=f"edit_{i}")
+    
+    # Evaluation Scores
+    if result.get("evaluation_scores"):
+        with st.expander("✅ Quality Evaluation"):
+            eval_scores = result["evaluation_scores"]
+            for metric, data in eval_scores.items():
+                if isinstance(data, dict) and "score" in data:
+                    score = data["score"]
+                    threshold = data.get("threshold", 0.8)
+                    passed = data.get("passed", False)
+                    
+                    st.progress(score, text=f"{metric}: {score:.2%} (Threshold: {threshold:.2%})")
+                    if passed:
+                        st.success(f"✓ {metric} passed")
+                    else:
+                        st.warning(f"⚠ {metric} below threshold")
 
 
 def show_daily_status_page():
@@ -1,6 +1,7 @@
 """Third-party integrations."""
 from .jira_client import JiraClient
+from .jira_snapshot import JiraSnapshotStore, JiraSnapshotSyncer
 from .servicenow_client import ServiceNowClient
 
-__all__ = ["JiraClient", "ServiceNowClient"]
+__all__ = ["JiraClient", "JiraSnapshotStore", "JiraSnapshotSyncer", "ServiceNowClient"]
 
@@ -1,14 +1,29 @@
 """JIRA integration client."""
 from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
 from jira import JIRA
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import sys
+import threading
+import time
 import structlog
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from src.config import settings
+from .jira_snapshot import JiraSnapshotStore, JiraSnapshotSyncer
 
 logger = structlog.get_logger()
 
+# Only the fields the normalizers read - keeps search payloads small
+STORY_FIELDS = [
+    "summary", "status", "assignee", "duedate", "created", "updated", "description",
+    "priority", "labels", "subtasks", "comment", "issuelinks", "timeestimate",
+    settings.jira_sprint_field,
+]
+BUG_FIELDS = ["summary", "status", "assignee", "duedate", "updated", "priority", "labels"]
+SPRINT_HEALTH_FIELDS = ["status", "customfield_10016"]
+
 
 class JiraClient:
     """JIRA API client."""
@@ -18,6 +33,186 @@ class JiraClient:
             server=settings.jira_server,
             basic_auth=(settings.jira_email, settings.jira_api_token),
         )
+        self._snapshot: Optional[JiraSnapshotStore] = None
+        self._snapshot_lock = threading.Lock()
+        self._syncer: Optional[JiraSnapshotSyncer] = None
+        self._jql_tz: Optional[ZoneInfo] = None
+        self._last_reconcile: Dict[str, float] = {}
+    
+    def search_all(
+        self,
+        jql: str,
+        fields: Optional[List[str]] = None,
+        expand: Optional[str] = None,
+        max_results: Optional[int] = None,
+    ) -> List[Any]:
+        """Fetch every issue matching ``jql``.
+        
+        The first page reports the total; the remaining ``startAt`` pages are
+        fetched concurrently on a bounded worker pool. At most ``max_results``
+        (default ``jira_max_results``) issues are returned; a larger result set
+        is truncated with a warning.
+        """
+        if "order by" not in jql.lower():
+            # Stable ordering so concurrently fetched pages don't overlap
+            jql += " ORDER BY key ASC"
+        page_size = settings.jira_page_size
+        limit = max_results or settings.jira_max_results
+        
+        first_page = self._search_page(jql, 0, min(page_size, limit), fields, expand)
+        if first_page.total > limit:
+            logger.warning(
+                "JIRA search truncated",
+                jql=jql,
+                total=first_page.total,
+                limit=limit,
+            )
+        total = min(first_page.total, limit)
+        issues = list(first_page)
+        
+        starts = list(range(len(issues), total, page_size))
+        if starts:
+            with ThreadPoolExecutor(max_workers=settings.jira_max_workers) as pool:
+                pages = pool.map(
+                    lambda start: self._search_page(jql, start, min(page_size, total - start), fields, expand),
+                    starts,
+                )
+                for page in pages:
+                    issues.extend(page)
+        
+        # Drop duplicates if the result set shifted between pages
+        seen = set()
+        unique = []
+        for issue in issues:
+            if issue.key not in seen:
+                seen.add(issue.key)
+                unique.append(issue)
+        logger.info("JIRA bulk fetch completed", total=len(unique), pages=len(starts) + 1)
+        return unique
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    def _search_page(
+        self,
+        jql: str,
+        start_at: int,
+        max_results: int,
+        fields: Optional[List[str]],
+        expand: Optional[str],
+    ):
+        """Fetch one page of search results."""
+        return self.client.search_issues(
+            jql,
+            startAt=start_at,
+            maxResults=max_results,
+            validate_query=start_at == 0,
+            fields=",".join(fields) if fields else "*all",
+            expand=expand,
+        )
+    
+    @property
+    def snapshot(self) -> JiraSnapshotStore:
+        """Local issue snapshot (created on first use)."""
+        if self._snapshot is None:
+            with self._snapshot_lock:
+                if self._snapshot is None:
+                    self._snapshot = JiraSnapshotStore()
+        return self._snapshot
+    
+    def sync_snapshot(self, project_key: Optional[str] = None) -> int:
+        """Delta-sync stories and bugs into the local snapshot.
+        
+        The first sync for a scope is a full fetch; later ones only pull
+        issues with ``updated >= last_sync``. Sync times are stored as naive
+        UTC and converted to the JIRA user's time zone for JQL. Every
+        ``jira_snapshot_reconcile_interval_seconds`` the scope's keys are
+        listed and deleted or moved issues dropped. Returns the number of
+        issues written.
+        """
+        scope = self._snapshot_scope(project_key)
+        last_sync = self.snapshot.last_sync(scope)
+        sync_started = datetime.now(timezone.utc).replace(tzinfo=None)
+        
+        scope_jql = "issuetype in (Story, Bug)"
+        if project_key:
+            scope_jql += f" AND project = {project_key}"
+        jql = scope_jql
+        if last_sync:
+            # Overlap absorbs clock skew; JQL dates have minute precision
+            since = last_sync.replace(tzinfo=timezone.utc) - timedelta(minutes=settings.jira_sync_overlap_minutes)
+            since = since.astimezone(self._jql_timezone())
+            jql += f' AND updated >= "{since.strftime("%Y/%m/%d %H:%M")}"'
+        
+        fields = STORY_FIELDS + ["issuetype", "project"]
+        # The snapshot has to hold every issue, so page past jira_max_results
+        issues = self.search_all(jql, fields=fields, expand="changelog", max_results=sys.maxsize)
+        records = []
+        for issue in issues:
+            record = self._normalize_story(issue)
+            record["reopened_count"] = self._normalize_bug(issue)["reopened_count"]
+            record["issue_type"] = issue.fields.issuetype.name
+            record["project"] = issue.fields.project.key
+            records.append(record)
+        
+        written = self.snapshot.upsert(scope, records, sync_started)
+        logger.info("JIRA snapshot synced", scope=scope, changed=written, full=last_sync is None)
+        
+        if last_sync is None:
+            # A full fetch already is a reconciliation
+            self._last_reconcile[scope] = time.monotonic()
+        elif time.monotonic() - self._last_reconcile.get(scope, 0.0) >= settings.jira_snapshot_reconcile_interval_seconds:
+            self.reconcile_snapshot(project_key, scope_jql)
+        return written
+    
+    def reconcile_snapshot(self, project_key: Optional[str] = None, scope_jql: Optional[str] = None) -> int:
+        """Drop snapshot issues that no longer match the scope (deleted or moved).
+        
+        Delta syncs never see deleted issues, and an issue moved to another
+        project comes back under a new key. Returns the number of issues removed.
+        """
+        scope = self._snapshot_scope(project_key)
+        if scope_jql is None:
+            scope_jql = "issuetype in (Story, Bug)"
+            if project_key:
+                scope_jql += f" AND project = {project_key}"
+        keys = {issue.key for issue in self.search_all(scope_jql, fields=["issuetype"], max_results=sys.maxsize)}
+        removed = self.snapshot.prune(scope, project_key, ["Story", "Bug"], keys)
+        self._last_reconcile[scope] = time.monotonic()
+        logger.info("JIRA snapshot reconciled", scope=scope, live=len(keys), removed=removed)
+        return removed
+    
+    def _jql_timezone(self) -> ZoneInfo:
+        """Time zone JIRA applies to JQL dates (the API user's profile time zone)."""
+        if self._jql_tz is None:
+            try:
+                self._jql_tz = ZoneInfo(self.client.myself()["timeZone"])
+            except Exception as e:
+                logger.warning("JIRA user time zone unknown - assuming UTC", error=str(e))
+                self._jql_tz = ZoneInfo("UTC")
+        return self._jql_tz
+    
+    def start_snapshot_sync(self, project_key: Optional[str] = None) -> JiraSnapshotSyncer:
+        """Start the background delta sync (no-op if already running)."""
+        if self._syncer is None or not self._syncer.is_alive():
+            self._syncer = JiraSnapshotSyncer(
+                self,
+                project_key=project_key,
+                interval_seconds=settings.jira_snapshot_sync_interval_seconds,
+            )
+            self._syncer.start()
+        return self._syncer
+    
+    def _snapshot_scope(self, project_key: Optional[str]) -> str:
+        """Snapshot sync scope for a project (``*`` for all projects)."""
+        return project_key or "*"
+    
+    def _serve_from_snapshot(self, project_key: Optional[str]) -> bool:
+        """Whether reads can be answered from the local snapshot."""
+        if not settings.jira_snapshot_enabled:
+            return False
+        return any(
+            self.snapshot.last_sync(scope) is not None
+            for scope in {self._snapshot_scope(project_key), "*"}
+        )
     
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     def get_epics(self, project_key: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -43,14 +238,20 @@ class JiraClient:
         
         return epics
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     def get_stories(
         self,
         project_key: Optional[str] = None,
         sprint: Optional[str] = None,
-        days_ahead: int = 14
+        days_ahead: int = 14,
+        incremental: bool = False,
     ) -> List[Dict[str, Any]]:
-        """Get stories for risk analysis."""
+        """Get stories for risk analysis.
+        
+        Issue links come back in the same search, so ``story["links"]`` holds
+        what ``get_dependencies`` would return for each story. With
+        ``incremental`` the local snapshot is delta-synced first; reads are
+        served from the snapshot whenever it is enabled and populated.
+        """
         jql = "issuetype = Story"
         if project_key:
             jql += f" AND project = {project_key}"
@@ -59,49 +260,55 @@ class JiraClient:
         
         # Focus on items due in next N days or overdue
         cutoff_date = (datetime.now() + timedelta(days=days_ahead)).strftime("%Y-%m-%d")
-        jql += f" AND (duedate <= {cutoff_date} OR duedate IS EMPTY)"
-        
-        issues = self.client.search_issues(jql, maxResults=500, expand="changelog")
+        if incremental:
+            self.sync_snapshot(project_key)
+        if incremental or self._serve_from_snapshot(project_key):
+            return self.snapshot.query_issues("Story", project_key=project_key, sprint=sprint, due_before=cutoff_date)
         
-        stories = []
-        for issue in issues:
-            # Get status transitions
-            transitions = []
-            if hasattr(issue, 'changelog') and issue.changelog:
-                for history in issue.changelog.histories:
-                    for item in history.items:
-                        if item.field == "status":
-                            transitions.append({
-                                "from": item.fromString,
-                                "to": item.toString,
-                                "date": history.created,
-                            })
-            
-            stories.append({
-                "key": issue.key,
-                "summary": issue.fields.summary,
-                "status": issue.fields.status.name,
-                "assignee": issue.fields.assignee.displayName if issue.fields.assignee else None,
-                "assignee_email": issue.fields.assignee.emailAddress if issue.fields.assignee else None,
-                "due_date": issue.fields.duedate,
-                "created": issue.fields.created,
-                "updated": issue.fields.updated,
-                "description": issue.fields.description,
-                "priority": issue.fields.priority.name if issue.fields.priority else None,
-                "labels": issue.fields.labels,
-                "blockers": [label for label in issue.fields.labels if "blocker" in label.lower()],
-                "transitions": transitions,
-                "comments": self._get_comments(issue),
-                "subtasks": [st.key for st in issue.fields.subtasks] if issue.fields.subtasks else [],
-            })
+        jql += f" AND (duedate <= {cutoff_date} OR duedate IS EMPTY)"
+        issues = self.search_all(jql, fields=STORY_FIELDS, expand="changelog")
+        return [self._normalize_story(issue) for issue in issues]
+    
+    def _normalize_story(self, issue) -> Dict[str, Any]:
+        """Normalize a story issue."""
+        # Get status transitions
+        transitions = []
+        if hasattr(issue, 'changelog') and issue.changelog:
+            for history in issue.changelog.histories:
+                for item in history.items:
+                    if item.field == "status":
+                        transitions.append({
+                            "from": item.fromString,
+                            "to": item.toString,
+                            "date": history.created,
+                        })
         
-        return stories
+        return {
+            "key": issue.key,
+            "summary": issue.fields.summary,
+            "status": issue.fields.status.name,
+            "assignee": issue.fields.assignee.displayName if issue.fields.assignee else None,
+            "assignee_email": getattr(issue.fields.assignee, "emailAddress", None) if issue.fields.assignee else None,
+            "due_date": issue.fields.duedate,
+            "created": issue.fields.created,
+            "updated": issue.fields.updated,
+            "description": issue.fields.description,
+            "priority": issue.fields.priority.name if issue.fields.priority else None,
+            "labels": issue.fields.labels,
+            "blockers": [label for label in issue.fields.labels if "blocker" in label.lower()],
+            "transitions": transitions,
+            "comments": self._get_comments(issue),
+            "subtasks": [st.key for st in issue.fields.subtasks] if issue.fields.subtasks else [],
+            "links": self._get_links(issue),
+            "sprints": self._get_sprints(issue),
+            "remaining_estimate": getattr(issue.fields, "timeestimate", None),  # seconds
+        }
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     def get_bugs(
         self,
         project_key: Optional[str] = None,
-        days_ahead: int = 14
+        days_ahead: int = 14,
+        incremental: bool = False,
     ) -> List[Dict[str, Any]]:
         """Get bugs."""
         jql = "issuetype = Bug"
@@ -109,55 +316,80 @@ class JiraClient:
             jql += f" AND project = {project_key}"
         
         cutoff_date = (datetime.now() + timedelta(days=days_ahead)).strftime("%Y-%m-%d")
-        jql += f" AND (duedate <= {cutoff_date} OR duedate IS EMPTY)"
+        if incremental:
+            self.sync_snapshot(project_key)
+        if incremental or self._serve_from_snapshot(project_key):
+            return self.snapshot.query_issues("Bug", project_key=project_key, due_before=cutoff_date)
         
-        issues = self.client.search_issues(jql, maxResults=200)
-        
-        bugs = []
-        for issue in issues:
-            bugs.append({
-                "key": issue.key,
-                "summary": issue.fields.summary,
-                "status": issue.fields.status.name,
-                "assignee": issue.fields.assignee.displayName if issue.fields.assignee else None,
-                "due_date": issue.fields.duedate,
-                "priority": issue.fields.priority.name if issue.fields.priority else None,
-                "labels": issue.fields.labels,
-                "reopened_count": len([h for h in issue.changelog.histories if any(
-                    item.field == "status" and item.toString == "Reopened"
-                    for item in h.items
-                )]) if hasattr(issue, 'changelog') else 0,
-            })
-        
-        return bugs
+        jql += f" AND (duedate <= {cutoff_date} OR duedate IS EMPTY)"
+        issues = self.search_all(jql, fields=BUG_FIELDS, expand="changelog")
+        return [self._normalize_bug(issue) for issue in issues]
+    
+    def _normalize_bug(self, issue) -> Dict[str, Any]:
+        """Normalize a bug issue."""
+        return {
+            "key": issue.key,
+            "summary": issue.fields.summary,
+            "status": issue.fields.status.name,
+            "assignee": issue.fields.assignee.displayName if issue.fields.assignee else None,
+            "due_date": issue.fields.duedate,
+            "updated": issue.fields.updated,
+            "priority": issue.fields.priority.name if issue.fields.priority else None,
+            "labels": issue.fields.labels,
+            "reopened_count": len([h for h in issue.changelog.histories if any(
+                item.field == "status" and item.toString == "Reopened"
+                for item in h.items
+            )]) if hasattr(issue, 'changelog') else 0,
+        }
     
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     def get_dependencies(self, issue_key: str) -> List[Dict[str, Any]]:
         """Get issue dependencies."""
-        issue = self.client.issue(issue_key, expand="links")
-        
+        issue = self.client.issue(issue_key, fields="issuelinks")
+        return self._get_links(issue)
+    
+    def _get_links(self, issue) -> List[Dict[str, Any]]:
+        """Get issue links."""
         dependencies = []
-        if hasattr(issue.fields, 'issuelinks'):
+        if hasattr(issue.fields, 'issuelinks') and issue.fields.issuelinks:
             for link in issue.fields.issuelinks:
                 if hasattr(link, 'outwardIssue'):
                     dependencies.append({
+                        "from": issue.key,
                         "type": link.type.outward,
                         "key": link.outwardIssue.key,
                         "status": link.outwardIssue.fields.status.name,
+                        "direction": "outward",
                     })
                 elif hasattr(link, 'inwardIssue'):
                     dependencies.append({
+                        "from": issue.key,
                         "type": link.type.inward,
                         "key": link.inwardIssue.key,
                         "status": link.inwardIssue.fields.status.name,
+                        "direction": "inward",
                     })
         
         return dependencies
     
+    def _get_sprints(self, issue) -> List[Dict[str, Any]]:
+        """Get sprints from the sprint custom field (if requested)."""
+        sprints = []
+        for sprint in getattr(issue.fields, settings.jira_sprint_field, None) or []:
+            if hasattr(sprint, "id"):
+                sprints.append({"id": sprint.id, "name": getattr(sprint, "name", None)})
+            elif isinstance(sprint, str):
+                # Older servers serialize sprints as "...[id=1,name=Sprint 1,...]"
+                parts = dict(
+                    part.split("=", 1) for part in sprint[sprint.find("[") + 1:-1].split(",") if "=" in part
+                )
+                sprints.append({"id": parts.get("id"), "name": parts.get("name")})
+        return sprints
+    
     def _get_comments(self, issue) -> List[Dict[str, Any]]:
         """Get issue comments."""
         comments = []
-        if hasattr(issue.fields, 'comment') and issue.fields.comment.comments:
+        if hasattr(issue.fields, 'comment') and issue.fields.comment and issue.fields.comment.comments:
             for comment in issue.fields.comment.comments:
                 comments.append({
                     "author": comment.author.displayName,
@@ -219,7 +451,7 @@ class JiraClient:
         
         # Get sprint issues
         jql = f"sprint = {sprint_id}"
-        issues = self.client.search_issues(jql, maxResults=500)
+        issues = self.search_all(jql, fields=SPRINT_HEALTH_FIELDS)
         
         total_story_points = sum(
             issue.fields.customfield_10016 or 0
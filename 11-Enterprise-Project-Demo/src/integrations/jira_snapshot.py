@@ -0,0 +1,325 @@
+"""Local snapshot of normalized JIRA issues."""
+from typing import List, Dict, Any, Optional, Iterable
+from datetime import datetime
+import os
+import threading
+from sqlalchemy import (
+    Column, DateTime, Integer, JSON, MetaData, String, Table, Text,
+    create_engine, delete, event, inspect, or_, select, text,
+)
+from sqlalchemy.engine import Engine
+import structlog
+
+from src.config import settings
+
+logger = structlog.get_logger()
+
+# Keeps IN (...) lists within SQLite's bound-parameter limit
+_KEY_BATCH = 500
+
+
+def _batches(items: List[str], size: int = _KEY_BATCH) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class JiraSnapshotStore:
+    """Persists issues, transitions, links and comments for offline reads.
+
+    Backed by a SQLite file by default, or by the Postgres ``chat_store``
+    engine from ``src.db.session``.
+    """
+
+    def __init__(self, engine: Optional[Engine] = None, schema: Optional[str] = None):
+        self.engine = engine if engine is not None else self._default_engine()
+        if schema is None and self.engine.dialect.name == "postgresql":
+            schema = settings.chat_db_schema
+        self.metadata = MetaData(schema=schema)
+        self.issues = Table(
+            "jira_issues", self.metadata,
+            Column("key", String, primary_key=True),
+            Column("project", String, index=True),
+            Column("issue_type", String, index=True),
+            Column("summary", Text),
+            Column("status", String),
+            Column("assignee", String),
+            Column("assignee_email", String),
+            Column("due_date", String, index=True),
+            Column("created", String),
+            Column("updated", String),
+            Column("description", Text),
+            Column("priority", String),
+            Column("labels", JSON),
+            Column("subtasks", JSON),
+            Column("sprints", JSON),
+            Column("reopened_count", Integer, default=0),
+            Column("remaining_estimate", Integer),
+        )
+        self.transitions = Table(
+            "jira_transitions", self.metadata,
+            Column("issue_key", String, index=True, nullable=False),
+            Column("from_status", String),
+            Column("to_status", String),
+            Column("date", String),
+        )
+        self.links = Table(
+            "jira_links", self.metadata,
+            Column("issue_key", String, index=True, nullable=False),
+            Column("link_type", String),
+            Column("linked_key", String, index=True),
+            Column("linked_status", String),
+            Column("direction", String),
+        )
+        self.comments = Table(
+            "jira_comments", self.metadata,
+            Column("issue_key", String, index=True, nullable=False),
+            Column("author", String),
+            Column("body", Text),
+            Column("created", String),
+        )
+        self.sync_state = Table(
+            "jira_sync_state", self.metadata,
+            Column("scope", String, primary_key=True),
+            Column("last_sync", DateTime, nullable=False),
+            Column("version", Integer, nullable=False, default=0),
+        )
+        self.metadata.create_all(self.engine)
+        self._add_missing_columns(self.issues)
+
+    def _add_missing_columns(self, table: Table) -> None:
+        """Add columns introduced after the table was created (create_all skips existing tables)."""
+        existing = {c["name"] for c in inspect(self.engine).get_columns(table.name, schema=table.schema)}
+        missing = [column for column in table.columns if column.name not in existing]
+        if not missing:
+            return
+        preparer = self.engine.dialect.identifier_preparer
+        with self.engine.begin() as conn:
+            for column in missing:
+                conn.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                    f"{preparer.format_column(column)} {column.type.compile(self.engine.dialect)}"
+                ))
+                logger.info("JIRA snapshot column added", table=table.name, column=column.name)
+
+    def _default_engine(self) -> Engine:
+        """Engine for the configured snapshot backend."""
+        if settings.jira_snapshot_backend == "postgres":
+            from src.db.session import engine
+            return engine
+
+        directory = os.path.dirname(settings.jira_snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        sqlite_engine = create_engine(f"sqlite:///{settings.jira_snapshot_path}")
+
+        @event.listens_for(sqlite_engine, "connect")
+        def _enable_wal(dbapi_connection, connection_record):
+            # Readers don't block on the background sync writer
+            dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+        return sqlite_engine
+
+    def upsert(self, scope: str, records: List[Dict[str, Any]], synced_at: datetime) -> int:
+        """Replace the given issues (and their child rows) and record the sync."""
+        keys = [r["key"] for r in records]
+        with self.engine.begin() as conn:
+            for batch in _batches(keys):
+                for table in (self.transitions, self.links, self.comments):
+                    conn.execute(delete(table).where(table.c.issue_key.in_(batch)))
+                conn.execute(delete(self.issues).where(self.issues.c.key.in_(batch)))
+
+            if records:
+                conn.execute(self.issues.insert(), [
+                    {
+                        "key": r["key"],
+                        "project": r.get("project"),
+                        "issue_type": r.get("issue_type"),
+                        "summary": r.get("summary"),
+                        "status": r.get("status"),
+                        "assignee": r.get("assignee"),
+                        "assignee_email": r.get("assignee_email"),
+                        "due_date": r.get("due_date"),
+                        "created": r.get("created"),
+                        "updated": r.get("updated"),
+                        "description": r.get("description"),
+                        "priority": r.get("priority"),
+                        "labels": r.get("labels") or [],
+                        "subtasks": r.get("subtasks") or [],
+                        "sprints": r.get("sprints") or [],
+                        "reopened_count": r.get("reopened_count", 0),
+                        "remaining_estimate": r.get("remaining_estimate"),
+                    }
+                    for r in records
+                ])
+                transitions = [
+                    {"issue_key": r["key"], "from_status": t["from"], "to_status": t["to"], "date": t["date"]}
+                    for r in records for t in r.get("transitions", [])
+                ]
+                links = [
+                    {
+                        "issue_key": r["key"],
+                        "link_type": link["type"],
+                        "linked_key": link["key"],
+                        "linked_status": link["status"],
+                        "direction": link.get("direction"),
+                    }
+                    for r in records for link in r.get("links", [])
+                ]
+                comments = [
+                    {"issue_key": r["key"], "author": c["author"], "body": c["body"], "created": c["created"]}
+                    for r in records for c in r.get("comments", [])
+                ]
+                if transitions:
+                    conn.execute(self.transitions.insert(), transitions)
+                if links:
+                    conn.execute(self.links.insert(), links)
+                if comments:
+                    conn.execute(self.comments.insert(), comments)
+
+            current = conn.execute(
+                select(self.sync_state.c.version).where(self.sync_state.c.scope == scope)
+            ).scalar()
+            if current is None:
+                conn.execute(self.sync_state.insert(), {"scope": scope, "last_sync": synced_at, "version": 1})
+            else:
+                conn.execute(
+                    self.sync_state.update()
+                    .where(self.sync_state.c.scope == scope)
+                    .values(last_sync=synced_at, version=current + 1 if records else current)
+                )
+        return len(records)
+
+    def prune(self, scope: str, project_key: Optional[str], issue_types: List[str], keep: Iterable[str]) -> int:
+        """Delete issues of ``issue_types`` (in ``project_key``, if given) whose key is not in ``keep``."""
+        keep = set(keep)
+        query = select(self.issues.c.key).where(self.issues.c.issue_type.in_(issue_types))
+        if project_key:
+            query = query.where(self.issues.c.project == project_key)
+        with self.engine.begin() as conn:
+            stale = [key for key in conn.execute(query).scalars() if key not in keep]
+            for batch in _batches(stale):
+                for table in (self.transitions, self.links, self.comments):
+                    conn.execute(delete(table).where(table.c.issue_key.in_(batch)))
+                conn.execute(delete(self.issues).where(self.issues.c.key.in_(batch)))
+            if stale:
+                conn.execute(
+                    self.sync_state.update()
+                    .where(self.sync_state.c.scope == scope)
+                    .values(version=self.sync_state.c.version + 1)
+                )
+        return len(stale)
+
+    def last_sync(self, scope: str) -> Optional[datetime]:
+        """When ``scope`` was last synced, or None if never."""
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(self.sync_state.c.last_sync).where(self.sync_state.c.scope == scope)
+            ).scalar()
+
+    def version(self, scope: str) -> int:
+        """Monotonic snapshot version for ``scope`` (bumped when issues change)."""
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(self.sync_state.c.version).where(self.sync_state.c.scope == scope)
+            ).scalar() or 0
+
+    def query_issues(
+        self,
+        issue_type: str,
+        project_key: Optional[str] = None,
+        sprint: Optional[str] = None,
+        due_before: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Read issues in the same shape ``JiraClient`` returns from live searches."""
+        query = select(self.issues).where(self.issues.c.issue_type == issue_type)
+        if project_key:
+            query = query.where(self.issues.c.project == project_key)
+        if due_before:
+            query = query.where(or_(self.issues.c.due_date.is_(None), self.issues.c.due_date <= due_before))
+
+        with self.engine.connect() as conn:
+            rows = [dict(row._mapping) for row in conn.execute(query.order_by(self.issues.c.key))]
+            if sprint:
+                rows = [
+                    row for row in rows
+                    if any(str(sprint) in (str(s.get("id")), s.get("name")) for s in row["sprints"] or [])
+                ]
+
+            keys = [row["key"] for row in rows]
+            transitions = self._children(conn, self.transitions, keys)
+            links = self._children(conn, self.links, keys)
+            comments = self._children(conn, self.comments, keys)
+
+        issues = []
+        for row in rows:
+            key = row["key"]
+            labels = row["labels"] or []
+            issues.append({
+                "key": key,
+                "summary": row["summary"],
+                "status": row["status"],
+                "assignee": row["assignee"],
+                "assignee_email": row["assignee_email"],
+                "due_date": row["due_date"],
+                "created": row["created"],
+                "updated": row["updated"],
+                "description": row["description"],
+                "priority": row["priority"],
+                "labels": labels,
+                "blockers": [label for label in labels if "blocker" in label.lower()],
+                "transitions": [
+                    {"from": t["from_status"], "to": t["to_status"], "date": t["date"]}
+                    for t in transitions.get(key, [])
+                ],
+                "comments": [
+                    {"author": c["author"], "body": c["body"], "created": c["created"]}
+                    for c in comments.get(key, [])
+                ],
+                "subtasks": row["subtasks"] or [],
+                "sprints": row["sprints"] or [],
+                "links": [
+                    {
+                        "from": key,
+                        "type": link["link_type"],
+                        "key": link["linked_key"],
+                        "status": link["linked_status"],
+                        "direction": link["direction"],
+                    }
+                    for link in links.get(key, [])
+                ],
+                "reopened_count": row["reopened_count"] or 0,
+                "remaining_estimate": row["remaining_estimate"],
+            })
+        return issues
+
+    def _children(self, conn, table: Table, keys: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Child rows grouped by issue key."""
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for batch in _batches(keys):
+            for row in conn.execute(select(table).where(table.c.issue_key.in_(batch))):
+                grouped.setdefault(row.issue_key, []).append(dict(row._mapping))
+        return grouped
+
+
+class JiraSnapshotSyncer(threading.Thread):
+    """Background thread that delta-syncs the snapshot on an interval."""
+
+    def __init__(self, client, project_key: Optional[str] = None, interval_seconds: int = 300):
+        super().__init__(name="jira-snapshot-sync", daemon=True)
+        self.client = client
+        self.project_key = project_key
+        self.interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while True:
+            try:
+                self.client.sync_snapshot(self.project_key)
+            except Exception as e:
+                logger.error("JIRA snapshot sync failed", project_key=self.project_key, error=str(e))
+            if self._stop_event.wait(self.interval_seconds):
+                return
+
+    def stop(self):
+        """Stop after the current sync."""
+        self._stop_event.set()
@@ -39,6 +39,7 @@ class Embedding(BaseModel):
     document_id = Column(String, nullable=False, index=True)
     embedding = Column(Vector(1536))  # 1536 is the dimension of the embedding
     chunk_text = Column(Text, nullable=False)
+    content_hash = Column(String(64), index=True)  # sha256 of (embedding model, chunk text)
     chunk_index = Column(String, default="0")
     meta_data = Column(JSON, default=dict)  # Renamed from 'metadata' (reserved in SQLAlchemy)
 
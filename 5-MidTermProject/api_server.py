@@ -1,31 +1,38 @@
 import uvicorn
 import time
 import uuid 
+import json
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.responses import Response
-from pydantic import BaseModel
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
-#setup logging
-logging.basicConfig(level=logging.INFO, 
-format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-handlers=[logging.FileHandler("rag_pipeline.log", mode="at"),
-logging.StreamHandler()
-])
-
-from cache_store import get as get_cache, set as set_cache
-from retrieval import retrieve_context
-from router import build_prompt
-from llm_client import call as llm_call
-from postprocess import secured_output
-from guardrails import apply_guardrails
-from observability import log, record_metric, start_metrics_server
+#setup logging (the file/console handlers run on a background thread, see audit_log.py)
+from audit_log import setup_logging
+setup_logging("rag_pipeline.log")
+
+from pipeline import arun_pipeline, astream_pipeline, arun_pipeline_batch
+from observability import start_metrics_server, metrics_registry, prepare_multiprocess_dir, mark_process_dead, cleanup_dead_workers
+import cache_store
+import vector_store
+import config
 from fastapi.middleware.cors import CORSMiddleware
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    cleanup_dead_workers() # live gauges of workers that crashed earlier
+    yield
+    # close the async Redis connections on shutdown
+    await cache_store.aclose()
+    await vector_store.aclose()
+    mark_process_dead()
+
 app = FastAPI(
     title="RAG Pipeline API",
     version="1.0.0",
     description="API for the RAG pipeline",
+    lifespan=lifespan,
 )
 
 # Enable CORS for front end
@@ -45,65 +52,70 @@ class AskResponse(BaseModel):
     answer : str
     request_id: str | None = None
 
-# core pipeline function
-def run_pipeline(question:str, user_id:str | None = None):
-    logging.info(f"Running the RAG pipeline for question: {question}")
-
-    # step 1: check the cache
-    cached_response = get_cache(question)
-    if cached_response: # if not None
-        logging.info(f"Cache HIT for question: {question}")
-        print(f"Cache HIT for question: {question}")
-        return cached_response
-    print(f"Cache MISS for question: {question}")
-    logging.info(f"Cache MISS for question: {question}")
-    # step 2: retrieve the context
-    start_retrieval_time = time.time()
-    context = retrieve_context(question)
-    end_retrieval_time = time.time()
-    retrieval_time = end_retrieval_time - start_retrieval_time
-    retieval_latency = int(retrieval_time * 1000) # convert to milliseconds
-    logging.info(f"Retrieval time: {retieval_latency} milliseconds")
-    record_metric("genai_retrieval_latency_ms", retieval_latency)
-    # step 3: build the prompt
-    model_name, prompt = build_prompt(question, context)
-    logging.info(f"Built prompt for model: {model_name}")
-    logging.info(f"Prompt: {prompt}")
-
-    # step 4: call the LLM
-    start_llm_time = time.time()
-    response = llm_call(model_name, prompt)
-    end_llm_time = time.time()
-    llm_time = end_llm_time - start_llm_time
-    llm_latency = int(llm_time * 1000) # convert to milliseconds
-    logging.info(f"LLM time: {llm_latency} milliseconds")
-    record_metric("genai_llm_latency_ms", llm_latency)
-    logging.info(f"Response: {response}")
-    response = secured_output(response)
-    logging.info(f"Secured response: {response}")
-    response = apply_guardrails(response)
-    logging.info(f"Guardrails applied response: {response}")
-    # step 5: cache the response
-    set_cache(question, response)
-    logging.info(f"Cached response for question: {question}")
-    log(question, prompt, response, user_id) # question + prompt + response
-    return response
-    
+class BatchAskRequest(BaseModel):
+    questions: list[str] = Field(min_length=1, max_length=config.BATCH_MAX_QUESTIONS)
+    user_id: str | None = None
+
+class BatchAnswer(BaseModel):
+    question: str
+    answer: str | None = None
+    cache: str # hit, stale, semantic or miss
+    ready_ms: int # from the start of the batch until this answer was ready
+    deduplicated: bool = False # same question as an earlier item in the batch
+    error: str | None = None
+
+class BatchAskResponse(BaseModel):
+    results: list[BatchAnswer] # same order as the questions
+    request_id: str | None = None
+    latency_ms: int
+
 # FAST API ROUTES
 
+# async all the way down (redis.asyncio, async vector search, ainvoke) - a sync route would
+# run in FastAPI's threadpool and cap each worker at ~40 requests in flight
 @app.post("/ask", response_model=AskResponse)
-def ask(request: AskRequest):
+async def ask(request: AskRequest):
     request_id = str(uuid.uuid4())
-    response = run_pipeline(request.question, request.user_id)
-    print(f"Response: {response}")
-    print(type(response))
-    print(f"Request ID: {request_id}")
-    print(type(request_id))
+    response = await arun_pipeline(request.question, request.user_id)
+    logging.info(f"Request ID: {request_id}")
     return AskResponse(answer=response, request_id=request_id)
 
+# many questions in one request - deduped, bulk cache lookup and embedding, concurrent generation
+@app.post("/ask/batch", response_model=BatchAskResponse)
+async def ask_batch(request: BatchAskRequest):
+    request_id = str(uuid.uuid4())
+    start = time.time()
+    results = await arun_pipeline_batch(request.questions, request.user_id)
+    return BatchAskResponse(results=results, request_id=request_id, latency_ms=int((time.time() - start) * 1000))
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Server-Sent Events: "start", then "token" events as the answer is generated (guardrails already
+# applied), then "done" with the final answer - show that one, it replaces the streamed text.
+@app.post("/ask/stream")
+async def ask_stream(request: AskRequest):
+    request_id = str(uuid.uuid4())
+
+    async def events():
+        yield _sse("start", {"request_id": request_id})
+        try:
+            async for event, data in astream_pipeline(request.question, request.user_id):
+                yield _sse(event, data)
+        except Exception as e:
+            logging.error(f"Streaming request {request_id} failed: {e}")
+            yield _sse("error", {"message": "The answer could not be generated"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}, # no proxy buffering
+    )
+
 @app.get("/metrics") # Promethrus metrics endpoint - integrated into FASTAPI server
 def metrics():
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    # all workers' metrics in multiprocess mode, not just the worker that got the scrape
+    return Response(content=generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
 
 @app.get("/")
 def welcome_message():
@@ -115,5 +127,10 @@ def health_check():
     return { "status": "ok", "message": "RAG pipeline API is running!"}
 
 if __name__ == "__main__":
+    if config.API_WORKERS > 1:
+        prepare_multiprocess_dir() # the workers import this module again and inherit the env var
     start_metrics_server()
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    if config.API_WORKERS > 1:
+        uvicorn.run("api_server:app", host="0.0.0.0", port=8001, workers=config.API_WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
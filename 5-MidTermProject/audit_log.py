@@ -0,0 +1,165 @@
+# audit_log.py
+# Structured (JSON lines) audit log of answered questions, off the request path.
+# - record() only samples and puts the event on a bounded queue; if the queue is full the event
+#   is dropped and counted, so a request never waits for the disk
+# - a background thread truncates/hashes the payloads, serializes and writes them in batches
+#   (AUDIT_BATCH_SIZE records or every AUDIT_FLUSH_SECONDS), rotating the file by size and age
+# - sampling: head sampling keeps AUDIT_HEAD_SAMPLE_RATE of ordinary requests at random; tail
+#   sampling always keeps the ones worth looking at afterwards (errors, guardrail hits, slow)
+# setup_logging() does the same for the stdlib logging: a QueueHandler on the request side and
+# a listener thread that owns the file and console handlers.
+import os
+import glob
+import json
+import time
+import queue
+import atexit
+import random
+import hashlib
+import logging
+import threading
+import logging.handlers
+import config
+import observability
+
+_STOP = object()
+
+
+def _payload(text):
+    # long text -> a truncated copy plus the hash and length of the full text
+    if text is None:
+        return None
+    text = str(text)
+    payload = {"text": text, "chars": len(text), "sha256": hashlib.sha256(text.encode()).hexdigest()}
+    if len(text) > config.AUDIT_MAX_FIELD_CHARS:
+        payload["text"] = text[:config.AUDIT_MAX_FIELD_CHARS]
+        payload["truncated"] = True
+    return payload
+
+def sample(event: dict) -> str | None:
+    # "tail" / "head" if the event should be kept, None if it is sampled out
+    if event.get("error") or event.get("guardrail_triggered") or (event.get("latency_ms") or 0) >= config.AUDIT_TAIL_SLOW_MS:
+        return "tail"
+    if random.random() < config.AUDIT_HEAD_SAMPLE_RATE:
+        return "head"
+    return None
+
+
+class AuditLogger:
+    def __init__(self, path: str):
+        self.path = path
+        self._queue = queue.Queue(maxsize=config.AUDIT_QUEUE_SIZE)
+        self._file = None
+        self._opened_at = 0.0
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, event: dict):
+        sampled = sample(event)
+        if sampled is None:
+            observability.record_audit("sampled_out")
+            return
+        event = {"ts": time.time(), "sampled": sampled, **event}
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            observability.record_audit("dropped")
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=10)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + config.AUDIT_FLUSH_SECONDS
+            while len(batch) < config.AUDIT_BATCH_SIZE and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            events = [event for event in batch if event is not _STOP]
+            try:
+                self._write(events)
+            except Exception as e:
+                logging.error(f"Audit log write failed, {len(events)} records lost: {e}")
+                observability.record_audit("dropped", len(events))
+            if stop:
+                if self._file:
+                    self._file.close()
+                return
+
+    def _write(self, events: list[dict]):
+        if not events:
+            return
+        for event in events:
+            for field in ("question", "prompt", "response"):
+                if field in event:
+                    event[field] = _payload(event[field])
+        data = "".join(json.dumps(event, default=str) + "\n" for event in events)
+        self._rotate_if_needed()
+        self._file.write(data)
+        self._file.flush()
+        observability.record_audit("written", len(events))
+
+    def _rotate_if_needed(self):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._opened_at = time.time()
+            return
+        if self._file.tell() < config.AUDIT_MAX_BYTES and time.time() - self._opened_at < config.AUDIT_ROTATE_SECONDS:
+            return
+        self._file.close()
+        rotated = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}"
+        n = 0
+        while os.path.exists(rotated + (f".{n:03d}" if n else "")): # several rotations in one second
+            n += 1
+        os.replace(self.path, rotated + (f".{n:03d}" if n else ""))
+        for old in sorted(glob.glob(f"{glob.escape(self.path)}.*"))[:-config.AUDIT_BACKUP_COUNT or None]:
+            os.remove(old)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._opened_at = time.time()
+
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def log_path(path: str = config.AUDIT_LOG_PATH) -> str:
+    # with several API workers each one writes (and rotates) its own file: audit.<pid>.jsonl
+    if config.API_WORKERS <= 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}{ext}"
+
+def get_logger() -> AuditLogger:
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                _logger = AuditLogger(log_path())
+                atexit.register(_logger.close) # write what is still queued
+    return _logger
+
+def record(event: dict):
+    get_logger().record(event)
+
+def setup_logging(filename: str, level=logging.INFO):
+    # like logging.basicConfig(handlers=[FileHandler, StreamHandler]) but the handlers run on a
+    # listener thread - logging calls only enqueue the record
+    root = logging.getLogger()
+    if any(isinstance(handler, logging.handlers.QueueHandler) for handler in root.handlers):
+        return None # already set up
+    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    handlers = [logging.FileHandler(filename, mode="at"), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    records = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    return listener
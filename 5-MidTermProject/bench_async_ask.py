@@ -0,0 +1,105 @@
+# bench_async_ask.py
+# Load test of POST /ask with stubbed backends (no Redis or OpenAI needed).
+# Redis, the vector search and the LLM are replaced by sleeps of a realistic length, once as
+# blocking calls (the old sync route in FastAPI's threadpool) and once as awaitables
+# (the async route), and N different questions are sent at the same time.
+#
+#   python bench_async_ask.py --requests 500 --llm-latency 0.5
+import os
+os.environ.setdefault("OPENAI_API_KEY", "bench-not-used") # llm_client refuses to import without it
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import statistics
+import time
+
+import httpx
+
+import api_server
+import cache_store
+import pipeline
+
+logging.getLogger().setLevel(logging.WARNING) # keep the per-request INFO lines out of the way
+
+
+def _stub_backends(redis_latency, retrieval_latency, llm_latency):
+    # no Redis: single-flight leases are always granted
+    cache_store.redis_client = None
+    cache_store.aredis_client = None
+
+    # sync (blocking) backends
+    def lookup_cache(question):
+        time.sleep(redis_latency)
+        return None, False
+    def set_cache(question, answer):
+        time.sleep(redis_latency)
+    def retrieve_chunks(question, with_scores=False):
+        time.sleep(retrieval_latency)
+        return ["Agentic AI systems plan and use tools."], [0.8]
+    def llm_call(model_name, prompt):
+        time.sleep(llm_latency)
+        return "An answer."
+
+    # async backends
+    async def alookup_cache(question):
+        await asyncio.sleep(redis_latency)
+        return None, False
+    async def aset_cache(question, answer):
+        await asyncio.sleep(redis_latency)
+    async def aretrieve_chunks(question, with_scores=False):
+        await asyncio.sleep(retrieval_latency)
+        return ["Agentic AI systems plan and use tools."], [0.8]
+    async def allm_call(model_name, prompt):
+        await asyncio.sleep(llm_latency)
+        return "An answer."
+
+    pipeline.lookup_cache, pipeline.set_cache = lookup_cache, set_cache
+    pipeline.retrieve_chunks, pipeline.llm_call = retrieve_chunks, llm_call
+    pipeline.alookup_cache, pipeline.aset_cache = alookup_cache, aset_cache
+    pipeline.aretrieve_chunks, pipeline.allm_call = aretrieve_chunks, allm_call
+
+
+# the old blocking route, for comparison
+@api_server.app.post("/ask_sync", response_model=api_server.AskResponse)
+def ask_sync(request: api_server.AskRequest):
+    return api_server.AskResponse(answer=pipeline.run_pipeline(request.question, request.user_id))
+
+
+async def _load(path, n):
+    transport = httpx.ASGITransport(app=api_server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i):
+            start = time.perf_counter()
+            response = await client.post(path, json={"question": f"bench question {path} {i}"})
+            response.raise_for_status()
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one(i) for i in range(n)))
+        return time.perf_counter() - start, sorted(latencies)
+
+
+def _report(name, wall, latencies):
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<6} {len(latencies) / wall:8.1f} req/s   wall {wall:6.2f}s   "
+          f"p50 {statistics.median(latencies) * 1000:7.0f} ms   p95 {p95 * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync vs async /ask under concurrent load")
+    parser.add_argument("--requests", type=int, default=400, help="concurrent requests per run")
+    parser.add_argument("--redis-latency", type=float, default=0.002)
+    parser.add_argument("--retrieval-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    _stub_backends(args.redis_latency, args.retrieval_latency, args.llm_latency)
+    print(f"{args.requests} concurrent questions, LLM {args.llm_latency * 1000:.0f} ms, "
+          f"retrieval {args.retrieval_latency * 1000:.0f} ms, Redis {args.redis_latency * 1000:.0f} ms")
+    with contextlib.redirect_stdout(io.StringIO()): # run_pipeline prints every cache miss
+        sync_results = asyncio.run(_load("/ask_sync", args.requests))
+    _report("sync", *sync_results)
+    _report("async", *asyncio.run(_load("/ask", args.requests)))
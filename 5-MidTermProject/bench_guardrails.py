@@ -0,0 +1,83 @@
+# bench_guardrails.py
+# Micro-benchmark of the guardrails on large texts (retrieved contexts, long inputs), old vs new:
+#   old: secured_output's SSN search + apply_guardrails' per-word lower() and three re.sub passes
+#   new: the compiled engine - one scan for every rule (postprocess.secure)
+# The text is generated prose with a sprinkling of PII and banned words.
+#
+#   python bench_guardrails.py --sizes 10000 100000 1000000
+import os
+os.environ.setdefault("OPENAI_API_KEY", "bench-not-used")
+
+import argparse
+import logging
+import random
+import re
+import time
+
+from postprocess import secure
+
+logging.getLogger().setLevel(logging.ERROR) # the engine warns on every text that fires a rule
+
+WORDS = ("agent", "tool", "planner", "memory", "retrieval", "context", "model", "the", "a", "of",
+         "with", "skill", "diet", "attacker", "workflow", "graph", "state", "answer", "query")
+SPICE = ("555-123-4567", "jane.doe@example.com", "4111 1111 1111 1111", "kill", "attack", "123-45-6789")
+
+
+# the guardrails before the compiled engine, for comparison
+_OLD_SSN = re.compile(r'\b\d{3}-\d{2}-\d{4}\b')
+_OLD_BANNED = {"kill", "die", "attack"}
+_OLD_PATTERNS = [
+    (r'\b\d{3}-\d{3}-\d{4}\b', "[REDACTED]"),
+    (r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', "[REDACTED]"),
+    (r'\b\d{3}-\d{3}-\d{4}\b', "[REDACTED]"),
+]
+
+def old_guardrails(text):
+    if _OLD_SSN.search(text):
+        return "[REDACTED]"
+    text = text.strip()
+    for word in _OLD_BANNED:
+        if word.lower() in text.lower():
+            text = text.replace(word, "[BANNED_CONTENT]")
+    for pattern, replacement in _OLD_PATTERNS:
+        text = re.sub(pattern, replacement, text)
+    return text
+
+
+def make_text(size, spice_every, with_ssn, seed=0):
+    rng = random.Random(seed)
+    words, length = [], 0
+    while length < size:
+        word = rng.choice(SPICE[:-1]) if rng.random() < 1 / spice_every else rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    if with_ssn: # near the end, so the old SSN search has to read the whole text too
+        words.insert(len(words) - 3, SPICE[-1])
+    return " ".join(words)[:size]
+
+
+def _time(fn, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Old vs compiled guardrails on large texts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="text sizes in characters")
+    parser.add_argument("--spice-every", type=int, default=200, help="about one PII/banned word per this many words")
+    parser.add_argument("--ssn", action="store_true", help="put an SSN in the text (blocks the whole answer)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement, best is reported")
+    args = parser.parse_args()
+
+    print(f"{'size':>9}  {'old ms':>8} {'old MB/s':>9}  {'new ms':>8} {'new MB/s':>9}  speedup  rules fired")
+    for size in args.sizes:
+        text = make_text(size, args.spice_every, args.ssn)
+        old = _time(old_guardrails, text, args.repeat)
+        new = _time(secure, text, args.repeat)
+        rules = secure(text)[1]
+        mb = len(text) / 1e6
+        print(f"{len(text):>9}  {old * 1000:8.2f} {mb / old:9.1f}  {new * 1000:8.2f} {mb / new:9.1f}  {old / new:6.2f}x  {', '.join(rules)}")
@@ -0,0 +1,118 @@
+# bm25.py
+# In-process BM25 keyword index over the same chunks as the vector store.
+# Dense search misses exact terms (acronyms like "HITL", issue keys like "PROJ-123"); BM25 finds them.
+# - built lazily from the chunks already in the vector store backend
+# - updated incrementally: add_documents() adds new chunks right away, and other processes'
+#   additions are picked up from the backend every BM25_REFRESH_SECONDS
+import re
+import math
+import time
+import heapq
+import hashlib
+import logging
+import threading
+from collections import Counter
+import config
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from", "how", "in", "is",
+    "it", "its", "of", "on", "or", "that", "the", "this", "to", "what", "when", "which", "who", "why", "with",
+}
+TOKEN_REGEX = re.compile(r"\w+(?:-\w+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    # lowercase words; hyphenated terms ("proj-123", "multi-agent") are kept whole AND split
+    tokens = []
+    for token in TOKEN_REGEX.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if "-" in token:
+            tokens.extend(part for part in token.split("-") if part not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.texts = [] # doc id -> chunk text
+        self.lengths = [] # doc id -> number of tokens
+        self.postings = {} # term -> {doc id: term frequency}
+        self.total_length = 0
+        self._hashes = set() # chunks already indexed (the same text can arrive from Redis and add())
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, text: str) -> bool:
+        digest = hashlib.sha1(text.encode()).hexdigest()
+        tokens = Counter(tokenize(text))
+        with self._lock:
+            if digest in self._hashes:
+                return False
+            self._hashes.add(digest)
+            doc_id = len(self.texts)
+            self.texts.append(text)
+            length = sum(tokens.values())
+            self.lengths.append(length)
+            self.total_length += length
+            for term, tf in tokens.items():
+                self.postings.setdefault(term, {})[doc_id] = tf
+        return True
+
+    def search(self, query: str, k: int = 3) -> list[tuple[str, float]]:
+        # [(text, score)], best first; only chunks sharing at least one term with the query
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self.texts)
+            if not n or not terms:
+                return []
+            average_length = self.total_length / n
+            scores = {}
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(self.texts[doc_id], score) for doc_id, score in best]
+
+
+_index = BM25Index()
+_refreshed_at = None
+_refresh_lock = threading.Lock()
+
+
+def add_documents(texts: list[str]):
+    # called by vector_store.add_documents so new chunks are searchable immediately
+    added = sum(_index.add(text) for text in texts)
+    logging.info(f"BM25 index: added {added} chunks ({len(_index)} total)")
+
+
+def refresh(force: bool = False):
+    # index chunks that are in the vector store but not here yet (first call loads the whole corpus)
+    global _refreshed_at
+    if not force and _refreshed_at is not None and time.monotonic() - _refreshed_at < config.BM25_REFRESH_SECONDS:
+        return
+    with _refresh_lock:
+        if not force and _refreshed_at is not None and time.monotonic() - _refreshed_at < config.BM25_REFRESH_SECONDS:
+            return
+        from vector_store import get_backend
+        try:
+            added = sum(_index.add(text) for text in get_backend().new_texts())
+            if added:
+                logging.info(f"BM25 index: loaded {added} chunks from the vector store ({len(_index)} total)")
+        except Exception as e:
+            logging.warning(f"BM25 refresh failed: {e}")
+        _refreshed_at = time.monotonic()
+
+
+def search(query: str, k: int = 3) -> list[tuple[str, float]]:
+    refresh()
+    return _index.search(query, k)
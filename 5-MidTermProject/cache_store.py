@@ -1,9 +1,27 @@
 # cache_store.py
+# Two cache tiers for answers:
+# 1. exact  - key on the normalized question ("What is Agentic AI?" == "what is agentic ai")
+# 2. semantic - nearest cached question by embedding (paraphrases), via a RediSearch vector index
+# Exact entries outlive their TTL by CACHE_STALE_SECONDS; a separate freshness key says whether
+# they are still fresh, so a just-expired answer can be served while one request refreshes it.
+# lookup/get/set have async twins (alookup/aget/aset) on redis.asyncio for the async API path.
+# A semantic hit is copied to the exact tier, so repeats of that wording skip the KNN search.
 import config
-import redis 
+import redis
+import redis.asyncio as aioredis
 import logging
+import re
+from redis.commands.search.field import TextField, VectorField
+try:
+    from redis.commands.search.index_definition import IndexDefinition, IndexType
+except ImportError: # redis-py < 6
+    from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+from redis.commands.search.query import Query
+from observability import record_cache_lookup
+
 REDIS_URL = config.REDIS_URL
 CACHE_TTL_SECONDS = config.CACHE_TTL_SECONDS
+SEMANTIC_PREFIX = "rag:semcache:"
 
 # Initialize Redis client
 try:
@@ -14,15 +32,224 @@ except Exception as e:
     logging.error(f"Error: {e}")
     redis_client = None
 
+# async client for the async API path (connects lazily on first command)
+aredis_client = aioredis.Redis.from_url(REDIS_URL) if redis_client is not None else None
+
+_index_ready = False
+
 
 # key (query), value (response from llm) , ttl (time to live)
 
+def normalize(question: str) -> str:
+    # lowercase, collapse whitespace, drop trailing punctuation
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip("?!. ")
+
 def _key(k: str) -> str:
-    return f"rag:cache:{k}"
+    return f"rag:cache:{normalize(k)}"
+
+def _fresh_key(k: str) -> str:
+    return f"rag:cache:fresh:{normalize(k)}"
+
+def _semantic_key(k: str) -> str:
+    return f"{SEMANTIC_PREFIX}{normalize(k)}"
+
+# query embeddings are cached (LRU + Redis) in vector_store, so lookup and set after a miss
+# embed the question only once
+def _embed(normalized_question: str) -> bytes:
+    from vector_store import embed_query_bytes
+    return embed_query_bytes(normalized_question)
+
+async def _aembed(normalized_question: str) -> bytes:
+    from vector_store import aembed_query_bytes
+    return await aembed_query_bytes(normalized_question)
+
+def _index_fields(dim: int):
+    return dict(
+        fields=[
+            TextField("question"),
+            VectorField("embedding", "HNSW", {"TYPE": "FLOAT32", "DIM": dim, "DISTANCE_METRIC": "COSINE"}),
+        ],
+        definition=IndexDefinition(prefix=[SEMANTIC_PREFIX], index_type=IndexType.HASH),
+    )
+
+def _ensure_index(dim: int):
+    # create the vector index over rag:semcache:* hashes once
+    global _index_ready
+    if _index_ready:
+        return
+    try:
+        redis_client.ft(config.SEMANTIC_CACHE_INDEX).info()
+    except redis.ResponseError:
+        redis_client.ft(config.SEMANTIC_CACHE_INDEX).create_index(**_index_fields(dim))
+        logging.info(f"Created semantic cache index {config.SEMANTIC_CACHE_INDEX}")
+    _index_ready = True
+
+async def _aensure_index(dim: int):
+    global _index_ready
+    if _index_ready:
+        return
+    try:
+        await aredis_client.ft(config.SEMANTIC_CACHE_INDEX).info()
+    except redis.ResponseError:
+        await aredis_client.ft(config.SEMANTIC_CACHE_INDEX).create_index(**_index_fields(dim))
+        logging.info(f"Created semantic cache index {config.SEMANTIC_CACHE_INDEX}")
+    _index_ready = True
+
+def _nearest_query() -> Query:
+    return (
+        Query("*=>[KNN 1 @embedding $vec AS distance]")
+        .sort_by("distance")
+        .return_fields("question", "answer", "distance")
+        .dialect(2)
+    )
+
+def _semantic_get(k: str):
+    embedding = _embed(normalize(k))
+    _ensure_index(len(embedding) // 4)
+    results = redis_client.ft(config.SEMANTIC_CACHE_INDEX).search(_nearest_query(), query_params={"vec": embedding})
+    answer = _semantic_answer(k, results)
+    if answer is not None:
+        _set_exact(redis_client.pipeline(), k, answer, CACHE_TTL_SECONDS).execute()
+    return answer
+
+async def _asemantic_get(k: str, embedding: bytes = None):
+    if embedding is None:
+        embedding = await _aembed(normalize(k))
+    await _aensure_index(len(embedding) // 4)
+    results = await aredis_client.ft(config.SEMANTIC_CACHE_INDEX).search(_nearest_query(), query_params={"vec": embedding})
+    answer = _semantic_answer(k, results)
+    if answer is not None:
+        async with aredis_client.pipeline() as pipe:
+            await _set_exact(pipe, k, answer, CACHE_TTL_SECONDS).execute()
+    return answer
+
+def _semantic_answer(k: str, results):
+    if not results.docs:
+        record_cache_lookup("semantic", "miss")
+        return None
+    nearest = results.docs[0]
+    similarity = 1.0 - float(nearest.distance) # cosine distance -> similarity
+    if similarity < config.SEMANTIC_CACHE_THRESHOLD:
+        record_cache_lookup("semantic", "miss", similarity)
+        return None
+    record_cache_lookup("semantic", "hit", similarity)
+    logging.info(f"Semantic cache HIT: '{k}' ~ '{nearest.question}' (similarity {similarity:.3f})")
+    return nearest.answer
+
+def lookup(k:str):
+    # returns (answer, is_fresh); (None, False) on a full miss
+    _value, _fresh = redis_client.mget(_key(k), _fresh_key(k))
+    if _value and _fresh:
+        record_cache_lookup("exact", "hit")
+        return _value.decode(), True
+    record_cache_lookup("exact", "stale" if _value else "miss")
+    if config.SEMANTIC_CACHE_ENABLED:
+        try:
+            answer = _semantic_get(k)
+            if answer is not None:
+                return answer, True
+        except Exception as e:
+            # the semantic tier is best effort - a failure is just a miss
+            logging.warning(f"Semantic cache lookup failed: {e}")
+            record_cache_lookup("semantic", "error")
+    if _value:
+        return _value.decode(), False # stale - the caller decides whether to serve it
+    return None, False
+
+async def alookup(k:str):
+    # async version of lookup() for the API
+    _value, _fresh = await aredis_client.mget(_key(k), _fresh_key(k))
+    if _value and _fresh:
+        record_cache_lookup("exact", "hit")
+        return _value.decode(), True
+    record_cache_lookup("exact", "stale" if _value else "miss")
+    if config.SEMANTIC_CACHE_ENABLED:
+        try:
+            answer = await _asemantic_get(k)
+            if answer is not None:
+                return answer, True
+        except Exception as e:
+            logging.warning(f"Semantic cache lookup failed: {e}")
+            record_cache_lookup("semantic", "error")
+    if _value:
+        return _value.decode(), False
+    return None, False
+
+async def alookup_many(keys: list[str]):
+    # exact tier for a batch: ONE MGET for all the value + freshness keys
+    # returns [(answer, is_fresh)] in order; semantic lookups are up to the caller (asemantic_get)
+    values = await aredis_client.mget([key for k in keys for key in (_key(k), _fresh_key(k))])
+    results = []
+    for _value, _fresh in zip(values[::2], values[1::2]):
+        record_cache_lookup("exact", "hit" if _value and _fresh else "stale" if _value else "miss")
+        results.append((_value.decode() if _value else None, bool(_value and _fresh)))
+    return results
+
+async def asemantic_get(k: str, embedding: bytes = None):
+    # semantic tier on its own (None on a miss or error), with an optional precomputed embedding
+    if not config.SEMANTIC_CACHE_ENABLED:
+        return None
+    try:
+        return await _asemantic_get(k, embedding)
+    except Exception as e:
+        logging.warning(f"Semantic cache lookup failed: {e}")
+        record_cache_lookup("semantic", "error")
+        return None
 
 def get(k:str):
-    _value = redis_client.get(_key(k))
-    return _value.decode() if _value else None
+    # fresh answers only
+    answer, fresh = lookup(k)
+    return answer if fresh else None
+
+async def aget(k:str):
+    answer, fresh = await alookup(k)
+    return answer if fresh else None
+
+def get_exact(k:str):
+    # fresh exact-tier answer only - no semantic search and no hit/miss metrics, for polling
+    # while another worker computes the answer (its set() writes the exact key)
+    _value, _fresh = redis_client.mget(_key(k), _fresh_key(k))
+    return _value.decode() if _value and _fresh else None
+
+async def aget_exact(k:str):
+    _value, _fresh = await aredis_client.mget(_key(k), _fresh_key(k))
+    return _value.decode() if _value and _fresh else None
+
+def _set_exact(pipe, k:str, v:str, ttl:int):
+    pipe.setex(_key(k), ttl + config.CACHE_STALE_SECONDS, v)
+    pipe.setex(_fresh_key(k), ttl, 1)
+    return pipe
 
 def set(k:str, v:str, ttl:int = CACHE_TTL_SECONDS):
-    redis_client.setex(_key(k), ttl, v)
\ No newline at end of file
+    _set_exact(redis_client.pipeline(), k, v, ttl).execute()
+    if not config.SEMANTIC_CACHE_ENABLED:
+        return
+    try:
+        embedding = _embed(normalize(k))
+        _ensure_index(len(embedding) // 4)
+        pipe = redis_client.pipeline()
+        pipe.hset(_semantic_key(k), mapping={"question": k, "answer": v, "embedding": embedding})
+        pipe.expire(_semantic_key(k), ttl)
+        pipe.execute()
+    except Exception as e:
+        logging.warning(f"Semantic cache store failed: {e}")
+
+async def aset(k:str, v:str, ttl:int = CACHE_TTL_SECONDS):
+    async with aredis_client.pipeline() as pipe:
+        await _set_exact(pipe, k, v, ttl).execute()
+    if not config.SEMANTIC_CACHE_ENABLED:
+        return
+    try:
+        embedding = await _aembed(normalize(k))
+        await _aensure_index(len(embedding) // 4)
+        async with aredis_client.pipeline() as pipe:
+            pipe.hset(_semantic_key(k), mapping={"question": k, "answer": v, "embedding": embedding})
+            pipe.expire(_semantic_key(k), ttl)
+            await pipe.execute()
+    except Exception as e:
+        logging.warning(f"Semantic cache store failed: {e}")
+
+async def aclose():
+    if aredis_client is not None:
+        await aredis_client.aclose()
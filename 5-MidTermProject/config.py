@@ -1,12 +1,103 @@
 # central configuration file
+import os
 
 REDIS_URL = "redis://localhost:6379"
 EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 1536 # must match EMBEDDING_MODEL
 INDEX_NAME = "documents"
 
+# Vector backend: "redis" (Redis Stack, shared by all nodes) or "embedded" (local files, see embedded_index.py)
+VECTOR_BACKEND = "redis"
+EMBEDDED_INDEX_DIR = "vector_index"
+EMBEDDED_FLAT_MAX_ROWS = 5000 # flat NumPy scan up to this many chunks (~2 ms at 1536 dims), HNSW (hnswlib) above
+EMBEDDED_HNSW_M = 16
+EMBEDDED_HNSW_EF_CONSTRUCTION = 200
+EMBEDDED_HNSW_EF = 64 # search breadth - higher is more accurate and slower
+
+# Vector store connection (one shared handle, see vector_store.get_vectorstore)
+VECTOR_STORE_HEALTH_CHECK_SECONDS = 30 # ping the connection at most this often
+VECTOR_STORE_CONNECT_RETRIES = 3
+VECTOR_STORE_BACKOFF_SECONDS = 0.5 # doubled after every failed attempt
+VECTOR_STORE_CONNECT_TIMEOUT_SECONDS = 5
+
+# Hybrid retrieval (vector + BM25, reciprocal rank fusion)
+HYBRID_ENABLED = True
+HYBRID_CANDIDATES = 10 # chunks fetched from each retriever before fusion
+HYBRID_VECTOR_WEIGHT = 1.0
+HYBRID_BM25_WEIGHT = 1.0
+RRF_K = 60 # rank damping constant from the RRF paper
+BM25_REFRESH_SECONDS = 60 # how often to look for chunks added by other processes
+
+# Post-retrieval: near-duplicate removal + maximal marginal relevance
+MMR_ENABLED = True
+MMR_CANDIDATES = 12 # dense candidates (with their vectors) fetched before selecting k
+MMR_LAMBDA = 0.7 # 1.0 = pure relevance, 0.0 = pure diversity
+DEDUP_SIMILARITY_THRESHOLD = 0.98 # cosine similarity above which two chunks count as duplicates
+
+# Query embedding cache (in-process LRU + Redis)
+EMBEDDING_CACHE_SIZE = 4096
+EMBEDDING_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
 DEFAULT_MODEL = "gpt-4.1-nano"
 TEMPERATURE = 0.2
 MAX_TOKENS = 512
 
+# Model routing: each question goes to the first (cheapest) tier whose max_complexity covers its
+# complexity score, see router.route. Costs are USD per 1M tokens, for the genai_llm_cost metric.
+ROUTING_ENABLED = True
+DEFAULT_TIER = "small" # used when routing is off
+MODEL_TIERS = {
+    "small": {"model": "gpt-4.1-nano", "max_tokens": 256, "timeout": 15, "max_complexity": 0.35,
+              "input_cost_per_1m": 0.10, "output_cost_per_1m": 0.40},
+    "medium": {"model": "gpt-4.1-mini", "max_tokens": 512, "timeout": 30, "max_complexity": 0.7,
+               "input_cost_per_1m": 0.40, "output_cost_per_1m": 1.60},
+    "large": {"model": "gpt-4.1", "max_tokens": 1024, "timeout": 60, "max_complexity": 1.0,
+              "input_cost_per_1m": 2.00, "output_cost_per_1m": 8.00},
+}
+ROUTER_LONG_QUESTION_WORDS = 40 # questions this long get the full length score
+ROUTER_LOW_SIMILARITY = 0.3 # best retrieved chunk below this = the corpus has no direct answer
+ROUTER_FLAT_SPREAD = 0.05 # top chunks this close together = the answer is spread over several chunks
+ROUTER_CLASSIFIER_PATH = None # optional JSON logistic regression over the router features (replaces the rules)
+
+# Prompt size: retrieved chunks are packed (best first) into what's left of this budget
+PROMPT_TOKEN_BUDGET = 1500
+CONTEXT_MIN_CHUNK_TOKENS = 32 # don't squeeze in a trimmed chunk smaller than this
+
 # Cache
-CACHE_TTL_SECONDS = 1800 # 30 minutes
\ No newline at end of file
+CACHE_TTL_SECONDS = 1800 # 30 minutes
+CACHE_STALE_SECONDS = 300 # keep serving an expired answer this long while one request refreshes it
+
+# Request coalescing (single-flight) on cache misses
+SINGLEFLIGHT_LEASE_MS = 30000 # cross-worker lock on a question while its answer is computed
+SINGLEFLIGHT_WAIT_SECONDS = 30 # how long other workers wait for the leader before computing themselves
+SINGLEFLIGHT_POLL_SECONDS = 0.1
+
+# Semantic cache (second tier, for paraphrased questions)
+SEMANTIC_CACHE_ENABLED = True
+SEMANTIC_CACHE_THRESHOLD = 0.92 # cosine similarity needed to reuse a cached answer
+SEMANTIC_CACHE_INDEX = "rag_semantic_cache"
+
+# API server workers. With more than one, metrics go through Prometheus multiprocess mode:
+# every worker writes its metrics to memory-mapped files in PROMETHEUS_MULTIPROC_DIR and
+# /metrics (and the :8002 server) aggregates them (see observability.metrics_registry)
+# PROMETHEUS_MULTIPROC_DIR is wiped at startup (observability.prepare_multiprocess_dir) - point
+# it at a dedicated directory. Each worker also gets its own audit log file (audit_log.log_path).
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "/tmp/rag_pipeline_metrics")
+
+# Audit log (audit_log.py): one JSON line per answered question, written by a background thread
+AUDIT_LOG_PATH = "audit.jsonl" # audit.<pid>.jsonl per worker when API_WORKERS > 1
+AUDIT_QUEUE_SIZE = 10000 # records waiting for the writer; when full, new records are dropped (never blocks)
+AUDIT_BATCH_SIZE = 200 # records per write
+AUDIT_FLUSH_SECONDS = 1.0 # flush a partial batch after this long
+AUDIT_MAX_BYTES = 50 * 1024 * 1024 # rotate at this size...
+AUDIT_ROTATE_SECONDS = 24 * 3600 # ...or this age
+AUDIT_BACKUP_COUNT = 7 # rotated files kept
+AUDIT_HEAD_SAMPLE_RATE = 0.1 # fraction of ordinary requests kept
+AUDIT_TAIL_SLOW_MS = 5000 # tail sampling: always keep slow, failed or guardrail-triggering requests
+AUDIT_MAX_FIELD_CHARS = 2000 # longer prompts/answers are truncated (the sha256 covers the full text)
+
+# Batch questions (/ask/batch, run_pipeline_batch)
+BATCH_MAX_QUESTIONS = 1000
+BATCH_LLM_CONCURRENCY = 16 # LLM calls in flight at once per batch
+BATCH_SEARCH_CONCURRENCY = 64 # vector searches in flight at once per batch
@@ -0,0 +1,83 @@
+# context_packer.py
+# Fit the retrieved chunks into a fixed prompt token budget.
+# Chunks arrive best first; they are packed greedily. A chunk that doesn't fit whole is cut at
+# the last sentence boundary that fits, and skipped if even its first sentence doesn't - a later,
+# shorter chunk may still fit. A bounded prompt bounds LLM latency and cost on long-tail queries.
+import re
+import logging
+import threading
+import tiktoken
+import config
+from observability import record_context_packing
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+CHUNK_SEPARATOR = "\n\n"
+_encodings = {} # model name -> tiktoken encoding, or None if it can't be loaded
+_encodings_lock = threading.Lock()
+
+
+def _encoding(model_name: str):
+    if model_name in _encodings:
+        return _encodings[model_name]
+    with _encodings_lock: # the first load may download the encoding file - do it once
+        if model_name not in _encodings:
+            _encodings[model_name] = _load_encoding(model_name)
+    return _encodings[model_name]
+
+def _load_encoding(model_name: str):
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError: # model tiktoken doesn't know - use the current OpenAI encoding
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logging.warning(f"No tokenizer for {model_name}, estimating token counts: {e}")
+    except Exception as e: # e.g. the encoding file can't be downloaded
+        logging.warning(f"No tokenizer for {model_name}, estimating token counts: {e}")
+    return None
+
+def count_tokens(text: str, model_name: str = config.DEFAULT_MODEL) -> int:
+    encoding = _encoding(model_name)
+    if encoding is None:
+        return (len(text) + 3) // 4 # ~4 characters per token for English text
+    return len(encoding.encode(text, disallowed_special=()))
+
+def _trim_to_sentences(chunk: str, budget: int, model_name: str) -> str | None:
+    # longest run of whole leading sentences within budget tokens, or None
+    sentences = SENTENCE_END.split(chunk)
+    kept, used = [], 0
+    for sentence in sentences:
+        tokens = count_tokens(sentence + " ", model_name)
+        if used + tokens > budget:
+            break
+        kept.append(sentence)
+        used += tokens
+    while kept and count_tokens(" ".join(kept), model_name) > budget: # per-sentence counts are approximate
+        kept.pop()
+    return " ".join(kept) or None
+
+def pack(chunks: list[str], budget: int, model_name: str = config.DEFAULT_MODEL) -> tuple[list[str], int]:
+    # returns (the chunks that fit, tokens they use incl. separators)
+    separator = count_tokens(CHUNK_SEPARATOR, model_name)
+    packed, used = [], 0
+    outcomes = {"packed": 0, "trimmed": 0, "dropped": 0}
+    for chunk in chunks:
+        cost = separator if packed else 0
+        remaining = budget - used - cost
+        tokens = count_tokens(chunk, model_name)
+        if tokens <= remaining:
+            packed.append(chunk)
+            used += cost + tokens
+            outcomes["packed"] += 1
+            continue
+        trimmed = _trim_to_sentences(chunk, remaining, model_name) if remaining >= config.CONTEXT_MIN_CHUNK_TOKENS else None
+        if trimmed:
+            packed.append(trimmed)
+            used += cost + count_tokens(trimmed, model_name)
+            outcomes["trimmed"] += 1
+        else:
+            outcomes["dropped"] += 1
+    record_context_packing(used, outcomes)
+    if outcomes["trimmed"] or outcomes["dropped"]:
+        logging.info(f"Context packing: {outcomes} ({used}/{budget} tokens)")
+    return packed, used
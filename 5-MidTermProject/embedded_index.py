@@ -0,0 +1,232 @@
+# embedded_index.py
+# Embedded vector backend (config.VECTOR_BACKEND = "embedded"): retrieval without a Redis server,
+# for single-node deployments and local benchmarking. Files in config.EMBEDDED_INDEX_DIR:
+#   vectors.f32    unit-length float32 vectors, one row per chunk, appended on add
+#   chunks.sqlite  sidecar metadata: row id -> chunk text, content hash
+#   hnsw.bin       HNSW graph, only for large corpora (needs `pip install hnswlib`); saved by
+#                  writers only, through a temp file and os.replace
+#   index.lock     flock'ed while a process appends, so several workers can share the directory
+# Startup memory-maps vectors.f32 instead of reading it, so it is fast whatever the corpus size.
+# Search is a flat NumPy scan (one matrix-vector product, BLAS/SIMD) up to EMBEDDED_FLAT_MAX_ROWS
+# chunks and the HNSW graph above that.
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+import config
+from vector_store import VectorBackend, embedding_model
+
+try:
+    import hnswlib
+except ImportError: # optional - without it large corpora fall back to the flat scan
+    hnswlib = None
+
+try:
+    import fcntl
+except ImportError: # not on Windows - only one process may write to the directory there
+    fcntl = None
+
+
+def _unit_rows(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+class EmbeddedBackend(VectorBackend):
+    def __init__(self, directory: str, dim: int):
+        os.makedirs(directory, exist_ok=True)
+        self.dim = dim
+        self._row_bytes = dim * 4
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._hnsw_path = os.path.join(directory, "hnsw.bin")
+        self._lock_path = os.path.join(directory, "index.lock")
+        self._lock = threading.Lock()
+        self._bm25_cursor = 0
+        self._warned_no_hnsw = False
+
+        self._db = sqlite3.connect(os.path.join(directory, "chunks.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS chunks (id INTEGER PRIMARY KEY, text TEXT NOT NULL, content_hash TEXT NOT NULL UNIQUE)")
+        self._db.commit()
+        if not os.path.exists(self._vectors_path):
+            open(self._vectors_path, "wb").close()
+
+        # vectors are written before their sidecar rows are committed; drop a half-finished add
+        # (under the file lock, so it is not another process's add in progress)
+        with self._write_lock():
+            rows = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            on_disk = os.path.getsize(self._vectors_path) // self._row_bytes
+            if on_disk > rows:
+                with open(self._vectors_path, "r+b") as f:
+                    f.truncate(rows * self._row_bytes)
+            elif on_disk < rows:
+                self._db.execute("DELETE FROM chunks WHERE id >= ?", (on_disk,))
+                self._db.commit()
+            self._count = min(rows, on_disk)
+            self._vectors = self._map(self._count)
+            self._hnsw = None
+            self._sync_hnsw(save=True)
+        logging.info(f"Embedded vector index: {self._count} chunks in {directory}")
+
+    @contextmanager
+    def _write_lock(self):
+        # this process's lock, then the cross-process one on index.lock
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _existing(self, digests: list[str]) -> set[str]:
+        existing = set()
+        for start in range(0, len(digests), 500):
+            batch = digests[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            existing.update(row[0] for row in self._db.execute(f"SELECT content_hash FROM chunks WHERE content_hash IN ({placeholders})", batch))
+        return existing
+
+    def _map(self, count: int) -> np.ndarray:
+        if count == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+
+    def _sync_hnsw(self, save: bool = False):
+        # keep the HNSW graph covering rows [0, count) once the corpus outgrows the flat scan
+        # save: also write hnsw.bin - only under _write_lock(), readers just extend their copy
+        if self._count <= config.EMBEDDED_FLAT_MAX_ROWS:
+            return
+        if hnswlib is None:
+            if not self._warned_no_hnsw:
+                logging.warning(f"{self._count} chunks but hnswlib is not installed - using the flat scan")
+                self._warned_no_hnsw = True
+            return
+        changed = False
+        if self._hnsw is None:
+            self._hnsw = self._load_hnsw()
+            if self._hnsw is None:
+                self._hnsw = hnswlib.Index(space="ip", dim=self.dim) # unit vectors: 1 - ip = cosine distance
+                self._hnsw.init_index(max_elements=self._count, ef_construction=config.EMBEDDED_HNSW_EF_CONSTRUCTION, M=config.EMBEDDED_HNSW_M)
+                changed = True
+            self._hnsw.set_ef(config.EMBEDDED_HNSW_EF)
+        indexed = self._hnsw.get_current_count()
+        if indexed < self._count:
+            if self._hnsw.get_max_elements() < self._count:
+                self._hnsw.resize_index(max(self._count, 2 * self._hnsw.get_max_elements()))
+            self._hnsw.add_items(np.asarray(self._vectors[indexed:self._count]), np.arange(indexed, self._count))
+            changed = True
+        if save and changed:
+            # write a new file and swap it in, so a starting worker never loads a torn one
+            tmp_path = f"{self._hnsw_path}.{os.getpid()}.tmp"
+            self._hnsw.save_index(tmp_path)
+            os.replace(tmp_path, self._hnsw_path)
+
+    def _load_hnsw(self):
+        # the saved graph, or None if there is none or it covers rows we don't have
+        if not os.path.exists(self._hnsw_path):
+            return None
+        index = hnswlib.Index(space="ip", dim=self.dim)
+        try:
+            index.load_index(self._hnsw_path, max_elements=self._count)
+        except Exception as e:
+            logging.warning(f"Could not load {self._hnsw_path}, rebuilding it: {e}")
+            return None
+        if index.get_current_count() > self._count:
+            logging.warning(f"{self._hnsw_path} has {index.get_current_count()} rows but the index has {self._count} - rebuilding it")
+            return None
+        return index
+
+    def _refresh(self):
+        # pick up rows another process appended since we mapped the file
+        on_disk = os.path.getsize(self._vectors_path) // self._row_bytes
+        if on_disk <= self._count:
+            return
+        rows = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        count = min(rows, on_disk)
+        if count > self._count:
+            self._count = count
+            self._vectors = self._map(count)
+            self._sync_hnsw()
+
+    def add(self, texts: list[str]):
+        # embed and append the chunks we don't have yet (same text = same chunk)
+        hashes = {}
+        for text in texts:
+            hashes.setdefault(hashlib.sha1(text.encode()).hexdigest(), text)
+        with self._lock: # skip embedding what we already have
+            existing = self._existing(list(hashes))
+        new = [(digest, text) for digest, text in hashes.items() if digest not in existing]
+        if not new:
+            return
+        vectors = _unit_rows(embedding_model.embed_documents([text for _, text in new]))
+
+        with self._write_lock():
+            # another thread or process may have added some of them while we were embedding
+            self._refresh()
+            existing = self._existing([digest for digest, _ in new])
+            keep = [i for i, (digest, _) in enumerate(new) if digest not in existing]
+            if not keep:
+                return
+            new, vectors = [new[i] for i in keep], vectors[keep]
+            start = self._count
+            with open(self._vectors_path, "r+b") as f:
+                f.seek(start * self._row_bytes) # over any tail a crashed add left behind
+                f.write(vectors.tobytes())
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                self._db.executemany(
+                    "INSERT INTO chunks (id, text, content_hash) VALUES (?, ?, ?)",
+                    [(start + i, text, digest) for i, (digest, text) in enumerate(new)],
+                )
+                self._db.commit()
+            except Exception:
+                self._db.rollback()
+                with open(self._vectors_path, "r+b") as f: # rows without metadata must not be mapped
+                    f.truncate(start * self._row_bytes)
+                raise
+            self._count = start + len(new)
+            self._vectors = self._map(self._count)
+            self._sync_hnsw(save=True)
+        logging.info(f"Embedded vector index: added {len(new)} chunks ({self._count} total)")
+
+    def search(self, embedding: bytes, k: int, with_vectors: bool = False):
+        query = _unit_rows(np.frombuffer(embedding, dtype=np.float32))
+        with self._lock:
+            self._refresh()
+            count, vectors, hnsw = self._count, self._vectors, self._hnsw
+            if count == 0:
+                return []
+            k = min(k, count)
+            if hnsw is not None and count > config.EMBEDDED_FLAT_MAX_ROWS:
+                labels, distances = hnsw.knn_query(query, k=k) # not safe to run during add_items
+                ids, distances = labels[0].astype(np.int64), distances[0]
+        if hnsw is None or count <= config.EMBEDDED_FLAT_MAX_ROWS:
+            # the mapped rows never change, so the scan runs outside the lock
+            scores = vectors @ query
+            ids = np.argpartition(-scores, k - 1)[:k] if k < count else np.arange(count)
+            ids = ids[np.argsort(-scores[ids])]
+            distances = 1.0 - scores[ids]
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            texts = dict(self._db.execute(f"SELECT id, text FROM chunks WHERE id IN ({placeholders})", [int(i) for i in ids]))
+        return [
+            (texts[int(i)], float(d), np.array(vectors[i]) if with_vectors else None)
+            for i, d in zip(ids, distances)
+        ]
+
+    def new_texts(self) -> list[str]:
+        with self._lock:
+            rows = self._db.execute("SELECT id, text FROM chunks WHERE id >= ? ORDER BY id", (self._bm25_cursor,)).fetchall()
+        if rows:
+            self._bm25_cursor = rows[-1][0] + 1
+        return [text for _, text in rows]
@@ -14,27 +14,154 @@
 
 import re
 import logging
+from collections import Counter
+from observability import record_guardrail_hits
 
+# Compiled guardrail engine: every rule - the banned words and the PII patterns - is one named
+# group of a single alternation regex, so a text is scanned once, in C, whatever its size and
+# however many rules there are. The banned words are compiled from a trie (shared prefixes are
+# merged), which keeps the literal part of the regex small as the word list grows.
+# All rules start at a word boundary, so the regex starts with one \b and most positions in a
+# text are rejected before any rule is tried.
 BANNED_WORDS = {"kill", "die", "attack"}
-PII_PATTERNS = [
-    (r'\b\d{3}-\d{3}-\d{4}\b', "[REDACTED]"), # Phone Number
-    (r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', "[REDACTED]"), # Email Address
-    (r'\b\d{3}-\d{3}-\d{4}\b', "[REDACTED]"), # Credit Card Number
-]
+PII_PATTERNS = { # rule name -> pattern (tried at word starts, in this order)
+    "ssn": r"\d{3}-\d{2}-\d{4}\b",
+    "phone": r"\d{3}-\d{3}-\d{4}\b",
+    "credit_card": r"\d(?:[ -]?\d){12,18}\b", # 13-19 digits, Luhn-checked in _replace
+    "email": r"[a-zA-Z0-9._%+-]++@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b",
+}
+BLOCKING_RULES = {"ssn"} # the whole answer is withheld (postprocess.secured_output)
+REPLACEMENTS = {"banned_word": "[BANNED_CONTENT]"} # everything else -> "[REDACTED]"
+
+
+def _trie_regex(words) -> str:
+    # {"kill", "kin"} -> "ki(?:ll|n)"
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word.lower():
+            node = node.setdefault(char, {})
+        node[""] = {} # end of a word
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if "" in node else "")
+    return emit(trie)
+
+def _luhn(digits: str) -> bool:
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        n = int(digit) * (2 if i % 2 else 1)
+        total += n - 9 if n > 9 else n
+    return total % 10 == 0
+
+
+class GuardrailResult:
+    def __init__(self, text: str, fired: Counter):
+        self.text = text # the text with every match replaced, or "[REDACTED]" if blocked
+        self.fired = fired # rule name -> number of matches
+
+    @property
+    def blocked(self) -> bool:
+        return any(rule in self.fired for rule in BLOCKING_RULES)
+
+
+class GuardrailEngine:
+    def __init__(self, banned_words, pii_patterns: dict):
+        groups = [f"(?P<{name}>{pattern})" for name, pattern in pii_patterns.items()]
+        if banned_words:
+            groups.append(f"(?P<banned_word>(?i:{_trie_regex(banned_words)})\\b)") # whole words, any case
+        self.regex = re.compile(r"\b(?:" + "|".join(groups) + ")")
+
+    def scan(self, text: str) -> GuardrailResult:
+        # one pass: find every rule's matches and replace them; a blocking rule (SSN) ends the
+        # scan early, the whole text is withheld anyway
+        fired = Counter()
+        parts, last = [], 0
+        pos = 0
+        while (match := self.regex.search(text, pos)) is not None:
+            rule = match.lastgroup
+            if rule == "credit_card" and not _luhn(re.sub(r"\D", "", match.group())):
+                # a long number, but not a card number - it may still contain an SSN or a
+                # phone number, so go on from the next word start inside it, not after it
+                pos = match.start() + 1
+                continue
+            pos = match.end()
+            fired[rule] += 1
+            if rule in BLOCKING_RULES:
+                parts, last = ["[REDACTED]"], len(text)
+                break
+            parts.append(text[last:match.start()])
+            parts.append(REPLACEMENTS.get(rule, "[REDACTED]"))
+            last = match.end()
+        parts.append(text[last:])
+        if fired:
+            logging.warning(f"Guardrails fired: {dict(fired)}")
+            record_guardrail_hits(fired)
+        return GuardrailResult("".join(parts), fired)
+
+
+_engine = GuardrailEngine(BANNED_WORDS, PII_PATTERNS)
+
+
+def scan(text: str) -> GuardrailResult:
+    return _engine.scan(text)
 
 def apply_guardrails(text:str) -> str:
+    return _engine.scan(text).text
+
+
+class StreamRedactor:
+    # Applies the guardrails to a streamed answer, chunk by chunk.
+    # Text is only released up to the last whitespace seen; the partial word after it is held
+    # back until the next chunk completes it, so a phone number split across two chunks is
+    # still redacted as a whole. Credit card numbers may contain spaces and dashes, so a
+    # trailing run of digits, spaces and dashes (from the whitespace before it) is held back too.
+    MAX_HOLDBACK = 256 # release a very long run without a safe cut anyway...
+    KEEP = 64 # ...but keep its last chars (longer than any pattern) for the next chunk
+
+    _LAST_WHITESPACE = re.compile(r".*\s", re.DOTALL)
+    _NUMBER_CHARS = frozenset("0123456789 -")
+
+    def __init__(self):
+        self.buffer = ""
+        self.redacted = False # an SSN showed up - secured_output() will redact the whole answer
+
+    def feed(self, chunk: str) -> str:
+        # add a chunk, return the text that is safe to send now
+        self.buffer += chunk
+        match = self._LAST_WHITESPACE.match(self.buffer)
+        cut = self._before_number(match.end()) if match else 0
+        if cut == 0 and len(self.buffer) > self.MAX_HOLDBACK:
+            cut = len(self.buffer) - self.KEEP
+        return self._release(cut)
+
+    def _before_number(self, cut: int) -> int:
+        # move cut back to the start of a trailing run that could be part of a card number
+        start = cut
+        while start > 0 and self.buffer[start - 1] in self._NUMBER_CHARS:
+            start -= 1
+        if not any(char.isdigit() for char in self.buffer[start:cut]):
+            return cut
+        while start > 0 and not self.buffer[start - 1].isspace():
+            start -= 1 # and the text it is attached to, so the next cut is at whitespace again
+        return start
+
+    def flush(self) -> str:
+        # end of stream - release whatever is left
+        return self._release(len(self.buffer))
 
-    original_text = text
-    for word in BANNED_WORDS:
-        if word.lower() in text.lower():
-            logging.warning(f"Banned word detected: {word}")
-            text = text.replace(word, "[BANNED_CONTENT]")
-    
-    # PII detection
-    for pattern, replacement in PII_PATTERNS:
-        text = re.sub(pattern, replacement, text)
-    
-    if original_text != text:
-        logging.info(f"Guardrails applied to text: {text}")
-    
-    return text
\ No newline at end of file
+    def _release(self, cut: int) -> str:
+        segment, self.buffer = self.buffer[:cut], self.buffer[cut:]
+        if not segment or self.redacted:
+            return ""
+        result = scan(segment)
+        if result.blocked:
+            logging.warning("SSN detected in streamed answer")
+            self.redacted = True
+            return ""
+        return result.text
@@ -1,8 +1,10 @@
 from langchain_openai import ChatOpenAI
-from config import TEMPERATURE,MAX_TOKENS
+from config import TEMPERATURE,MAX_TOKENS,MODEL_TIERS
 from dotenv import load_dotenv
 from langchain_core.messages import AIMessage
+from observability import record_llm_call
 import os
+import time
 import logging
 from functools import lru_cache
 load_dotenv()
@@ -11,17 +13,52 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if OPENAI_API_KEY is None:
     raise ValueError("OPENAI_API_KEY is not set")
 
-@lru_cache(maxsize=10) # cache the results of the function to avoid reinitializing the chat model for the same model name
-def _get_chat(model_name:str) -> ChatOpenAI:
-    logging.info(f"Initializing the chat model for {model_name}")
-    return ChatOpenAI(model=model_name, 
-            temperature=TEMPERATURE, 
-            max_tokens=MAX_TOKENS, 
+@lru_cache(maxsize=10) # cache the results of the function to avoid reinitializing the chat model for the same settings
+def _get_chat(model_name:str, max_tokens:int = MAX_TOKENS, timeout:float | None = None) -> ChatOpenAI:
+    logging.info(f"Initializing the chat model for {model_name} (max_tokens={max_tokens}, timeout={timeout})")
+    return ChatOpenAI(model=model_name,
+            temperature=TEMPERATURE,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            stream_usage=True, # token usage on the last streamed chunk, for the cost metric
             api_key=OPENAI_API_KEY
             )
 
-def call(model_name:str, prompt: str) -> str:
-    chat = _get_chat(model_name)
-    logging.info(f"Calling the chat model for {model_name}")
-    response:AIMessage = chat.invoke(prompt) 
+def _chat_for(tier:str) -> tuple[str, ChatOpenAI]:
+    # tier: a key of config.MODEL_TIERS (what router.build_prompt returns) or a plain model name
+    settings = MODEL_TIERS.get(tier)
+    if settings is None:
+        return tier, _get_chat(tier)
+    return settings["model"], _get_chat(settings["model"], settings["max_tokens"], settings["timeout"])
+
+def call(tier:str, prompt: str) -> str:
+    model_name, chat = _chat_for(tier)
+    logging.info(f"Calling the chat model for {model_name} (tier {tier})")
+    start = time.time()
+    response:AIMessage = chat.invoke(prompt)
+    record_llm_call(tier, model_name, (time.time() - start) * 1000, response.usage_metadata)
+    return response.content
+
+async def acall(tier:str, prompt: str) -> str:
+    # same as call() but awaits the HTTP request instead of blocking a thread
+    model_name, chat = _chat_for(tier)
+    logging.info(f"Calling the chat model (async) for {model_name} (tier {tier})")
+    start = time.time()
+    response:AIMessage = await chat.ainvoke(prompt)
+    record_llm_call(tier, model_name, (time.time() - start) * 1000, response.usage_metadata)
     return response.content
+
+async def astream(tier:str, prompt: str):
+    # yields the completion text chunk by chunk as the model generates it
+    model_name, chat = _chat_for(tier)
+    logging.info(f"Streaming the chat model for {model_name} (tier {tier})")
+    start = time.time()
+    usage = None
+    try:
+        async for chunk in chat.astream(prompt):
+            if chunk.usage_metadata:
+                usage = chunk.usage_metadata
+            if chunk.content:
+                yield chunk.content
+    finally: # also when the caller stops early
+        record_llm_call(tier, model_name, (time.time() - start) * 1000, usage)
@@ -1,65 +1,12 @@
 import time
 import argparse
 import logging
-#setup logging
-logging.basicConfig(level=logging.INFO, 
-format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-handlers=[logging.FileHandler("rag_pipeline.log", mode="at"),
-logging.StreamHandler()
-])
-
-from cache_store import get as get_cache, set as set_cache
-from retrieval import retrieve_context
-from router import build_prompt
-from llm_client import call as llm_call
-from postprocess import secured_output
-from guardrails import apply_guardrails
-from observability import log, record_metric, start_metrics_server
-
-def run_pipeline(question:str):
-    logging.info(f"Running the RAG pipeline for question: {question}")
-
-    # step 1: check the cache
-    cached_response = get_cache(question)
-    if cached_response: # if not None
-        logging.info(f"Cache HIT for question: {question}")
-        print(f"Cache HIT for question: {question}")
-        return cached_response
-    print(f"Cache MISS for question: {question}")
-    logging.info(f"Cache MISS for question: {question}")
-    # step 2: retrieve the context
-    start_retrieval_time = time.time()
-    context = retrieve_context(question)
-    end_retrieval_time = time.time()
-    retrieval_time = end_retrieval_time - start_retrieval_time
-    retieval_latency = int(retrieval_time * 1000) # convert to milliseconds
-    logging.info(f"Retrieval time: {retieval_latency} milliseconds")
-    record_metric("genai_retrieval_latency_ms", retieval_latency)
-    # step 3: build the prompt
-    model_name, prompt = build_prompt(question, context)
-    logging.info(f"Built prompt for model: {model_name}")
-    logging.info(f"Prompt: {prompt}")
-
-    # step 4: call the LLM
-    start_llm_time = time.time()
-    response = llm_call(model_name, prompt)
-    end_llm_time = time.time()
-    llm_time = end_llm_time - start_llm_time
-    llm_latency = int(llm_time * 1000) # convert to milliseconds
-    logging.info(f"LLM time: {llm_latency} milliseconds")
-    record_metric("genai_llm_latency_ms", llm_latency)
-    logging.info(f"Response: {response}")
-    response = secured_output(response)
-    logging.info(f"Secured response: {response}")
-    response = apply_guardrails(response)
-    logging.info(f"Guardrails applied response: {response}")
-    # step 5: cache the response
-    set_cache(question, response)
-    logging.info(f"Cached response for question: {question}")
-    log(question, prompt, response) # question + prompt + response
-    return response
-    
+#setup logging (the file/console handlers run on a background thread, see audit_log.py)
+from audit_log import setup_logging
+setup_logging("rag_pipeline.log")
 
+from pipeline import run_pipeline
+from observability import start_metrics_server
 
 
 if __name__ == "__main__":
@@ -1,10 +1,78 @@
+import os
+import time
+import shutil
+import inspect
+import contextlib
 import logging
-from prometheus_client import Counter, Histogram, start_http_server
+import functools
+import threading
+import config
+import audit_log
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY, multiprocess, start_http_server
+
+try:
+    from opentelemetry import trace
+    _tracer = trace.get_tracer("rag_pipeline")
+except ImportError: # optional - without it spans are only Prometheus histograms
+    _tracer = None
+
+# millisecond buckets from a cache hit (~1 ms) to a slow LLM call (~30 s)
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
 
 # Metrics
 REQUEST_COUNTER = Counter("genai_requests_total", "Total requests received")
-LLM_LATENCY = Histogram("genai_llm_latency_ms", "LLM call latency in milliseconds")
-RETRIEVAL_LATENCY = Histogram("genai_retrieval_latency_ms", "Retrieval step latency in milliseconds")
+# gauges say how to combine workers in multiprocess mode (counters and histograms just add up)
+REQUESTS_IN_FLIGHT = Gauge("genai_requests_in_flight", "Requests currently being handled, per entry point", ["entrypoint"], multiprocess_mode="livesum")
+STAGE_LATENCY = Histogram(
+    "genai_stage_latency_ms",
+    "Latency of each pipeline stage (see span()) in milliseconds",
+    ["stage"],
+    buckets=LATENCY_BUCKETS_MS,
+)
+LLM_LATENCY = Histogram("genai_llm_latency_ms", "LLM call latency in milliseconds", buckets=LATENCY_BUCKETS_MS)
+LLM_TTFT = Histogram("genai_llm_ttft_ms", "Time to first streamed token in milliseconds", buckets=LATENCY_BUCKETS_MS)
+LLM_TOKENS = Counter("genai_llm_tokens_total", "LLM tokens by model and type (prompt/completion)", ["model", "type"])
+RETRIEVAL_LATENCY = Histogram("genai_retrieval_latency_ms", "Retrieval step latency in milliseconds", buckets=LATENCY_BUCKETS_MS)
+RETRIEVAL_STAGE_LATENCY = Histogram(
+    "genai_retrieval_stage_latency_ms",
+    "Latency of each retrieval stage (vector, bm25, fusion) in milliseconds",
+    ["stage"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+PROMPT_TOKENS = Histogram(
+    "genai_prompt_tokens",
+    "Prompt size in tokens",
+    buckets=(100, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 8000),
+)
+CONTEXT_TOKENS = Histogram(
+    "genai_context_tokens",
+    "Tokens of retrieved context packed into the prompt",
+    buckets=(0, 100, 250, 500, 750, 1000, 1500, 2000, 4000),
+)
+CONTEXT_CHUNKS = Counter("genai_context_chunks_total", "Retrieved chunks by packing outcome (packed/trimmed/dropped)", ["outcome"])
+ROUTE_DECISIONS = Counter("genai_route_decisions_total", "Questions routed to each model tier", ["tier"])
+ROUTE_COMPLEXITY = Histogram(
+    "genai_route_complexity",
+    "Router complexity score per question",
+    buckets=(0.1, 0.2, 0.3, 0.35, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
+)
+TIER_LLM_LATENCY = Histogram(
+    "genai_tier_llm_latency_ms",
+    "LLM call latency per model tier in milliseconds",
+    ["tier", "model"],
+    buckets=(100, 250, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000, 30000),
+)
+LLM_COST = Counter("genai_llm_cost_usd_total", "Estimated LLM spend in USD per model tier", ["tier", "model"])
+AUDIT_RECORDS = Counter("genai_audit_records_total", "Audit log records by outcome (written/sampled_out/dropped)", ["outcome"])
+CACHE_LOOKUPS = Counter("genai_cache_lookups_total", "Cache lookups by tier (exact/semantic) and result", ["tier", "result"])
+SINGLEFLIGHT_WAITS = Counter("genai_singleflight_waits_total", "Requests that waited for an identical in-flight request", ["scope"])
+GUARDRAIL_HITS = Counter("genai_guardrail_hits_total", "Guardrail rule matches (banned words, PII) by rule", ["rule"])
+CACHE_HIT_RATIO = Gauge("genai_cache_hit_ratio", "Share of cache lookups that hit since start, by tier (per worker)", ["tier"], multiprocess_mode="liveall")
+CACHE_SIMILARITY = Histogram(
+    "genai_cache_similarity",
+    "Similarity of the nearest cached question on semantic lookups",
+    buckets=(0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.92, 0.94, 0.96, 0.98, 1.0),
+)
 
 #  Use this as a central logging function for the entire pipeline
 # def log(question, model_input, model_output, guardrail_output=None, model="unknown", latency_ms=None, user_id=None, retrieved_context=None):
@@ -13,21 +81,174 @@ RETRIEVAL_LATENCY = Histogram("genai_retrieval_latency_ms", "Retrieval step late
 #     logging.info(f"User ID: {user_id}")
 #     logging.info(f"Question: {question}")
 
-def log(question, model_input, model_output, user_id=None):
+def log(question, model_input, model_output, user_id=None, **fields):
+    # one structured audit record per request, written off the request path by audit_log.py
+    # fields: tier, latency_ms, cache, guardrail_triggered, error (the last three drive tail sampling)
     REQUEST_COUNTER.inc()
-    logging.info("Number of requests: {REQUEST_COUNTER}")
-    logging.info(f"Question: {question}")
-    logging.info(f"Model input: {model_input}") #  question + context
-    logging.info(f"Model output: {model_output}")
-    logging.info(f"User ID: {user_id if user_id else 'N/A'}")
-    logging.info("---------------------------------")
+    audit_log.record({"user_id": user_id, "question": question, "prompt": model_input, "response": model_output, **fields})
+
+class span:
+    # Times one pipeline stage, as a context manager or a decorator (sync, async and async
+    # generator functions):
+    #   with span("retrieval") as stage: ...     stage.elapsed_ms afterwards
+    #   @span("run_pipeline", in_flight=True)
+    # -> genai_stage_latency_ms{stage}, plus an OpenTelemetry span "rag.<stage>" (nested under
+    # the current one) when opentelemetry is installed. in_flight=True also tracks the stage in
+    # genai_requests_in_flight{entrypoint=<stage>}.
+    def __init__(self, stage, in_flight=False, **attributes):
+        self.stage = stage
+        self.in_flight = in_flight
+        self.attributes = attributes
+        self.elapsed_ms = None
+        self._otel = None
+
+    def __enter__(self):
+        if _tracer is not None:
+            self._otel = _tracer.start_as_current_span(f"rag.{self.stage}", attributes=self.attributes)
+            self._otel.__enter__()
+        if self.in_flight:
+            REQUESTS_IN_FLIGHT.labels(entrypoint=self.stage).inc()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed_ms = (time.perf_counter() - self._start) * 1000
+        STAGE_LATENCY.labels(stage=self.stage).observe(self.elapsed_ms)
+        if self.in_flight:
+            REQUESTS_IN_FLIGHT.labels(entrypoint=self.stage).dec()
+        if self._otel is not None:
+            self._otel.__exit__(*exc_info)
+        return False
+
+    def set(self, **attributes):
+        # attributes only known inside the stage (e.g. the model tier) - OpenTelemetry only
+        if _tracer is not None:
+            trace.get_current_span().set_attributes(attributes)
+
+    def __call__(self, fn):
+        # a fresh span per call, so one decorated function can run concurrently
+        def new():
+            return span(self.stage, self.in_flight, **self.attributes)
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with new():
+                    async with contextlib.aclosing(fn(*args, **kwargs)) as items:
+                        async for item in items:
+                            yield item
+        elif inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with new():
+                    return await fn(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with new():
+                    return fn(*args, **kwargs)
+        return wrapper
 
 def record_metric(metric_name, value):
     if metric_name == "genai_llm_latency_ms":
         LLM_LATENCY.observe(value)
     elif metric_name == "genai_retrieval_latency_ms":
         RETRIEVAL_LATENCY.observe(value)
+    elif metric_name == "genai_prompt_tokens":
+        PROMPT_TOKENS.observe(value)
+    elif metric_name == "genai_llm_ttft_ms":
+        LLM_TTFT.observe(value)
+
+def record_context_packing(context_tokens, outcomes):
+    CONTEXT_TOKENS.observe(context_tokens)
+    for outcome, count in outcomes.items():
+        if count:
+            CONTEXT_CHUNKS.labels(outcome=outcome).inc(count)
+
+def record_route(tier, complexity):
+    ROUTE_DECISIONS.labels(tier=tier).inc()
+    ROUTE_COMPLEXITY.observe(complexity)
+
+def record_llm_call(tier, model, latency_ms, usage=None):
+    # usage: the response's usage_metadata ({"input_tokens", "output_tokens", ...}) or None
+    TIER_LLM_LATENCY.labels(tier=tier, model=model).observe(latency_ms)
+    if usage:
+        LLM_TOKENS.labels(model=model, type="prompt").inc(usage.get("input_tokens", 0))
+        LLM_TOKENS.labels(model=model, type="completion").inc(usage.get("output_tokens", 0))
+    prices = config.MODEL_TIERS.get(tier)
+    if usage and prices:
+        cost = (usage.get("input_tokens", 0) * prices["input_cost_per_1m"] + usage.get("output_tokens", 0) * prices["output_cost_per_1m"]) / 1e6
+        LLM_COST.labels(tier=tier, model=model).inc(cost)
+
+def record_retrieval_stage(stage, latency_ms):
+    RETRIEVAL_STAGE_LATENCY.labels(stage=stage).observe(latency_ms)
+
+_cache_counts = {} # tier -> [hits, lookups], for the hit ratio gauge
+_cache_counts_lock = threading.Lock()
+
+def record_cache_lookup(tier, result, similarity=None):
+    CACHE_LOOKUPS.labels(tier=tier, result=result).inc()
+    with _cache_counts_lock:
+        counts = _cache_counts.setdefault(tier, [0, 0])
+        counts[0] += result == "hit"
+        counts[1] += 1
+        CACHE_HIT_RATIO.labels(tier=tier).set(counts[0] / counts[1])
+    if similarity is not None:
+        CACHE_SIMILARITY.observe(similarity)
+
+def record_guardrail_hits(fired):
+    for rule, count in fired.items():
+        GUARDRAIL_HITS.labels(rule=rule).inc(count)
+
+def record_audit(outcome, count=1):
+    AUDIT_RECORDS.labels(outcome=outcome).inc(count)
+
+def record_singleflight_wait(scope):
+    SINGLEFLIGHT_WAITS.labels(scope=scope).inc()
+
+# Prometheus multiprocess mode (several API workers). prometheus_client picks the storage when
+# it is imported, so PROMETHEUS_MULTIPROC_DIR must be in the environment before the workers start.
+def multiprocess_enabled():
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+def prepare_multiprocess_dir(path=config.PROMETHEUS_MULTIPROC_DIR):
+    # call once in the parent before starting the workers; files left by an earlier run would
+    # be added to this run's numbers
+    # NOTE: this deletes the directory and everything in it - an operator-set
+    # PROMETHEUS_MULTIPROC_DIR must be a directory used for nothing else
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+
+def metrics_registry():
+    # the registry to expose: this process's metrics, or all workers' in multiprocess mode
+    if not multiprocess_enabled():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+def mark_process_dead(pid=None):
+    # drop a finished worker's live gauges (its counters and histograms keep counting)
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+def cleanup_dead_workers():
+    # workers that crashed never called mark_process_dead - find their files by pid
+    if not multiprocess_enabled():
+        return
+    pids = set()
+    for name in os.listdir(os.environ["PROMETHEUS_MULTIPROC_DIR"]):
+        if name.startswith("gauge_live") and name.endswith(".db"):
+            pids.add(int(name[:-3].rsplit("_", 1)[1]))
+    for pid in pids:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            logging.info(f"Removing metrics of dead worker {pid}")
+            mark_process_dead(pid)
+        except PermissionError: # alive, owned by someone else
+            pass
 
 def start_metrics_server(port=8002):
-    start_http_server(port)
+    start_http_server(port, registry=metrics_registry())
     logging.info(f"Prometheus metrics server running at http://localhost:{port}/metrics")
\ No newline at end of file
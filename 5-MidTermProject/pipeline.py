@@ -0,0 +1,279 @@
+# pipeline.py
+# The RAG pipeline shared by the CLI (main.py) and the API (api_server.py)
+import asyncio
+import time
+import logging
+from contextlib import aclosing
+
+from cache_store import lookup as lookup_cache, get_exact as get_cache, set as set_cache, normalize
+from cache_store import alookup as alookup_cache, aget_exact as aget_cache, aset as aset_cache
+from cache_store import alookup_many, asemantic_get
+from retrieval import retrieve_chunks, aretrieve_chunks
+from router import build_prompt
+from llm_client import call as llm_call, acall as allm_call, astream as allm_stream
+from postprocess import secure
+from guardrails import StreamRedactor
+from observability import log, record_metric, span
+import singleflight
+import config
+import cache_store
+import vector_store
+from vector_store import aembed_many
+
+
+def _answer(question:str, user_id:str | None = None):
+    # retrieve -> prompt -> LLM -> postprocess -> cache (the expensive part of the pipeline)
+    # step 2: retrieve the context
+    with span("retrieval") as stage:
+        context, scores = retrieve_chunks(question, with_scores=True)
+    retieval_latency = int(stage.elapsed_ms)
+    logging.info(f"Retrieval time: {retieval_latency} milliseconds")
+    record_metric("genai_retrieval_latency_ms", retieval_latency)
+    # step 3: route to a model tier and build the prompt
+    with span("prompt_build") as stage:
+        model_tier, prompt = build_prompt(question, context, scores)
+        stage.set(model_tier=model_tier)
+    logging.info(f"Built prompt for model tier: {model_tier}")
+    logging.debug(f"Prompt: {prompt}")
+
+    # step 4: call the LLM
+    with span("llm", model_tier=model_tier) as stage:
+        response = llm_call(model_tier, prompt)
+    llm_latency = int(stage.elapsed_ms)
+    logging.info(f"LLM time: {llm_latency} milliseconds")
+    record_metric("genai_llm_latency_ms", llm_latency)
+    logging.debug(f"Response: {response}")
+    with span("guardrails"): # PII, banned words and secured_output's SSN check in one pass
+        response, guardrail_rules = secure(response)
+    logging.debug(f"Guardrails applied response: {response}")
+    # step 5: cache the response
+    with span("cache_write"):
+        set_cache(question, response)
+    logging.info(f"Cached response for question: {question}")
+    log(question, prompt, response, user_id, tier=model_tier, latency_ms=llm_latency, cache="miss",
+        guardrail_triggered=bool(guardrail_rules), guardrail_rules=guardrail_rules) # question + prompt + response
+    return response
+
+# core pipeline function
+@span("run_pipeline", in_flight=True)
+def run_pipeline(question:str, user_id:str | None = None):
+    logging.info(f"Running the RAG pipeline for question: {question}")
+
+    # step 1: check the cache
+    with span("cache_lookup"):
+        cached_response, fresh = lookup_cache(question)
+    if cached_response and fresh:
+        logging.info(f"Cache HIT for question: {question}")
+        return cached_response
+    key = normalize(question)
+    if cached_response: # just expired - serve it and let one request refresh it in the background
+        logging.info(f"Cache STALE for question: {question} - refreshing in background")
+        singleflight.refresh_in_background(key, lambda: _answer(question, user_id))
+        return cached_response
+    logging.info(f"Cache MISS for question: {question}")
+    # identical questions already in flight (here or on another worker) share one answer
+    return singleflight.do(key, lambda: _answer(question, user_id), poll=lambda: get_cache(question))
+
+# async version of the pipeline for the API - same steps, but Redis, retrieval and the LLM
+# are awaited, so one worker can hold many questions in flight instead of one per thread
+async def _aprompt(question:str, context:list[str] | None = None, scores:list[float] | None = None):
+    if context is None: # batches retrieve the context up front
+        with span("retrieval") as stage:
+            context, scores = await aretrieve_chunks(question, with_scores=True)
+        retieval_latency = int(stage.elapsed_ms)
+        logging.info(f"Retrieval time: {retieval_latency} milliseconds")
+        record_metric("genai_retrieval_latency_ms", retieval_latency)
+    with span("prompt_build") as stage:
+        model_tier, prompt = build_prompt(question, context, scores)
+        stage.set(model_tier=model_tier)
+    logging.info(f"Built prompt for model tier: {model_tier}")
+    logging.debug(f"Prompt: {prompt}")
+    return model_tier, prompt
+
+async def _aanswer(question:str, user_id:str | None = None, context:list[str] | None = None, scores:list[float] | None = None):
+    model_tier, prompt = await _aprompt(question, context, scores)
+    with span("llm", model_tier=model_tier) as stage:
+        response = await allm_call(model_tier, prompt)
+    llm_latency = int(stage.elapsed_ms)
+    logging.info(f"LLM time: {llm_latency} milliseconds")
+    record_metric("genai_llm_latency_ms", llm_latency)
+    logging.debug(f"Response: {response}")
+    with span("guardrails"): # PII, banned words and secured_output's SSN check in one pass
+        response, guardrail_rules = secure(response)
+    logging.debug(f"Guardrails applied response: {response}")
+    with span("cache_write"):
+        await aset_cache(question, response)
+    logging.info(f"Cached response for question: {question}")
+    log(question, prompt, response, user_id, tier=model_tier, latency_ms=llm_latency, cache="miss",
+        guardrail_triggered=bool(guardrail_rules), guardrail_rules=guardrail_rules)
+    return response
+
+@span("arun_pipeline", in_flight=True)
+async def arun_pipeline(question:str, user_id:str | None = None):
+    logging.info(f"Running the RAG pipeline for question: {question}")
+    with span("cache_lookup"):
+        cached_response, fresh = await alookup_cache(question)
+    if cached_response and fresh:
+        logging.info(f"Cache HIT for question: {question}")
+        return cached_response
+    key = normalize(question)
+    if cached_response:
+        logging.info(f"Cache STALE for question: {question} - refreshing in background")
+        singleflight.arefresh_in_background(key, lambda: _aanswer(question, user_id))
+        return cached_response
+    logging.info(f"Cache MISS for question: {question}")
+    return await singleflight.ado(key, lambda: _aanswer(question, user_id), poll=lambda: aget_cache(question))
+
+# streaming version for /ask/stream - yields (event, data) pairs:
+#   ("token", {"text": ...}) as the LLM produces text, already through the guardrails
+#   ("done", {"answer": ..., "cached": ...}) with the final answer, which is what gets cached
+# If the stream hits an SSN, secured_output() redacts the whole answer - the stream stops and
+# "done" carries "[REDACTED]", so clients should always show the "done" answer at the end.
+@span("astream_pipeline", in_flight=True)
+async def astream_pipeline(question:str, user_id:str | None = None):
+    logging.info(f"Streaming the RAG pipeline for question: {question}")
+    with span("cache_lookup"):
+        cached_response, fresh = await alookup_cache(question)
+    if cached_response:
+        logging.info(f"Cache {'HIT' if fresh else 'STALE'} for question: {question}")
+        if not fresh:
+            singleflight.arefresh_in_background(normalize(question), lambda: _aanswer(question, user_id))
+        yield "token", {"text": cached_response}
+        yield "done", {"answer": cached_response, "cached": True}
+        return
+
+    logging.info(f"Cache MISS for question: {question}")
+    model_tier, prompt = await _aprompt(question)
+    redactor = StreamRedactor()
+    chunks = []
+    start_llm_time = time.time()
+    with span("llm", model_tier=model_tier):
+        async with aclosing(allm_stream(model_tier, prompt)) as stream:
+            async for chunk in stream:
+                if not chunks:
+                    ttft = int((time.time() - start_llm_time) * 1000)
+                    logging.info(f"Time to first token: {ttft} milliseconds")
+                    record_metric("genai_llm_ttft_ms", ttft)
+                chunks.append(chunk)
+                text = redactor.feed(chunk)
+                if text:
+                    yield "token", {"text": text}
+                if redactor.redacted:
+                    break # the answer will be "[REDACTED]" whatever comes next
+    text = redactor.flush()
+    if text:
+        yield "token", {"text": text}
+    llm_latency = int((time.time() - start_llm_time) * 1000)
+    logging.info(f"LLM time: {llm_latency} milliseconds")
+    record_metric("genai_llm_latency_ms", llm_latency)
+
+    # the assembled answer goes through the same full postprocessing as /ask before it is cached
+    raw_response = "".join(chunks)
+    with span("guardrails"):
+        response, guardrail_rules = secure(raw_response)
+    logging.debug(f"Guardrails applied response: {response}")
+    with span("cache_write"):
+        await aset_cache(question, response)
+    logging.info(f"Cached response for question: {question}")
+    log(question, prompt, response, user_id, tier=model_tier, latency_ms=llm_latency, cache="miss",
+        guardrail_triggered=bool(guardrail_rules) or redactor.redacted, guardrail_rules=guardrail_rules, streamed=True)
+    yield "done", {"answer": response, "cached": False}
+
+# batch version for offline jobs (/ask/batch) - instead of N full round trips per question:
+# dedupe -> one MGET for the exact cache -> one embed_documents call for the misses ->
+# concurrent semantic cache + vector searches -> LLM calls with bounded concurrency.
+# Returns one dict per input question, in input order:
+#   {"question", "answer", "cache": hit|stale|semantic|miss, "ready_ms", "error", "deduplicated"}
+# ready_ms is the time from the start of the batch until that answer was ready.
+@span("arun_pipeline_batch", in_flight=True)
+async def arun_pipeline_batch(questions:list[str], user_id:str | None = None, concurrency:int = config.BATCH_LLM_CONCURRENCY):
+    batch_start = time.time()
+    keys = [normalize(q) for q in questions]
+    unique = {} # normalized question -> its first wording in the batch
+    for question, key in zip(questions, keys):
+        unique.setdefault(key, question)
+    results = {}
+    logging.info(f"Running a batch of {len(questions)} questions ({len(unique)} unique)")
+
+    def finish(key, answer, cache, error=None):
+        results[key] = {"answer": answer, "cache": cache, "ready_ms": int((time.time() - batch_start) * 1000), "error": error}
+
+    # step 1: exact cache for every unique question in one round trip
+    misses = []
+    for (key, question), (answer, fresh) in zip(unique.items(), await alookup_many(list(unique.values()))):
+        if answer and fresh:
+            finish(key, answer, "hit")
+        elif answer:
+            singleflight.arefresh_in_background(key, lambda question=question: _aanswer(question, user_id))
+            finish(key, answer, "stale")
+        else:
+            misses.append(key)
+
+    if misses:
+        # step 2: embed all misses at once, then semantic cache + vector search concurrently
+        # (the normalized question is embedded, the same text the semantic cache uses)
+        start_retrieval_time = time.time()
+        try:
+            embeddings = await aembed_many(misses)
+        except Exception as e: # without embeddings none of the misses can be answered
+            logging.error(f"Batch embedding failed for {len(misses)} questions: {e}")
+            for key in misses:
+                finish(key, None, "miss", str(e))
+                log(unique[key], None, None, user_id, cache="miss", error=str(e), batch=True)
+            misses = []
+
+    if misses:
+        search_slots = asyncio.Semaphore(config.BATCH_SEARCH_CONCURRENCY)
+
+        async def search(key, embedding):
+            async with search_slots:
+                answer = await asemantic_get(unique[key], embedding)
+                if answer is not None:
+                    finish(key, answer, "semantic")
+                    return None
+                return await aretrieve_chunks(unique[key], embedding=embedding, with_scores=True)
+
+        retrieved = await asyncio.gather(*(search(key, e) for key, e in zip(misses, embeddings)), return_exceptions=True)
+        retieval_latency = int((time.time() - start_retrieval_time) * 1000)
+        logging.info(f"Batch retrieval time for {len(misses)} questions: {retieval_latency} milliseconds")
+        record_metric("genai_retrieval_latency_ms", retieval_latency)
+
+        # step 3: generate the rest, at most `concurrency` LLM calls at a time
+        llm_slots = asyncio.Semaphore(concurrency)
+
+        async def generate(key, context, scores):
+            async with llm_slots:
+                return await _aanswer(unique[key], user_id, context, scores)
+
+        async def answer(key, result):
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                context, scores = result
+                # still coalesced with identical /ask requests in flight
+                response = await singleflight.ado(key, lambda: generate(key, context, scores), poll=lambda: aget_cache(unique[key]))
+                finish(key, response, "miss")
+            except Exception as e:
+                logging.error(f"Batch question failed: {unique[key]}: {e}")
+                finish(key, None, "miss", str(e))
+                log(unique[key], None, None, user_id, cache="miss", error=str(e), batch=True)
+
+        await asyncio.gather(*(answer(key, result) for key, result in zip(misses, retrieved) if key not in results))
+
+    seen = set()
+    ordered = []
+    for question, key in zip(questions, keys):
+        ordered.append({"question": question, **results[key], "deduplicated": key in seen})
+        seen.add(key)
+    logging.info(f"Batch of {len(questions)} questions done in {int((time.time() - batch_start) * 1000)} milliseconds")
+    return ordered
+
+def run_pipeline_batch(questions:list[str], user_id:str | None = None, concurrency:int = config.BATCH_LLM_CONCURRENCY):
+    # sync entry point for scripts - runs the batch on its own event loop
+    async def _run():
+        try:
+            return await arun_pipeline_batch(questions, user_id, concurrency)
+        finally: # the async clients are bound to this loop
+            await cache_store.aclose()
+            await vector_store.aclose()
+    return asyncio.run(_run())
@@ -6,11 +6,14 @@
 # 4. Addition of metadata like Confidence score, latency, used docs
 # 5. Removal of values of certain formats like SSN, Phone numbers, etc.
 
-import re
+from guardrails import scan
 
-PII_REGEX = re.compile(r'\b\d{3}-\d{2}-\d{4}\b') # Social Security Number
+def secure(text:str) -> tuple[str, list[str]]:
+    # one guardrail pass over the answer -> (safe answer, names of the rules that fired)
+    result = scan(text)
+    if result.blocked: # e.g. a Social Security Number - withhold the whole answer
+        return "[REDACTED]", sorted(result.fired)
+    return result.text.strip(), sorted(result.fired)
 
 def secured_output(text:str) -> str:
-    if PII_REGEX.search(text):
-        return "[REDACTED]"
-    return text.strip()
\ No newline at end of file
+    return secure(text)[0]
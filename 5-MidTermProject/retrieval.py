@@ -1,6 +1,142 @@
-from vector_store import retrieve_documents
+# retrieval.py
+# 1. Hybrid retrieval: dense (vector) search + BM25 keyword search, fused with reciprocal rank fusion.
+#    Each retriever over-fetches candidates; a chunk's fused score is
+#      sum over retrievers of weight / (RRF_K + rank)
+#    so chunks both retrievers like come first, and an exact-term hit (e.g. "HITL") that dense
+#    search ranks low can still make the top k.
+# 2. Post-retrieval stage: drop near-duplicate chunks (cosine similarity above
+#    DEDUP_SIMILARITY_THRESHOLD), then pick k with maximal marginal relevance (MMR), so the
+#    prompt doesn't spend tokens on the same passage twice. The chunk vectors come back with
+#    the KNN results, so this costs no extra network round trip.
+import asyncio
+import time
+import numpy as np
+import config
+import bm25
+from vector_store import retrieve_candidates, aretrieve_candidates_by_vector, embed_query_bytes, aembed_query_bytes
+from observability import record_retrieval_stage
+
+
+def _timed(stage, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    record_retrieval_stage(stage, (time.perf_counter() - start) * 1000)
+    return result
+
+def _fetch_size(k:int) -> int:
+    # how many dense candidates to ask for
+    fetch = k
+    if config.HYBRID_ENABLED:
+        fetch = max(fetch, config.HYBRID_CANDIDATES)
+    if config.MMR_ENABLED:
+        fetch = max(fetch, config.MMR_CANDIDATES)
+    return fetch
+
+def rrf_scores(ranked_lists, weights) -> dict[str, float]:
+    # ranked_lists: one list of chunk texts per retriever, best first -> {text: fused score}
+    scores = {}
+    for ranked, weight in zip(ranked_lists, weights):
+        for rank, text in enumerate(ranked, start=1):
+            scores[text] = scores.get(text, 0.0) + weight / (config.RRF_K + rank)
+    return scores
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+def remove_near_duplicates(similarities: np.ndarray, threshold: float) -> np.ndarray:
+    # candidates are in rank order; keep a chunk unless it is too similar to one already kept
+    keep = np.ones(len(similarities), dtype=bool)
+    for i in range(1, len(similarities)):
+        keep[i] = not np.any(similarities[i, :i][keep[:i]] > threshold)
+    return keep
+
+def mmr(relevance: np.ndarray, similarities: np.ndarray, k: int, lambda_mult: float) -> list[int]:
+    # maximal marginal relevance: repeatedly take the chunk maximizing
+    #   lambda * relevance - (1 - lambda) * (max similarity to the chunks already taken)
+    selected = []
+    redundancy = np.zeros(len(relevance))
+    available = np.ones(len(relevance), dtype=bool)
+    for _ in range(min(k, len(relevance))):
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarities[best])
+    return selected
+
+def diversify(chunks: list[str], relevance: np.ndarray, vectors: np.ndarray, k: int) -> list[str]:
+    # chunks in rank order; relevance (higher is better, about 0..1) and vectors (zero rows = unknown)
+    if len(chunks) <= 1:
+        return chunks[:k]
+    start = time.perf_counter()
+    unit = _unit(vectors)
+    similarities = unit @ unit.T
+    keep = remove_near_duplicates(similarities, config.DEDUP_SIMILARITY_THRESHOLD)
+    record_retrieval_stage("dedupe", (time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    kept = np.flatnonzero(keep)
+    order = mmr(relevance[kept], similarities[np.ix_(kept, kept)], k, config.MMR_LAMBDA)
+    record_retrieval_stage("mmr", (time.perf_counter() - start) * 1000)
+    return [chunks[kept[i]] for i in order]
+
+def _select(query:str, query_vector: np.ndarray, texts: list[str], vectors: np.ndarray, k:int) -> list[str]:
+    # texts/vectors: the dense candidates, most similar first
+    if config.HYBRID_ENABLED:
+        keyword = [text for text, _ in _timed("bm25", bm25.search, query, config.HYBRID_CANDIDATES)]
+        scores = _timed("fusion", rrf_scores, [texts, keyword], [config.HYBRID_VECTOR_WEIGHT, config.HYBRID_BM25_WEIGHT])
+        chunks = sorted(scores, key=scores.get, reverse=True)
+        relevance = np.array([scores[c] for c in chunks])
+        # RRF scores are all close together - spread them over [0, 1] to weigh against cosine similarity
+        spread = relevance.max() - relevance.min()
+        relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones(len(chunks))
+        # keyword-only chunks have no vector here - a zero row, i.e. not similar to anything
+        by_text = dict(zip(texts, vectors))
+        dim = vectors.shape[1] if len(texts) else len(query_vector)
+        vectors = np.array([by_text.get(c, np.zeros(dim, dtype=np.float32)) for c in chunks]).reshape(len(chunks), dim)
+    else:
+        chunks = texts
+        relevance = _unit(vectors) @ _unit(query_vector)
+    if not config.MMR_ENABLED:
+        return chunks[:k]
+    return diversify(chunks, relevance, vectors, k)
+
+def _similarities(query_vector: np.ndarray, vectors: np.ndarray) -> list[float]:
+    # cosine similarity of each dense candidate to the query, best first (a routing signal)
+    if not len(vectors):
+        return []
+    return np.sort(_unit(vectors) @ _unit(query_vector))[::-1].tolist()
+
+def retrieve_chunks(query:str, k:int = 3, with_scores:bool = False):
+    # with_scores: return (chunks, candidate similarities) for router.build_prompt
+    texts, vectors = _timed("vector", retrieve_candidates, query, _fetch_size(k))
+    query_vector = np.frombuffer(embed_query_bytes(query), dtype=np.float32) # cached by the search above
+    chunks = _select(query, query_vector, texts, vectors, k)
+    return (chunks, _similarities(query_vector, vectors)) if with_scores else chunks
+
+async def aretrieve_chunks(query:str, k:int = 3, embedding=None, with_scores:bool = False):
+    # embedding: a precomputed query vector (batches), otherwise the query is embedded here
+    start = time.perf_counter()
+    if embedding is None:
+        embedding = await aembed_query_bytes(query)
+    texts, vectors = await aretrieve_candidates_by_vector(embedding, _fetch_size(k))
+    record_retrieval_stage("vector", (time.perf_counter() - start) * 1000)
+    if config.HYBRID_ENABLED:
+        await asyncio.to_thread(bm25.refresh) # the first call loads the corpus from Redis
+    query_vector = np.frombuffer(embedding, dtype=np.float32) if isinstance(embedding, bytes) else np.asarray(embedding, dtype=np.float32)
+    chunks = _select(query, query_vector, texts, vectors, k)
+    return (chunks, _similarities(query_vector, vectors)) if with_scores else chunks
 
 def retrieve_context(query:str, k:int = 3) -> str:
-    context = retrieve_documents(query, k)
+    context = retrieve_chunks(query, k)
     ## context --> list[str] (each element is a chunk from vector database)
-    return "\n\n".join(context) # join the context into a single string
\ No newline at end of file
+    return "\n\n".join(context) # join the context into a single string
+
+async def aretrieve_context(query:str, k:int = 3) -> str:
+    context = await aretrieve_chunks(query, k)
+    return "\n\n".join(context)
+
+async def aretrieve_context_by_vector(query:str, embedding, k:int = 3) -> str:
+    context = await aretrieve_chunks(query, k, embedding)
+    return "\n\n".join(context)
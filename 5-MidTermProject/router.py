@@ -1,7 +1,21 @@
 # this is a place where you can have guardrails (pre processing steps) and other things like that
 # you can also have a place where you can have the prompt engineering
 
-from config import DEFAULT_MODEL
+# Model routing: every question gets a complexity score in [0, 1] from cheap local features -
+# question length, keyword rules and how the retrieval scores look - and goes to the cheapest
+# tier in config.MODEL_TIERS that covers it. Definitional questions stay on the small model;
+# long, comparative or multi-part questions go to the bigger ones.
+# With config.ROUTER_CLASSIFIER_PATH set, a tiny logistic regression over the same features
+# (a JSON file: {"bias": b, "weights": {feature: w}}) gives the score instead of the rules.
+import re
+import json
+import math
+import logging
+import config
+from config import PROMPT_TOKEN_BUDGET
+from context_packer import pack, count_tokens
+from observability import record_metric, record_route
+
 TEMPLATE = """ You are a helpful assistant, answer the questions as best as you can.
 {context_block}
 
@@ -11,6 +25,79 @@ Question: {question}
 Answer:
 """
 
-def build_prompt(question: str, context:str) -> tuple[str,str]:
+COMPLEX_KEYWORDS = re.compile(
+    r"\b(compare|comparison|differences?|versus|vs\.?|trade-?offs?|pros and cons|why|explain how|"
+    r"step[- ]by[- ]step|analy[sz]e|evaluate|design|implement|architecture|impact|relationship)\b"
+)
+SIMPLE_PATTERN = re.compile(r"^\s*(what is|what's|what are|define|who is|who was|when was|what does .+ stand for)\b")
+
+_classifier = None
+
+
+def _load_classifier():
+    global _classifier
+    if _classifier is None and config.ROUTER_CLASSIFIER_PATH:
+        with open(config.ROUTER_CLASSIFIER_PATH) as f:
+            _classifier = json.load(f)
+        logging.info(f"Loaded router classifier from {config.ROUTER_CLASSIFIER_PATH}")
+    return _classifier
+
+def question_features(question: str, scores: list[float] | None = None) -> dict[str, float]:
+    # scores: cosine similarities of the retrieved candidates to the question, best first
+    text = question.lower()
+    words = len(text.split())
+    features = {
+        "words": words,
+        "length": min(words / config.ROUTER_LONG_QUESTION_WORDS, 1.0),
+        "complex_keywords": len(COMPLEX_KEYWORDS.findall(text)),
+        "simple_pattern": 1.0 if SIMPLE_PATTERN.match(text) and words <= 12 else 0.0,
+        "multi_part": 1.0 if text.count("?") > 1 or re.search(r"\b(and|also|then)\b.*\?", text) else 0.0,
+        "top_similarity": 1.0, # no retrieval scores -> assume the corpus answers it
+        "score_spread": 1.0,
+    }
+    if scores:
+        top = scores[:3]
+        features["top_similarity"] = top[0]
+        features["score_spread"] = top[0] - sum(top) / len(top)
+    return features
+
+def complexity(features: dict[str, float]) -> float:
+    classifier = _load_classifier()
+    if classifier:
+        z = classifier["bias"] + sum(w * features.get(name, 0.0) for name, w in classifier["weights"].items())
+        return 1 / (1 + math.exp(-z))
+    score = 0.35 * features["length"]
+    score += 0.35 if features["complex_keywords"] else 0.0
+    score += 0.15 * features["multi_part"]
+    score -= 0.25 * features["simple_pattern"]
+    if features["top_similarity"] < config.ROUTER_LOW_SIMILARITY: # nothing close in the corpus - needs more reasoning
+        score += 0.2
+    if features["score_spread"] < config.ROUTER_FLAT_SPREAD: # no single chunk stands out - multi-hop
+        score += 0.1
+    return min(max(score, 0.0), 1.0)
+
+def route(question: str, scores: list[float] | None = None) -> str:
+    # returns the name of the model tier for this question
+    if not config.ROUTING_ENABLED:
+        return config.DEFAULT_TIER
+    score = complexity(question_features(question, scores))
+    tier = next((name for name, settings in config.MODEL_TIERS.items() if score <= settings["max_complexity"]),
+                list(config.MODEL_TIERS)[-1])
+    logging.info(f"Routing: complexity {score:.2f} -> tier {tier}")
+    record_route(tier, score)
+    return tier
+
+def build_prompt(question: str, context: list[str] | str, scores: list[float] | None = None) -> tuple[str,str]:
+    # context: the retrieved chunks, best first (a plain string counts as one chunk)
+    # returns (model tier, prompt) - llm_client takes the tier name
+    tier = route(question, scores)
+    model_name = config.MODEL_TIERS.get(tier, {}).get("model", config.DEFAULT_MODEL)
+    chunks = [context] if isinstance(context, str) else context
+    chunks = [chunk for chunk in chunks if chunk.strip()]
+    # the chunks get whatever PROMPT_TOKEN_BUDGET leaves after the template and the question
+    overhead = count_tokens(TEMPLATE.format(context_block="Context: ", question=question), model_name)
+    packed, context_tokens = pack(chunks, PROMPT_TOKEN_BUDGET - overhead, model_name)
+    context = "\n\n".join(packed)
     context_block =f"Context: {context}" if context.strip() else "" # if context is not empty, add it to the context block
-    return DEFAULT_MODEL, TEMPLATE.format(context_block=context_block, question=question)
\ No newline at end of file
+    record_metric("genai_prompt_tokens", overhead + context_tokens)
+    return tier, TEMPLATE.format(context_block=context_block, question=question)
@@ -0,0 +1,238 @@
+# singleflight.py
+# Coalesce identical concurrent work so only one caller (the "leader") does it.
+# - in-process: followers wait for the leader's result instead of calling the LLM themselves
+# - across workers: a Redis lease (SET NX PX) elects one leader; the other workers
+#   poll the cache until the leader's answer shows up
+# The a-prefixed functions are the same thing for coroutines on the API's event loop.
+import asyncio
+import threading
+import time
+import uuid
+import logging
+import config
+import cache_store
+from observability import record_singleflight_wait
+
+# delete the lease only if we still own it (it may have expired and been taken over)
+_RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_calls = {} # key -> _Call in flight in this process
+_lock = threading.Lock()
+
+
+def _lease_key(key: str) -> str:
+    return f"rag:lease:{key}"
+
+def _acquire_lease(key: str):
+    # returns a token if we got the lease (or there is no Redis to coordinate with), else None
+    token = str(uuid.uuid4())
+    if cache_store.redis_client is None:
+        return token
+    if cache_store.redis_client.set(_lease_key(key), token, nx=True, px=config.SINGLEFLIGHT_LEASE_MS):
+        return token
+    return None
+
+def _release_lease(key: str, token: str):
+    if cache_store.redis_client is None:
+        return
+    try:
+        cache_store.redis_client.eval(_RELEASE_SCRIPT, 1, _lease_key(key), token)
+    except Exception as e:
+        logging.warning(f"Could not release lease for {key}: {e}")
+
+def _run_with_lease(key: str, fn, poll):
+    deadline = time.monotonic() + config.SINGLEFLIGHT_WAIT_SECONDS
+    waited = False
+    while True:
+        token = _acquire_lease(key)
+        if token is not None:
+            try:
+                return fn()
+            finally:
+                _release_lease(key, token)
+        # another worker is computing this answer - wait for it to land in the cache
+        if not waited:
+            record_singleflight_wait("redis")
+            waited = True
+        if poll is not None:
+            result = poll()
+            if result is not None:
+                return result
+        if time.monotonic() > deadline:
+            logging.warning(f"Timed out waiting for the leader of {key} - computing it here")
+            return fn()
+        time.sleep(config.SINGLEFLIGHT_POLL_SECONDS)
+
+def do(key: str, fn, poll=None):
+    # run fn() once for all concurrent callers with the same key; everyone gets its result
+    # poll() is used by other workers to pick up the leader's result (e.g. a cache read)
+    with _lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        record_singleflight_wait("in_process")
+        logging.info(f"Waiting for in-flight request: {key}")
+        if not call.done.wait(timeout=config.SINGLEFLIGHT_WAIT_SECONDS):
+            logging.warning(f"Timed out waiting for the in-flight request {key} - computing it here")
+            return fn()
+        if call.error is not None:
+            raise call.error
+        if call.result is not None:
+            return call.result
+        # we joined a background refresh that another worker owned - go again
+        return do(key, fn, poll)
+
+    try:
+        call.result = _run_with_lease(key, fn, poll)
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            _calls.pop(key, None)
+        call.done.set()
+
+def refresh_in_background(key: str, fn):
+    # stale-while-revalidate: at most one refresh per key across all workers, nobody waits for it
+    with _lock:
+        if key in _calls:
+            return False # already being computed in this process
+        call = _calls[key] = _Call()
+
+    def _refresh():
+        try:
+            token = _acquire_lease(key)
+            if token is None:
+                return # another worker is already refreshing it
+            try:
+                call.result = fn()
+            finally:
+                _release_lease(key, token)
+        except Exception as e:
+            call.error = e
+            logging.error(f"Background refresh failed for {key}: {e}")
+        finally:
+            with _lock:
+                _calls.pop(key, None)
+            call.done.set()
+
+    threading.Thread(target=_refresh, name=f"refresh:{key[:40]}", daemon=True).start()
+    return True
+
+
+# ---- async (event loop) versions ----
+
+_acalls = {} # key -> asyncio.Future in flight on this event loop
+_background = set() # refresh tasks, kept referenced until they finish
+
+async def _aacquire_lease(key: str):
+    token = str(uuid.uuid4())
+    if cache_store.aredis_client is None:
+        return token
+    if await cache_store.aredis_client.set(_lease_key(key), token, nx=True, px=config.SINGLEFLIGHT_LEASE_MS):
+        return token
+    return None
+
+async def _arelease_lease(key: str, token: str):
+    if cache_store.aredis_client is None:
+        return
+    try:
+        await cache_store.aredis_client.eval(_RELEASE_SCRIPT, 1, _lease_key(key), token)
+    except Exception as e:
+        logging.warning(f"Could not release lease for {key}: {e}")
+
+async def _arun_with_lease(key: str, fn, poll):
+    deadline = time.monotonic() + config.SINGLEFLIGHT_WAIT_SECONDS
+    waited = False
+    while True:
+        token = await _aacquire_lease(key)
+        if token is not None:
+            try:
+                return await fn()
+            finally:
+                await _arelease_lease(key, token)
+        if not waited:
+            record_singleflight_wait("redis")
+            waited = True
+        if poll is not None:
+            result = await poll()
+            if result is not None:
+                return result
+        if time.monotonic() > deadline:
+            logging.warning(f"Timed out waiting for the leader of {key} - computing it here")
+            return await fn()
+        await asyncio.sleep(config.SINGLEFLIGHT_POLL_SECONDS)
+
+async def ado(key: str, fn, poll=None):
+    # like do(), but fn and poll are coroutine functions
+    call = _acalls.get(key)
+    if call is not None:
+        record_singleflight_wait("in_process")
+        logging.info(f"Waiting for in-flight request: {key}")
+        try:
+            result = await asyncio.shield(call) # our own cancellation must not cancel the leader
+        except asyncio.CancelledError:
+            if call.cancelled(): # the leader's client went away - take over
+                return await ado(key, fn, poll)
+            raise
+        if result is not None:
+            return result
+        return await ado(key, fn, poll)
+
+    call = _acalls[key] = asyncio.get_running_loop().create_future()
+    try:
+        result = await _arun_with_lease(key, fn, poll)
+        call.set_result(result)
+        return result
+    except asyncio.CancelledError:
+        call.cancel()
+        raise
+    except Exception as e:
+        call.set_exception(e)
+        call.exception() # mark it retrieved even if nobody was waiting
+        raise
+    finally:
+        _acalls.pop(key, None)
+
+def arefresh_in_background(key: str, fn):
+    # like refresh_in_background(), as a task on the running event loop
+    if key in _acalls:
+        return False
+    call = _acalls[key] = asyncio.get_running_loop().create_future()
+
+    async def _refresh():
+        try:
+            token = await _aacquire_lease(key)
+            if token is None:
+                call.set_result(None)
+                return
+            try:
+                call.set_result(await fn())
+            finally:
+                await _arelease_lease(key, token)
+        except Exception as e:
+            if not call.done():
+                call.set_exception(e)
+                call.exception()
+            logging.error(f"Background refresh failed for {key}: {e}")
+        finally:
+            if not call.done():
+                call.cancel()
+            _acalls.pop(key, None)
+
+    task = asyncio.create_task(_refresh(), name=f"refresh:{key[:40]}")
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return True
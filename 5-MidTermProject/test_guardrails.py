@@ -0,0 +1,65 @@
+# test_guardrails.py
+# The compiled guardrail engine and the streaming redactor: python -m pytest test_guardrails.py
+import random
+from guardrails import scan, StreamRedactor
+
+
+def test_credit_card_is_luhn_checked():
+    assert scan("card 4111 1111 1111 1111 on file").text == "card [REDACTED] on file"
+    assert scan("card 4111-1111-1111-1111 on file").fired["credit_card"] == 1
+    assert scan("order 4111 1111 1111 1112 shipped").text == "order 4111 1111 1111 1112 shipped" # fails Luhn
+
+def test_banned_words_whole_word_any_case():
+    assert scan("They will KILL it").text == "They will [BANNED_CONTENT] it"
+    assert scan("Attack and die.").fired["banned_word"] == 2
+    assert scan("skill, diet and attacker").fired == {} # only whole words
+
+def test_email_inside_text():
+    result = scan("write to jane.doe@example.com today")
+    assert result.text == "write to [REDACTED] today"
+    assert result.fired["email"] == 1
+
+def test_phone_is_redacted():
+    assert scan("call 555-123-4567 now").text == "call [REDACTED] now"
+
+def test_ssn_blocks_the_whole_text():
+    result = scan("the SSN is 123-45-6789, call 555-123-4567")
+    assert result.blocked
+    assert result.text == "[REDACTED]"
+
+def test_pii_inside_a_number_that_fails_luhn():
+    # a long run of digits, spaces and dashes that is not a card must not hide what is inside it
+    result = scan("acct 1234 123-45-6789 55")
+    assert result.blocked and result.text == "[REDACTED]"
+    result = scan("ref 12 555-123-4567 9")
+    assert result.text == "ref 12 [REDACTED] 9"
+    assert result.fired == {"phone": 1}
+    assert scan("12 4111 1111 1111 1111").text == "12 [REDACTED]" # the card inside the longer run
+
+
+def _stream(text, rng):
+    redactor = StreamRedactor()
+    out, start = [], 0
+    while start < len(text):
+        end = start + rng.randint(1, 12)
+        out.append(redactor.feed(text[start:end]))
+        start = end
+    out.append(redactor.flush())
+    return "".join(out), redactor
+
+def test_stream_matches_scan_across_chunk_splits():
+    rng = random.Random(0)
+    words = ["the", "agent", "kill", "Attack", "skill", "555-123-4567", "jane.doe@example.com",
+             "4111 1111 1111 1111", "4111-1111-1111-1111", "4111 1111 1111 1112", "42", "12 555-123-4567", "7 8 9", "\n"]
+    for _ in range(200):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 30)))
+        streamed, redactor = _stream(text, rng)
+        assert not redactor.redacted
+        assert streamed == scan(text).text, text
+
+def test_stream_ssn_stops_the_stream():
+    rng = random.Random(1)
+    for _ in range(50):
+        streamed, redactor = _stream("before the number 123-45-6789 and after it", rng)
+        assert redactor.redacted
+        assert "6789" not in streamed and "after" not in streamed
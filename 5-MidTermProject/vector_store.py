@@ -9,6 +9,7 @@ Key Components:
 - RedisVectorStore: Persistent vector storage using Redis
 - OpenAIEmbeddings: Converts text to high-dimensional vectors
 - Document: LangChain document structure for storing text content
+- Query embedding cache: in-process LRU + Redis, so a repeated query costs one KNN round trip
 """
 
 import config
@@ -17,6 +18,15 @@ from langchain_redis import RedisVectorStore
 from langchain_core.documents import Document
 from dotenv import load_dotenv
 import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from abc import ABC, abstractmethod
+import numpy as np
+import redis
+import redis.asyncio as aioredis
+from redis.commands.search.query import Query
 load_dotenv()
 # Redis connection URL from configuration
 # Format: redis://[username]:[password]@[host]:[port] or redis://[host]:[port]
@@ -27,14 +37,28 @@ REDIS_URL = config.REDIS_URL
 # The embedding model is shared across all operations for consistency
 embedding_model = OpenAIEmbeddings(model=config.EMBEDDING_MODEL)
 
+# Async Redis client for aretrieve_documents(), created on first use
+# RedisVectorStore only offers sync search (its async methods run it in a thread)
+_async_client = None
+
+# The vector store handle, created on first use and shared by every query (see get_vectorstore)
+_store = None
+_store_checked_at = 0.0
+_store_lock = threading.Lock()
+
+# Query embedding cache: normalized text -> float32 bytes, in process and in Redis
+EMBEDDING_CACHE_PREFIX = "rag:emb:"
+_embeddings = OrderedDict()
+_embeddings_lock = threading.Lock()
+
 
 def add_documents(documents: list[str]):
     """
-    Add documents to the Redis vector store.
+    Add documents to the vector store (the backend chosen by config.VECTOR_BACKEND).
     
-    This function takes a list of text strings, converts them to Document objects,
-    generates embeddings for each document, and stores them in Redis with the
-    specified index name. The documents become searchable after this operation.
+    This function takes a list of text strings, generates embeddings for each
+    document, and stores them in the backend. The documents become searchable
+    after this operation.
     
     Args:
         documents (list[str]): A list of text strings to be stored in the vector database.
@@ -45,54 +69,225 @@ def add_documents(documents: list[str]):
     
     Note:
         - Documents are automatically embedded using the configured embedding model
-        - All documents are stored in the same Redis index (specified in config.INDEX_NAME)
-        - If documents with the same content already exist, they may be duplicated
-    """
-    # Convert each string to a LangChain Document object
-    # Document objects have a page_content field that stores the actual text
-    docs = [Document(page_content=doc) for doc in documents]
-    
-    # Create or update the Redis vector store with the new documents
-    # This operation:
-    # 1. Generates embeddings for each document using the embedding_model
-    # 2. Stores the embeddings and metadata in Redis
-    # 3. Creates the index if it doesn't exist
-    RedisVectorStore.from_documents(
-        documents=docs,
-        embedding=embedding_model,
-        redis_url=REDIS_URL,
+        - With the Redis backend, all documents are stored in the same Redis index
+          (config.INDEX_NAME) and duplicates are stored again; the embedded backend
+          skips chunks it already has
+    """
+    get_backend().add(documents)
+    
+    # Keep the BM25 keyword index (hybrid retrieval) in step with the vector index
+    import bm25
+    bm25.add_documents(documents)
+
+
+def _connect():
+    # one client (connection pool) for the lifetime of the handle
+    client = redis.Redis.from_url(
+        REDIS_URL,
+        socket_connect_timeout=config.VECTOR_STORE_CONNECT_TIMEOUT_SECONDS,
+        health_check_interval=config.VECTOR_STORE_HEALTH_CHECK_SECONDS,
+    )
+    client.ping()
+    # embedding_dimensions is given so the constructor doesn't embed a sample text to find it
+    return RedisVectorStore(
+        embeddings=embedding_model,
+        redis_client=client,
         index_name=config.INDEX_NAME,
+        embedding_dimensions=config.EMBEDDING_DIMENSIONS,
     )
 
 
 def get_vectorstore():
     """
-    Get an instance of the Redis vector store.
+    Get the shared instance of the Redis vector store.
     
-    This function creates and returns a RedisVectorStore instance connected to
-    the configured Redis database and index. This instance can be used to perform
-    similarity searches and other vector operations.
+    The store is created on the first call and then reused, so queries don't pay for a
+    new RedisVectorStore and connection each time. Once every
+    VECTOR_STORE_HEALTH_CHECK_SECONDS the connection is pinged; if that fails the handle
+    is rebuilt, retrying with exponential backoff.
     
     Returns:
         RedisVectorStore: A configured instance of the Redis vector store that can be
                          used for querying and retrieving documents.
     
+    Raises:
+        ConnectionError: If Redis can't be reached after VECTOR_STORE_CONNECT_RETRIES attempts.
+    
     Note:
         - This doesn't create a new index, it connects to an existing one
         - The index must have been created previously using add_documents()
-        - Multiple calls return independent instances (stateless)
     """
-    # try except to handle the error if the index name is not found
+    global _store, _store_checked_at
+    with _store_lock:
+        now = time.monotonic()
+        if _store is not None and now - _store_checked_at < config.VECTOR_STORE_HEALTH_CHECK_SECONDS:
+            return _store
+        if _store is not None:
+            try:
+                _store.config.redis().ping()
+                _store_checked_at = now
+                return _store
+            except Exception as e:
+                logging.warning(f"Vector store health check failed, reconnecting: {e}")
+                _store = None
+
+        delay = config.VECTOR_STORE_BACKOFF_SECONDS
+        for attempt in range(1, config.VECTOR_STORE_CONNECT_RETRIES + 1):
+            try:
+                _store = _connect()
+                _store_checked_at = time.monotonic()
+                return _store
+            except Exception as e:
+                logging.warning(f"Vector store connection attempt {attempt} failed: {e}")
+                if attempt == config.VECTOR_STORE_CONNECT_RETRIES:
+                    raise ConnectionError(f"Could not connect to the vector store at {REDIS_URL}") from e
+                time.sleep(delay)
+                delay *= 2
+
+
+def reset_vectorstore():
+    """Drop the shared handle so the next get_vectorstore() reconnects."""
+    global _store
+    with _store_lock:
+        _store = None
+
+
+def _embedding_key(normalized: str) -> str:
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    return f"{EMBEDDING_CACHE_PREFIX}{config.EMBEDDING_MODEL}:{digest}"
+
+
+def _lru_get(normalized: str):
+    with _embeddings_lock:
+        embedding = _embeddings.get(normalized)
+        if embedding is not None:
+            _embeddings.move_to_end(normalized)
+        return embedding
+
+
+def _lru_put(normalized: str, embedding: bytes):
+    with _embeddings_lock:
+        _embeddings[normalized] = embedding
+        while len(_embeddings) > config.EMBEDDING_CACHE_SIZE:
+            _embeddings.popitem(last=False)
+
+
+def _to_bytes(vector) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def embed_query_bytes(text: str) -> bytes:
+    """
+    Embed a query, with caching.
+    
+    Embeddings are keyed by (embedding model, normalized text), so "What is RAG?" and
+    "what is rag" share one entry, and stored as float32 bytes (6 KB for 1536 dims).
+    Lookup order: in-process LRU, then Redis, then the OpenAI API.
+    
+    Args:
+        text (str): The query text.
+    
+    Returns:
+        bytes: The float32 embedding of the normalized text.
+    """
+    from cache_store import normalize, redis_client
+    normalized = normalize(text)
+    embedding = _lru_get(normalized)
+    if embedding is not None:
+        return embedding
     try:
-        return RedisVectorStore(
-            embeddings=embedding_model,
-            redis_url=REDIS_URL,
-            index_name=config.INDEX_NAME,
-        )
+        embedding = redis_client.get(_embedding_key(normalized)) if redis_client is not None else None
+    except Exception as e:
+        logging.warning(f"Embedding cache read failed: {e}")
+    if embedding is None:
+        embedding = _to_bytes(embedding_model.embed_query(normalized))
+        try:
+            if redis_client is not None:
+                redis_client.setex(_embedding_key(normalized), config.EMBEDDING_CACHE_TTL_SECONDS, embedding)
+        except Exception as e:
+            logging.warning(f"Embedding cache write failed: {e}")
+    _lru_put(normalized, embedding)
+    return embedding
+
+
+async def aembed_query_bytes(text: str) -> bytes:
+    """Async version of embed_query_bytes()."""
+    from cache_store import normalize, aredis_client
+    normalized = normalize(text)
+    embedding = _lru_get(normalized)
+    if embedding is not None:
+        return embedding
+    try:
+        embedding = await aredis_client.get(_embedding_key(normalized)) if aredis_client is not None else None
     except Exception as e:
-        print(f"Error: {e}")
-        return None
+        logging.warning(f"Embedding cache read failed: {e}")
+    if embedding is None:
+        embedding = _to_bytes(await embedding_model.aembed_query(normalized))
+        try:
+            if aredis_client is not None:
+                await aredis_client.setex(_embedding_key(normalized), config.EMBEDDING_CACHE_TTL_SECONDS, embedding)
+        except Exception as e:
+            logging.warning(f"Embedding cache write failed: {e}")
+    _lru_put(normalized, embedding)
+    return embedding
+
+
+async def aembed_many(texts: list[str]) -> list[bytes]:
+    """
+    Cached embeddings for a batch of queries.
+    
+    Whatever is not in the LRU is fetched from Redis with one MGET, and whatever is
+    not there either is embedded with ONE embed_documents call.
+    
+    Args:
+        texts (list[str]): The query texts.
+    
+    Returns:
+        list[bytes]: The float32 embedding of each normalized text, in order.
+    """
+    from cache_store import normalize, aredis_client
+    normalized = [normalize(t) for t in texts]
+    embeddings = {n: e for n in normalized if (e := _lru_get(n)) is not None}
+    missing = list(dict.fromkeys(n for n in normalized if n not in embeddings))
+    if missing and aredis_client is not None:
+        try:
+            for n, e in zip(missing, await aredis_client.mget([_embedding_key(n) for n in missing])):
+                if e is not None:
+                    embeddings[n] = e
+        except Exception as e:
+            logging.warning(f"Embedding cache read failed: {e}")
+        missing = [n for n in missing if n not in embeddings]
+    if missing:
+        vectors = await embedding_model.aembed_documents(missing)
+        new = {n: _to_bytes(v) for n, v in zip(missing, vectors)}
+        embeddings.update(new)
+        try:
+            if aredis_client is not None:
+                async with aredis_client.pipeline() as pipe:
+                    for n, e in new.items():
+                        pipe.setex(_embedding_key(n), config.EMBEDDING_CACHE_TTL_SECONDS, e)
+                    await pipe.execute()
+        except Exception as e:
+            logging.warning(f"Embedding cache write failed: {e}")
+    for n, e in embeddings.items():
+        _lru_put(n, e)
+    return [embeddings[n] for n in normalized]
+
 
+def embed_query(text: str) -> list[float]:
+    """Cached query embedding as a list of floats (see embed_query_bytes)."""
+    return np.frombuffer(embed_query_bytes(text), dtype=np.float32).tolist()
+
+
+def _search(method: str, *args, **kwargs):
+    # run a search method on the shared store; if the connection dropped between health
+    # checks, reconnect once and retry
+    try:
+        return getattr(get_vectorstore(), method)(*args, **kwargs)
+    except redis.ConnectionError as e:
+        logging.warning(f"Vector search failed, reconnecting: {e}")
+        reset_vectorstore()
+        return getattr(get_vectorstore(), method)(*args, **kwargs)
 
 
 def retrieve_documents(query: str, k: int = 3):
@@ -118,23 +313,12 @@ def retrieve_documents(query: str, k: int = 3):
         >>> results = retrieve_documents("machine learning algorithms", k=5)
         >>> print(results[0])  # Most similar document text
     """
-    # Fetch the instance of the vector store connected to Redis
-    # Retry logic to handle the error in redis
-    for i in range(3):
-        try:
-            vectorstore = get_vectorstore()
-            break
-        except Exception as e:
-            print(f"Error: {e}")
-            time.sleep(1)
-    # vectorstore = get_vectorstore()
-    
-    # Perform similarity search: converts query to embedding and finds k nearest neighbors
-    # Returns Document objects sorted by similarity (highest similarity first)
-    results = vectorstore.similarity_search(query, k=k)
+    # Embed the query (cached) and find the k nearest neighbors in the backend
+    # Results are sorted by similarity (highest similarity first)
+    results = get_backend().search(embed_query_bytes(query), k)
     
-    # Extract just the text content from each Document object
-    return [d.page_content for d in results]
+    # Extract just the text content
+    return [text for text, _, _ in results]
 
 
 def retrieve_documents_with_score(query: str, k: int = 3):
@@ -166,12 +350,210 @@ def retrieve_documents_with_score(query: str, k: int = 3):
         >>> for text, score in results:
         ...     print(f"Score: {score:.4f} - {text[:50]}...")
     """
-    # Fetch the instance of the vector store connected to Redis
-    vectorstore = get_vectorstore()
+    # Perform similarity search with scores included (cached query embedding)
+    # Results are sorted by similarity; the score is the cosine distance
+    results = get_backend().search(embed_query_bytes(query), k)
+    
+    # Return text content and scores as a list of (text, score) tuples
+    return [(text, distance) for text, distance, _ in results]
+
+
+def _get_async_client():
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.Redis.from_url(REDIS_URL)
+    return _async_client
+
+
+class VectorBackend(ABC):
+    """
+    Where the chunk vectors live and how they are searched.
+    
+    add_documents() and the retrieve_* functions below go through the backend chosen by
+    config.VECTOR_BACKEND ("redis" or "embedded"); query embedding and its cache stay in
+    this module, so backends only ever see precomputed vectors.
     
-    # Perform similarity search with scores included
-    # Returns tuples of (Document, score) sorted by similarity
-    results = vectorstore.similarity_search_with_score(query, k=k)
+    search() returns (text, cosine distance, vector or None) tuples, most similar first;
+    the vector is only filled in when with_vectors is True.
+    """
+
+    @abstractmethod
+    def add(self, texts: list[str]):
+        """Embed and store the chunks that are not stored yet."""
+
+    @abstractmethod
+    def search(self, embedding: bytes, k: int, with_vectors: bool = False):
+        """The k chunks nearest to a query embedding."""
+
+    async def asearch(self, embedding: bytes, k: int, with_vectors: bool = False):
+        # a local backend answers in microseconds - no need to leave the event loop
+        return self.search(embedding, k, with_vectors)
+
+    def new_texts(self) -> list[str]:
+        """Chunks added (by any process) since the last call - used to keep BM25 in step."""
+        return []
+
+    async def aclose(self):
+        pass
+
+
+class RedisBackend(VectorBackend):
+    """Redis Stack (RediSearch) through RedisVectorStore - the shared, multi-node option."""
+
+    def __init__(self):
+        self._seen_keys = set()
+
+    def add(self, texts: list[str]):
+        # Convert each string to a LangChain Document object and let RedisVectorStore
+        # 1. generate embeddings for each document using the embedding_model
+        # 2. store the embeddings and metadata in Redis
+        # 3. create the index if it doesn't exist
+        RedisVectorStore.from_documents(
+            documents=[Document(page_content=text) for text in texts],
+            embedding=embedding_model,
+            redis_url=REDIS_URL,
+            index_name=config.INDEX_NAME,
+        )
+
+    def search(self, embedding: bytes, k: int, with_vectors: bool = False):
+        vector = np.frombuffer(embedding, dtype=np.float32).tolist()
+        results = _search("similarity_search_with_score_by_vector", vector, k=k, with_vectors=with_vectors)
+        if with_vectors:
+            return [(doc.page_content, float(score), np.asarray(v, dtype=np.float32)) for doc, score, v in results]
+        return [(doc.page_content, float(score), None) for doc, score in results]
+
+    async def asearch(self, embedding: bytes, k: int, with_vectors: bool = False):
+        # the KNN query goes straight to the RediSearch index that RedisVectorStore created
+        # (hash documents with a "text" field and an "embedding" vector field)
+        knn = (
+            Query(f"*=>[KNN {k} @embedding $vec AS distance]")
+            .sort_by("distance")
+            .return_fields("text", "distance")
+            .paging(0, k)
+            .dialect(2)
+        )
+        if with_vectors:
+            knn.return_field("embedding", decode_field=False) # raw float32 bytes
+        results = await _get_async_client().ft(config.INDEX_NAME).search(knn, query_params={"vec": embedding})
+        return [
+            (doc.text, float(doc.distance), np.frombuffer(doc.embedding, dtype=np.float32) if with_vectors else None)
+            for doc in results.docs
+        ]
+
+    def new_texts(self) -> list[str]:
+        # chunks are the hashes under <INDEX_NAME>:* - read the ones we haven't seen yet
+        from cache_store import redis_client
+        if redis_client is None:
+            return []
+        new_keys = [key for key in redis_client.scan_iter(match=f"{config.INDEX_NAME}:*", count=1000) if key not in self._seen_keys]
+        texts = []
+        for start in range(0, len(new_keys), 500):
+            batch = new_keys[start:start + 500]
+            pipe = redis_client.pipeline(transaction=False)
+            for key in batch:
+                pipe.hget(key, "text")
+            for key, text in zip(batch, pipe.execute(raise_on_error=False)):
+                self._seen_keys.add(key)
+                if isinstance(text, bytes): # skips non-hash keys under the same prefix
+                    texts.append(text.decode())
+        return texts
+
+    async def aclose(self):
+        global _async_client
+        if _async_client is not None:
+            await _async_client.aclose()
+            _async_client = None
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> VectorBackend:
+    """The vector backend chosen by config.VECTOR_BACKEND, created on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if config.VECTOR_BACKEND == "embedded":
+                from embedded_index import EmbeddedBackend
+                _backend = EmbeddedBackend(config.EMBEDDED_INDEX_DIR, config.EMBEDDING_DIMENSIONS)
+            elif config.VECTOR_BACKEND == "redis":
+                _backend = RedisBackend()
+            else:
+                raise ValueError(f"Unknown VECTOR_BACKEND: {config.VECTOR_BACKEND}")
+        return _backend
+
+
+async def aretrieve_documents(query: str, k: int = 3):
+    """
+    Async version of retrieve_documents() for the async API path.
     
-    # Extract text content and scores, returning as list of (text, score) tuples
-    return [(d.page_content, score) for d, score in results]
\ No newline at end of file
+    The query is embedded with the async OpenAI client (or comes from the embedding
+    cache) and searched without blocking the event loop (with the Redis backend the
+    KNN query is sent over redis.asyncio).
+    
+    Args:
+        query (str): The search query text.
+        k (int, optional): The number of most similar documents to retrieve. Defaults to 3.
+    
+    Returns:
+        list[str]: The text of the k most similar documents, most similar first.
+    """
+    embedding = await aembed_query_bytes(query)
+    return await aretrieve_documents_by_vector(embedding, k)
+
+
+def _as_bytes(embedding) -> bytes:
+    if isinstance(embedding, bytes):
+        return embedding
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+async def aretrieve_documents_by_vector(embedding, k: int = 3):
+    """
+    KNN search for an embedding that has already been computed (e.g. in a batch).
+    
+    Args:
+        embedding (list[float] | bytes): The query embedding, or its float32 bytes.
+        k (int, optional): The number of most similar documents to retrieve. Defaults to 3.
+    
+    Returns:
+        list[str]: The text of the k most similar documents, most similar first.
+    """
+    results = await get_backend().asearch(_as_bytes(embedding), k)
+    return [text for text, _, _ in results]
+
+
+def _as_matrix(vectors, count: int) -> np.ndarray:
+    return np.asarray(vectors, dtype=np.float32).reshape(count, -1)
+
+
+def retrieve_candidates(query: str, k: int = 10):
+    """
+    Over-fetch candidate chunks together with their stored embeddings.
+    
+    Used by the post-retrieval stage (near-duplicate removal + MMR in retrieval.py),
+    which needs the chunk vectors; they come back in the same KNN round trip.
+    
+    Args:
+        query (str): The search query text.
+        k (int, optional): The number of candidates to fetch. Defaults to 10.
+    
+    Returns:
+        tuple[list[str], np.ndarray]: The chunk texts, most similar first, and a
+            (k, dimensions) float32 matrix with their embeddings.
+    """
+    results = get_backend().search(embed_query_bytes(query), k, with_vectors=True)
+    return [text for text, _, _ in results], _as_matrix([v for _, _, v in results], len(results))
+
+
+async def aretrieve_candidates_by_vector(embedding, k: int = 10):
+    """Async version of retrieve_candidates() for a precomputed query embedding."""
+    results = await get_backend().asearch(_as_bytes(embedding), k, with_vectors=True)
+    return [text for text, _, _ in results], _as_matrix([v for _, _, v in results], len(results))
+
+
+async def aclose():
+    """Release the backend's async connections (on API shutdown)."""
+    if _backend is not None:
+        await _backend.aclose()